@@ -39,7 +39,7 @@ class Event(object):
             provides the simulation application's type for an `Event`; it may also carry a payload
             for the `Event` in its attributes.
     """
-    # TODO(Arthur): for performance, perhaps pre-allocate and reuse events
+    # for performance, executed events are reused; see `EventQueue.recycle_events()`
 
     # use __slots__ to save space
     # TODO(Arthur): figure out how to stop Sphinx from documenting these __slots__ as attributes
@@ -57,11 +57,19 @@ class Event(object):
     def _get_order_time(self):
         """ Provide the tuple that determines this event's time order
 
+        Once an `EventQueue` has ranked the receiving object the tuple is `(event_time, event_rank)`,
+        which orders events like, but compares faster than, the tuple
+        `(event_time, class_event_priority, event_time_tiebreaker)` used for unranked objects.
+
         Returns:
             :obj:`tuple`: the tuple that determines this event's time order
         """
-        return (self.event_time, self.receiving_object.class_event_priority,
-                self.receiving_object.event_time_tiebreaker)
+        receiving_object = self.receiving_object
+        event_rank = receiving_object.event_rank
+        if event_rank is None:
+            return (self.event_time, receiving_object.class_event_priority,
+                    receiving_object.event_time_tiebreaker)
+        return (self.event_time, event_rank)
 
     def __lt__(self, other):
         """ Does this `Event` occur earlier than `other`?
@@ -0,0 +1,785 @@
+""" Priority queues that store the events in an event queue
+
+An :obj:`EventQueue` delegates the storage and ordering of its events to an :obj:`EventQueueBackend`.
+Five backends are provided:
+
+* :obj:`HeapEventQueueBackend`: a binary heap; `O(log(n))` enqueue and dequeue
+* :obj:`IndexedHeapEventQueueBackend`: a binary heap that tracks the position of each entry, so that
+  an entry whose event time changes can be moved in `O(log(n))`
+* :obj:`CalendarEventQueueBackend`: a calendar queue :cite:`brown1988calendar`; amortized `O(1)`
+  enqueue and dequeue when event times are reasonably distributed
+* :obj:`LadderEventQueueBackend`: a ladder queue :cite:`tang2005ladder`; amortized `O(1)`
+  enqueue and dequeue, and more robust than a calendar queue to skewed event time distributions
+* :obj:`TwoLevelEventQueueBackend`: a local heap of pending entries for each receiving simulation
+  object, and a global heap of the earliest entry of each object; `O(log(k))` dequeue, where `k` is
+  the number of simulation objects with pending events
+
+Backends store entries, which are sequences of native values, rather than :obj:`Event` objects, so
+that entries are compared by fast, built-in sequence comparison instead of `Event.__lt__`. An entry's
+first element is its event time and its last element is its :obj:`Event`; the intermediate elements
+break ties among simultaneous events. An :obj:`EventQueue` makes entries
+`[event_time, event_rank, sequence_number, event]`, where `event_rank` is an integer that orders the
+receiving object's `(class_priority, event_time_tiebreaker)` key among those of the other receiving
+objects. These entries order events exactly as the comparison operators of :obj:`Event` do, and break
+remaining ties by the order in which events were scheduled. Since the sequence number is unique, an
+entry's :obj:`Event` is never compared. An entry whose last element has been set to `None` is a
+tombstone, which marks a cancelled event.
+
+All backends dequeue entries in exactly the same order.
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-07-20
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from abc import ABCMeta
+import abc
+import heapq
+import math
+
+from de_sim.errors import SimulatorError
+
+
+class EventQueueBackend(object, metaclass=ABCMeta):
+    """ Abstract base class for the priority queues that store an :obj:`EventQueue`'s events
+
+    A backend stores entries, which are sequences ordered by built-in sequence comparison; the first
+    element of an entry is its event time and the last element is its :obj:`Event`, or `None` if the
+    entry is a tombstone.
+    """
+
+    # the name used to select this backend
+    NAME = None
+
+    # whether `update()` can restore the order of an entry whose key has been changed in place
+    UPDATABLE = False
+
+    @abc.abstractmethod
+    def push(self, entry):
+        """ Insert an entry
+
+        Args:
+            entry (:obj:`list`): an entry
+        """
+        pass  # pragma: no cover
+
+    def push_many(self, entries):
+        """ Insert multiple entries
+
+        Args:
+            entries (:obj:`list` of :obj:`list`): entries
+        """
+        for entry in entries:
+            self.push(entry)
+
+    @abc.abstractmethod
+    def peek(self):
+        """ Get the earliest entry, without removing it
+
+        Returns:
+            :obj:`list`: the earliest entry, or `None` if the backend is empty
+        """
+        pass  # pragma: no cover
+
+    @abc.abstractmethod
+    def pop(self):
+        """ Remove and return the earliest entry
+
+        Returns:
+            :obj:`list`: the earliest entry
+
+        Raises:
+            :obj:`IndexError`: if the backend is empty
+        """
+        pass  # pragma: no cover
+
+    @abc.abstractmethod
+    def entries(self):
+        """ Get all entries, in no particular order
+
+        Returns:
+            :obj:`list` of :obj:`list`: all entries in the backend
+        """
+        pass  # pragma: no cover
+
+    def object_entries(self, receiving_object):
+        """ Get the entries for the events that a simulation object will receive, in no particular order
+
+        Backends that group entries by receiving object may also return tombstones.
+
+        Args:
+            receiving_object (:obj:`SimulationObject`): a simulation object
+
+        Returns:
+            :obj:`list` of :obj:`list`: the entries for `receiving_object`'s events
+        """
+        return [entry for entry in self.entries()
+                if entry[-1] is not None and entry[-1].receiving_object is receiving_object]
+
+    def update(self, entry):
+        """ Restore the order of an entry whose key has been changed in place
+
+        Only supported by backends whose `UPDATABLE` is set.
+
+        Args:
+            entry (:obj:`list`): an entry in the backend
+        """
+        raise NotImplementedError(f"the '{self.NAME}' event queue backend does not support update()")
+
+    def compact(self):
+        """ Remove all tombstones
+        """
+        live_entries = [entry for entry in self.entries() if entry[-1] is not None]
+        self.clear()
+        for entry in live_entries:
+            self.push(entry)
+
+    @abc.abstractmethod
+    def clear(self):
+        """ Remove all entries
+        """
+        pass  # pragma: no cover
+
+    @abc.abstractmethod
+    def __len__(self):
+        """ Get the number of entries
+
+        Returns:
+            :obj:`int`: the number of entries in the backend
+        """
+        pass  # pragma: no cover
+
+
+class HeapEventQueueBackend(EventQueueBackend):
+    """ A binary heap of entries
+
+    Attributes:
+        heap (:obj:`list`): a min heap of entries
+    """
+    NAME = 'heap'
+
+    # insert a batch by appending it and re-heapifying, which costs `O(n)`, rather than by pushing
+    # each entry, which costs `O(log(n))` apiece, if the batch holds at least this fraction of the
+    # entries in the heap after insertion
+    BULK_HEAPIFY_FRACTION = 0.25
+
+    def __init__(self):
+        self.heap = []
+
+    def push(self, entry):
+        heapq.heappush(self.heap, entry)
+
+    def push_many(self, entries):
+        heap = self.heap
+        if self.BULK_HEAPIFY_FRACTION * (len(heap) + len(entries)) <= len(entries):
+            heap.extend(entries)
+            heapq.heapify(heap)
+        else:
+            for entry in entries:
+                heapq.heappush(heap, entry)
+
+    def peek(self):
+        if self.heap:
+            return self.heap[0]
+        return None
+
+    def pop(self):
+        return heapq.heappop(self.heap)
+
+    def entries(self):
+        return list(self.heap)
+
+    def compact(self):
+        self.heap = [entry for entry in self.heap if entry[-1] is not None]
+        heapq.heapify(self.heap)
+
+    def clear(self):
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class IndexedHeapEventQueueBackend(EventQueueBackend):
+    """ A binary heap of entries that tracks the position of each entry
+
+    Tracking positions lets `update()` move an entry whose key has changed in `O(log(n))`, instead of
+    tombstoning it and inserting a new entry. Because its sifts are written in Python, enqueue and
+    dequeue are slower than in :obj:`HeapEventQueueBackend`, which uses `heapq`.
+
+    Attributes:
+        heap (:obj:`list`): a min heap of entries
+        positions (:obj:`dict`): map from the `id` of each entry in `heap` to its index in `heap`
+    """
+    NAME = 'indexed_heap'
+    UPDATABLE = True
+
+    # like `HeapEventQueueBackend.BULK_HEAPIFY_FRACTION`
+    BULK_HEAPIFY_FRACTION = 0.25
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.heap = []
+        self.positions = {}
+
+    def _sift_up(self, position):
+        """ Move the entry at `position` towards the root until its parent is not later
+
+        Args:
+            position (:obj:`int`): the index of an entry in `heap`
+
+        Returns:
+            :obj:`int`: the entry's new index
+        """
+        heap = self.heap
+        positions = self.positions
+        entry = heap[position]
+        while 0 < position:
+            parent_position = (position - 1) >> 1
+            parent = heap[parent_position]
+            if not entry < parent:
+                break
+            heap[position] = parent
+            positions[id(parent)] = position
+            position = parent_position
+        heap[position] = entry
+        positions[id(entry)] = position
+        return position
+
+    def _sift_down(self, position):
+        """ Move the entry at `position` towards the leaves until its children are not earlier
+
+        Args:
+            position (:obj:`int`): the index of an entry in `heap`
+        """
+        heap = self.heap
+        positions = self.positions
+        size = len(heap)
+        entry = heap[position]
+        child_position = 2 * position + 1
+        while child_position < size:
+            right_position = child_position + 1
+            if right_position < size and heap[right_position] < heap[child_position]:
+                child_position = right_position
+            child = heap[child_position]
+            if not child < entry:
+                break
+            heap[position] = child
+            positions[id(child)] = position
+            position = child_position
+            child_position = 2 * position + 1
+        heap[position] = entry
+        positions[id(entry)] = position
+
+    def push(self, entry):
+        self.heap.append(entry)
+        self._sift_up(len(self.heap) - 1)
+
+    def push_many(self, entries):
+        heap = self.heap
+        if self.BULK_HEAPIFY_FRACTION * (len(heap) + len(entries)) <= len(entries):
+            heap.extend(entries)
+            heapq.heapify(heap)
+            self.positions = {id(entry): position for position, entry in enumerate(heap)}
+        else:
+            for entry in entries:
+                self.push(entry)
+
+    def peek(self):
+        if self.heap:
+            return self.heap[0]
+        return None
+
+    def pop(self):
+        heap = self.heap
+        last = heap.pop()
+        if not heap:
+            del self.positions[id(last)]
+            return last
+        earliest = heap[0]
+        del self.positions[id(earliest)]
+        heap[0] = last
+        self._sift_down(0)
+        return earliest
+
+    def update(self, entry):
+        self._sift_down(self._sift_up(self.positions[id(entry)]))
+
+    def entries(self):
+        return list(self.heap)
+
+    def compact(self):
+        self.heap = [entry for entry in self.heap if entry[-1] is not None]
+        heapq.heapify(self.heap)
+        self.positions = {id(entry): position for position, entry in enumerate(self.heap)}
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class CalendarEventQueueBackend(EventQueueBackend):
+    """ A calendar queue of events
+
+    A calendar queue hashes each event into one of an array of buckets, like days in a
+    calendar, by its event time. Each bucket spans `width` simulated time units, and the array spans
+    a 'year' of `num_buckets * width` time units. Dequeue scans the buckets from the current
+    position for an event in the current year. The number of buckets and their width adapt to
+    the queue size and the distribution of event times.
+
+    To order events exactly, each event is assigned the virtual bucket `floor(event_time / width)`,
+    which is non-decreasing in event time, and each bucket is a heap. Events with non-finite
+    times are held in an overflow heap.
+
+    The bucket width is re-estimated when the number of events doubles or halves, and when dequeues
+    scan many empty buckets, which indicates that the width no longer fits the event time distribution.
+
+    Attributes:
+        num_buckets (:obj:`int`): the number of buckets
+        width (:obj:`float`): the time span of each bucket
+        buckets (:obj:`list` of :obj:`list`): the buckets, each a heap of entries
+        overflow (:obj:`list`): heap of entries with non-finite event times
+        current_bucket (:obj:`int`): virtual bucket number of the current position in the calendar
+        size (:obj:`int`): number of entries in `buckets`
+        num_pops (:obj:`int`): number of dequeues since the width was last estimated
+        num_skipped (:obj:`int`): number of buckets skipped by dequeues since the width was last estimated
+    """
+    NAME = 'calendar'
+
+    # the smallest number of buckets
+    MIN_BUCKETS = 8
+    # re-estimate the width if dequeues skip more than this many buckets on average
+    MAX_MEAN_SKIPPED = 4
+    # the maximum number of events sampled to estimate a bucket width
+    WIDTH_SAMPLE_SIZE = 25
+
+    def __init__(self, width=1.0):
+        """
+        Args:
+            width (:obj:`float`, optional): the initial time span of each bucket
+        """
+        if not 0 < width:
+            raise SimulatorError(f"width ({width}) must be positive")
+        self.width = width
+        self.clear()
+
+    def clear(self):
+        self._make_buckets(self.MIN_BUCKETS)
+        self.overflow = []
+        self.current_bucket = 0
+        self.size = 0
+
+    def _make_buckets(self, num_buckets):
+        self.num_buckets = num_buckets
+        self.buckets = [[] for _ in range(num_buckets)]
+        self.num_pops = 0
+        self.num_skipped = 0
+
+    def _virtual_bucket(self, event_time):
+        return math.floor(event_time / self.width)
+
+    def push(self, entry):
+        event_time = entry[0]
+        if not math.isfinite(event_time):
+            heapq.heappush(self.overflow, entry)
+            return
+        virtual_bucket = math.floor(event_time / self.width)
+        heapq.heappush(self.buckets[virtual_bucket % self.num_buckets], entry)
+        # an event earlier than the current position moves the position back
+        if self.size == 0 or virtual_bucket < self.current_bucket:
+            self.current_bucket = virtual_bucket
+        self.size += 1
+        if 2 * self.num_buckets < self.size:
+            self._resize(2 * self.num_buckets)
+
+    def _locate(self):
+        """ Move the current position to the bucket that holds the earliest event
+
+        Returns:
+            :obj:`list`: the bucket that holds the earliest event
+        """
+        num_buckets = self.num_buckets
+        buckets = self.buckets
+        width = self.width
+        start = virtual_bucket = self.current_bucket
+        # scan one year of buckets
+        for _ in range(num_buckets):
+            bucket = buckets[virtual_bucket % num_buckets]
+            if bucket and math.floor(bucket[0][0] / width) <= virtual_bucket:
+                self.current_bucket = virtual_bucket
+                self.num_skipped += virtual_bucket - start
+                return bucket
+            virtual_bucket += 1
+        self.num_skipped += num_buckets
+
+        # no event in the next year; search directly for the earliest event
+        earliest = min(bucket[0] for bucket in buckets if bucket)
+        self.current_bucket = self._virtual_bucket(earliest[0])
+        return buckets[self.current_bucket % num_buckets]
+
+    def peek(self):
+        if self.overflow:
+            if self.size and self._locate()[0] < self.overflow[0]:
+                return self._locate()[0]
+            return self.overflow[0]
+        if self.size:
+            return self._locate()[0]
+        return None
+
+    def pop(self):
+        overflow = self.overflow
+        if overflow and (not self.size or overflow[0] < self._locate()[0]):
+            return heapq.heappop(overflow)
+        if not self.size:
+            raise IndexError('pop from an empty calendar queue')
+        entry = heapq.heappop(self._locate())
+        self.size -= 1
+        self.num_pops += 1
+        if self.MIN_BUCKETS < self.num_buckets and self.size < self.num_buckets // 2:
+            self._resize(self.num_buckets // 2)
+        elif self.num_buckets <= self.num_pops:
+            if self.MAX_MEAN_SKIPPED * self.num_pops < self.num_skipped:
+                self._resize(self.num_buckets)
+            else:
+                self.num_pops = self.num_skipped = 0
+        return entry
+
+    def _estimate_width(self, entries):
+        """ Estimate a bucket width from the separation of the earliest entries
+
+        Args:
+            entries (:obj:`list` of :obj:`list`): the entries in the calendar
+
+        Returns:
+            :obj:`float`: an estimated bucket width, or the current width if no estimate can be made
+        """
+        sample = heapq.nsmallest(self.WIDTH_SAMPLE_SIZE, entries)
+        separations = [later[0] - earlier[0] for earlier, later in zip(sample, sample[1:])]
+        if not separations:
+            return self.width
+        mean_separation = sum(separations) / len(separations)
+        # ignore outlying separations, as recommended by Brown
+        typical_separations = [separation for separation in separations if separation <= 2 * mean_separation]
+        mean_separation = sum(typical_separations) / len(typical_separations)
+        if 0 < mean_separation:
+            return 3 * mean_separation
+        return self.width
+
+    def _resize(self, num_buckets):
+        """ Copy the entries into a new calendar
+
+        Args:
+            num_buckets (:obj:`int`): the number of buckets in the new calendar
+        """
+        entries = [entry for bucket in self.buckets for entry in bucket]
+        self.width = self._estimate_width(entries)
+        self._make_buckets(num_buckets)
+        buckets = self.buckets
+        for entry in entries:
+            buckets[self._virtual_bucket(entry[0]) % num_buckets].append(entry)
+        for bucket in buckets:
+            heapq.heapify(bucket)
+        if entries:
+            self.current_bucket = self._virtual_bucket(min(entries)[0])
+
+    def entries(self):
+        return [entry for bucket in self.buckets for entry in bucket] + self.overflow
+
+    def __len__(self):
+        return self.size + len(self.overflow)
+
+
+class _Rung(object):
+    """ A rung in a ladder queue: an array of buckets that each span `width` time units
+
+    Attributes:
+        start (:obj:`float`): the time at which the first bucket starts
+        width (:obj:`float`): the time span of each bucket
+        buckets (:obj:`list` of :obj:`list`): the buckets, each an unsorted list of entries
+        current (:obj:`int`): index of the next bucket to dequeue
+    """
+
+    def __init__(self, start, width, num_buckets):
+        self.start = start
+        self.width = width
+        self.buckets = [[] for _ in range(num_buckets)]
+        self.current = 0
+
+    def index(self, event_time):
+        """ Get the index of the bucket that holds entries at time `event_time`
+
+        Bucket indices are non-decreasing in `event_time`.
+
+        Args:
+            event_time (:obj:`float`): an event time
+
+        Returns:
+            :obj:`int`: the index of the bucket for `event_time`, which may be negative
+        """
+        return min(math.floor((event_time - self.start) / self.width), len(self.buckets) - 1)
+
+
+class LadderEventQueueBackend(EventQueueBackend):
+    """ A ladder queue of entries
+
+    A ladder queue holds entries in three tiers:
+
+    * `top`, an unsorted list of entries later than `top_start`
+    * `rungs`, a ladder of bucket arrays; when a bucket is dequeued, it is either sorted into
+      `bottom` or, if it holds many entries, spawned into a new, finer rung
+    * `bottom`, a heap of the earliest entries
+
+    Attributes:
+        top (:obj:`list`): unsorted list of the latest entries
+        top_start (:obj:`float`): all entries in `top` occur after `top_start`
+        rungs (:obj:`list` of :obj:`_Rung`): the rungs; the last rung holds the earliest entries
+        bottom (:obj:`list`): heap of the earliest entries
+        size (:obj:`int`): the number of entries in the ladder queue
+    """
+    NAME = 'ladder'
+
+    # the largest bucket that is sorted into `bottom` rather than spawned into a new rung
+    THRESHOLD = 50
+    # the maximum number of rungs
+    MAX_RUNGS = 8
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.top = []
+        self.top_start = float('-inf')
+        self.rungs = []
+        self.bottom = []
+        self.size = 0
+
+    def push(self, entry):
+        self.size += 1
+        event_time = entry[0]
+        if self.top_start < event_time:
+            self.top.append(entry)
+            return
+        for rung in self.rungs:
+            index = rung.index(event_time)
+            if rung.current <= index:
+                rung.buckets[index].append(entry)
+                return
+        heapq.heappush(self.bottom, entry)
+
+    def _spawn_rung(self, entries):
+        """ Distribute `entries` into a new rung, or into `bottom` if they cannot be spread
+
+        Args:
+            entries (:obj:`list` of :obj:`list`): entries to distribute
+        """
+        times = [entry[0] for entry in entries]
+        start = min(times)
+        width = (max(times) - start) / len(entries)
+        if not (0 < width and math.isfinite(width)) or self.MAX_RUNGS <= len(self.rungs):
+            heapq.heapify(entries)
+            self.bottom = entries
+            return
+        # one extra bucket holds the entries at the maximum time
+        rung = _Rung(start, width, len(entries) + 1)
+        buckets = rung.buckets
+        last = len(buckets) - 1
+        for entry, event_time in zip(entries, times):
+            # event_time - start is non-negative, so int() == floor()
+            index = int((event_time - start) / width)
+            buckets[index if index < last else last].append(entry)
+        self.rungs.append(rung)
+
+    def _refill_bottom(self):
+        """ Move the next batch of earliest entries into `bottom`
+        """
+        while not self.bottom:
+            if self.rungs:
+                rung = self.rungs[-1]
+                num_buckets = len(rung.buckets)
+                while rung.current < num_buckets and not rung.buckets[rung.current]:
+                    rung.current += 1
+                if rung.current == num_buckets:
+                    self.rungs.pop()
+                    continue
+                bucket = rung.buckets[rung.current]
+                rung.buckets[rung.current] = []
+                rung.current += 1
+                if self.THRESHOLD < len(bucket):
+                    self._spawn_rung(bucket)
+                else:
+                    heapq.heapify(bucket)
+                    self.bottom = bucket
+            else:
+                if not self.top:
+                    return
+                top = self.top
+                self.top = []
+                self.top_start = max(entry[0] for entry in top)
+                if self.THRESHOLD < len(top):
+                    self._spawn_rung(top)
+                else:
+                    heapq.heapify(top)
+                    self.bottom = top
+
+    def peek(self):
+        if not self.bottom:
+            self._refill_bottom()
+            if not self.bottom:
+                return None
+        return self.bottom[0]
+
+    def pop(self):
+        if not self.bottom:
+            self._refill_bottom()
+        entry = heapq.heappop(self.bottom)
+        self.size -= 1
+        return entry
+
+    def entries(self):
+        entries = list(self.top) + list(self.bottom)
+        for rung in self.rungs:
+            for bucket in rung.buckets[rung.current:]:
+                entries.extend(bucket)
+        return entries
+
+    def __len__(self):
+        return self.size
+
+
+class _LocalQueue(object):
+    """ The pending entries of one simulation object in a :obj:`TwoLevelEventQueueBackend`
+
+    Attributes:
+        heap (:obj:`list`): a min heap of the object's entries
+        version (:obj:`int`): incremented whenever the earliest entry in `heap` changes, which
+            invalidates the object's earlier items in the global heap
+    """
+    __slots__ = ('heap', 'version')
+
+    def __init__(self):
+        self.heap = []
+        self.version = 0
+
+
+class TwoLevelEventQueueBackend(EventQueueBackend):
+    """ A two-level queue: a local heap of entries for each receiving object, and a global heap of heads
+
+    The global heap holds an item `(entry, version, local_queue)` for the earliest entry, or head, of
+    each non-empty local queue, so it contains `O(k)` items rather than `O(n)`, where `k` is the number
+    of simulation objects with pending events and `n` is the number of entries. When a local queue's
+    head changes, a new item is pushed and the old one becomes stale; stale items, recognized by an
+    outdated `version`, are discarded when they reach the top of the global heap, and all of them are
+    removed when they outnumber the local queues.
+
+    Attributes:
+        local_queues (:obj:`dict`): map from each receiving simulation object to its :obj:`_LocalQueue`
+        global_heap (:obj:`list`): a min heap of the heads of the local queues
+        size (:obj:`int`): the number of entries
+    """
+    NAME = 'two_level'
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.local_queues = {}
+        self.global_heap = []
+        self.size = 0
+
+    def push(self, entry):
+        receiving_object = entry[-1].receiving_object
+        try:
+            local_queue = self.local_queues[receiving_object]
+        except KeyError:
+            local_queue = self.local_queues[receiving_object] = _LocalQueue()
+        heap = local_queue.heap
+        self.size += 1
+        if heap and not entry < heap[0]:
+            heapq.heappush(heap, entry)
+            return
+        # entry is the new head of the local queue
+        heapq.heappush(heap, entry)
+        local_queue.version += 1
+        heapq.heappush(self.global_heap, (entry, local_queue.version, local_queue))
+        if 2 * len(self.local_queues) < len(self.global_heap):
+            self._rebuild_global_heap()
+
+    def _rebuild_global_heap(self):
+        """ Rebuild the global heap from the heads of the local queues, removing all stale items
+        """
+        self.global_heap = [(local_queue.heap[0], local_queue.version, local_queue)
+                            for local_queue in self.local_queues.values() if local_queue.heap]
+        heapq.heapify(self.global_heap)
+
+    def peek(self):
+        global_heap = self.global_heap
+        while global_heap:
+            head, version, local_queue = global_heap[0]
+            if version == local_queue.version:
+                return head
+            heapq.heappop(global_heap)
+        return None
+
+    def pop(self):
+        if self.peek() is None:
+            raise IndexError('pop from an empty two-level queue')
+        _, _, local_queue = heapq.heappop(self.global_heap)
+        heap = local_queue.heap
+        entry = heapq.heappop(heap)
+        local_queue.version += 1
+        if heap:
+            heapq.heappush(self.global_heap, (heap[0], local_queue.version, local_queue))
+        self.size -= 1
+        return entry
+
+    def entries(self):
+        return [entry for local_queue in self.local_queues.values() for entry in local_queue.heap]
+
+    def object_entries(self, receiving_object):
+        if receiving_object in self.local_queues:
+            return list(self.local_queues[receiving_object].heap)
+        return []
+
+    def compact(self):
+        self.size = 0
+        for local_queue in self.local_queues.values():
+            local_queue.heap = [entry for entry in local_queue.heap if entry[-1] is not None]
+            heapq.heapify(local_queue.heap)
+            local_queue.version += 1
+            self.size += len(local_queue.heap)
+        self._rebuild_global_heap()
+
+    def __len__(self):
+        return self.size
+
+
+EVENT_QUEUE_BACKENDS = {backend.NAME: backend for backend in [HeapEventQueueBackend,
+                                                              IndexedHeapEventQueueBackend,
+                                                              CalendarEventQueueBackend,
+                                                              LadderEventQueueBackend,
+                                                              TwoLevelEventQueueBackend]}
+
+
+def get_event_queue_backend(backend):
+    """ Get an event queue backend
+
+    Args:
+        backend (:obj:`object`): the name of a backend in `EVENT_QUEUE_BACKENDS`, an
+            :obj:`EventQueueBackend` subclass, or an :obj:`EventQueueBackend` instance
+
+    Returns:
+        :obj:`EventQueueBackend`: an event queue backend
+
+    Raises:
+        :obj:`SimulatorError`: if `backend` does not identify an event queue backend
+    """
+    if isinstance(backend, EventQueueBackend):
+        return backend
+    if isinstance(backend, type) and issubclass(backend, EventQueueBackend):
+        return backend()
+    if isinstance(backend, str) and backend in EVENT_QUEUE_BACKENDS:
+        return EVENT_QUEUE_BACKENDS[backend]()
+    raise SimulatorError(f"unknown event queue backend '{backend}'; "
+                         f"use one of {sorted(EVENT_QUEUE_BACKENDS)}")
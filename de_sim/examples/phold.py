@@ -10,10 +10,12 @@ import random
 import sys
 import argparse
 
+from de_sim.event_queue_backends import EVENT_QUEUE_BACKENDS
 from de_sim.simulation_message import SimulationMessage
 from de_sim.simulation_object import ApplicationSimulationObject
 from de_sim.simulation_engine import SimulationEngine
 from de_sim.examples.debug_logs import logs
+from de_sim.utilities import FastLogger
 
 
 def obj_name(obj_num):
@@ -21,11 +23,6 @@ def obj_name(obj_num):
     return '{}'.format(obj_num)
 
 
-def obj_index(obj_name):
-    # get object index from name
-    return int(obj_name)
-
-
 def exp_delay():
     return random.expovariate(1.0)
 
@@ -46,43 +43,60 @@ MESSAGE_TYPES = [MessageSentToSelf, MessageSentToOtherObject, InitMsg]
 
 
 class PholdSimulationObject(ApplicationSimulationObject):
+    """ A PHOLD process
+
+    PHOLD processes must be added to their `SimulationEngine` in index order, so that each process's
+    `object_id` is its index, and events are sent to processes by id.
+    """
 
     def __init__(self, name, args):
         self.args = args
+        self.random = random
+        self.fast_debug_console_logger = FastLogger(logs.get_log('de_sim.debug.example.console'), 'debug')
         super().__init__(name)
 
+    def delay(self):
+        """ Draw the delay of an event
+
+        Returns:
+            :obj:`float`: the delay
+        """
+        return exp_delay()
+
     def send_initial_events(self):
-        self.send_event(exp_delay(), self, InitMsg())
+        self.send_event(self.delay(), self, InitMsg())
 
     def handle_simulation_event(self, event):
         """Handle a single simulation event."""
         # schedule event
-        if random.random() < self.args.frac_self_events or self.args.num_phold_procs == 1:
-            receiver = self
-            self.log_debug_msg("{:8.3f}: {} sending to self".format(self.time, self.name))
+        if self.random.random() < self.args.frac_self_events or self.args.num_phold_procs == 1:
+            if self.fast_debug_console_logger.active:
+                self.log_debug_msg("{:8.3f}: {} sending to self".format(self.time, self.name))
+            self.send_event(self.delay(), self, MessageSentToSelf())
 
         else:
             # send to another randomly selected process
             # pick process index in [0, num_phold-2], and increment if self or greater
-            index = random.randrange(self.args.num_phold_procs - 1)
-            if obj_index(self.name) <= index:
+            index = self.random.randrange(self.args.num_phold_procs - 1)
+            if self.object_id <= index:
                 index += 1
-            receiver = self.simulator.simulation_objects[obj_name(index)]
-            self.log_debug_msg("{:8.3f}: {} sending to {}".format(self.time, self.name,
-                                                                  obj_name(index)))
-
-        if receiver == self:
-            message = MessageSentToSelf
-        else:
-            message = MessageSentToOtherObject
-        self.send_event(exp_delay(), receiver, message())
+            if self.fast_debug_console_logger.active:
+                self.log_debug_msg("{:8.3f}: {} sending to {}".format(self.time, self.name, obj_name(index)))
+            self.send_event(self.delay(), index, MessageSentToOtherObject())
 
     def get_state(self):
         return str(self.args)
 
+    def save_state(self):
+        # a process' only state is its random number generator's; processes share the global generator,
+        # which a rollback leaves in the state saved before the earliest execution it rolls back
+        return self.random.getstate()
+
+    def restore_state(self, state):
+        self.random.setstate(state)
+
     def log_debug_msg(self, msg):
-        log = logs.get_log('de_sim.debug.example.console')
-        log.debug(msg, sim_time=self.time)
+        self.fast_debug_console_logger.fast_log(msg, sim_time=self.time)
 
     event_handlers = [(sim_msg_type, 'handle_simulation_event') for sim_msg_type in MESSAGE_TYPES]
 
@@ -90,6 +104,36 @@ class PholdSimulationObject(ApplicationSimulationObject):
     messages_sent = MESSAGE_TYPES
 
 
+class LookaheadPholdSimulationObject(PholdSimulationObject):
+    """ A PHOLD process for parallel simulation
+
+    Each process draws from its own random number generator, seeded by `args.seed` and its name, so
+    a simulation's results don't depend on the order in which processes execute, and its event delays
+    are increased by `lookahead`, so that a conservative parallel engine can synchronize processes.
+    """
+    lookahead = 0.1
+
+    def __init__(self, name, args):
+        super().__init__(name, args)
+        self.random = random.Random('{}-{}'.format(getattr(args, 'seed', None), name))
+
+    def delay(self):
+        return self.lookahead + self.random.expovariate(1.0)
+
+
+def build_phold(args, phold_class=PholdSimulationObject):
+    """ Create the processes of a PHOLD simulation, in index order
+
+    Args:
+        args (:obj:`argparse.Namespace`): PHOLD arguments
+        phold_class (:obj:`type`, optional): the class of the PHOLD processes
+
+    Returns:
+        :obj:`list` of :obj:`PholdSimulationObject`: the processes
+    """
+    return [phold_class(obj_name(obj_id), args) for obj_id in range(args.num_phold_procs)]
+
+
 class RunPhold(object):
 
     @staticmethod
@@ -114,6 +158,8 @@ class RunPhold(object):
         parser.add_argument('frac_self_events', type=float, help="Fraction of events sent to self")
         parser.add_argument('time_max', type=float, help="End time for the simulation")
         parser.add_argument('--seed', '-s', type=int, help='Random number seed')
+        parser.add_argument('--event_queue', '-e', choices=sorted(EVENT_QUEUE_BACKENDS),
+                            help="Event queue backend")
         args = parser.parse_args(cli_args)
 
         if args.num_phold_procs < 1:
@@ -130,12 +176,10 @@ class RunPhold(object):
     def main(args):
 
         # create a simulator
-        simulator = SimulationEngine()
+        simulator = SimulationEngine(event_queue=getattr(args, 'event_queue', None))
 
         # create simulation objects, and send each one an initial event message to self
-        for obj_id in range(args.num_phold_procs):
-            phold_obj = PholdSimulationObject(obj_name(obj_id), args)
-            simulator.add_object(phold_obj)
+        simulator.add_objects(build_phold(args))
 
         # run the simulation
         simulator.initialize()
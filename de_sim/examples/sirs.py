@@ -9,10 +9,11 @@
 import enum
 import numpy
 
-from de_sim.event import Event
 from de_sim.simulation_engine import SimulationEngine
 from de_sim.simulation_message import SimulationMessage
 from de_sim.simulation_object import ApplicationSimulationObject
+from de_sim.template_sim_objs import (NextReactionSimulationObject, PopulationSimulationObject,
+                                     TauLeapingSimulationObject)
 
 
 class SusceptibleToInfectious(SimulationMessage):
@@ -203,6 +204,290 @@ class SIR2(SIR):
     messages_sent = MESSAGE_TYPES
 
 
+### agent-based SIR epidemic model ###
+class AgentState(enum.IntEnum):
+    """ The states of an agent
+    """
+    susceptible = 0
+    infectious = 1
+    recovered = 2
+
+
+# agent states as ints, which are faster to compare with the states in a NumPy array
+SUSCEPTIBLE, INFECTIOUS, RECOVERED = (int(state) for state in AgentState)
+
+
+class AgentSIR(PopulationSimulationObject):
+    """ An agent-based version of the SIR epidemic model
+
+    Each agent is susceptible, infectious or recovered. An infectious agent contacts a uniformly chosen
+    agent at rate `beta`, infecting it if it's susceptible, and recovers at rate `gamma`, so infections occur
+    at the rate `beta * s * i / N` of :obj:`SIR`. The agents' states are stored in a NumPy structured array.
+
+    Attributes:
+        s (:obj:`int`): number of susceptible agents
+        i (:obj:`int`): number of infectious agents
+        N (:obj:`int`): total number of agents, a constant
+        beta (:obj:`float`): SIR beta parameter
+        gamma (:obj:`float`): SIR gamma parameter
+        recording_period (:obj:`float`): time step for recording state
+        random_state (:obj:`numpy.random.RandomState`): a random state
+        history (:obj:`list`): list of recorded states
+    """
+    AGENT_DTYPE = [('state', numpy.int8), ('contact_time', float), ('recovery_time', float)]
+
+    def __init__(self, name, s, i, N, beta, gamma, recording_period):
+        """ Initialize an AgentSIR instance
+
+        Args:
+            name (:obj:`str`): the instance's name
+            s (:obj:`int`): initial number of susceptible agents, s(0)
+            i (:obj:`int`): initial number of infectious agents, i(0)
+            N (:obj:`int`): total number of agents, a constant
+            beta (:obj:`float`): SIR beta parameter
+            gamma (:obj:`float`): SIR gamma parameter
+            recording_period (:obj:`float`): time step for recording state
+        """
+        self.s = s
+        self.i = i
+        self.N = N
+        self.beta = beta
+        self.gamma = gamma
+        self.recording_period = recording_period
+        self.random_state = numpy.random.RandomState()
+        self.history = []
+        super().__init__(name, N, self.AGENT_DTYPE)
+
+    def send_initial_events(self):
+        """ Infect the initially infectious agents, and record the initial state
+        """
+        self.agents['state'][self.N - self.s:] = AgentState.susceptible
+        self.agents['state'][self.i:self.N - self.s] = AgentState.recovered
+        self.infect(numpy.arange(self.i))
+        super().send_initial_events()
+        self.record_trajectory(None)
+
+    def infect(self, agents):
+        """ Make agents infectious, and draw the times of their first contacts and their recoveries
+
+        Args:
+            agents (:obj:`numpy.ndarray`): the indices of the agents
+        """
+        agent_states = self.agents[agents]
+        agent_states['state'] = AgentState.infectious
+        agent_states['contact_time'] = self.time + self.random_state.exponential(1.0 / self.beta, len(agents))
+        agent_states['recovery_time'] = self.time + self.random_state.exponential(1.0 / self.gamma, len(agents))
+        self.agents[agents] = agent_states
+        self.schedule_agents(agents, numpy.minimum(agent_states['contact_time'], agent_states['recovery_time']))
+
+    def handle_agent_events(self, agents):
+        """ Handle the contacts and recoveries of infectious agents
+
+        Args:
+            agents (:obj:`numpy.ndarray`): the indices of the agents
+        """
+        states = self.agents['state']
+        contact_times = self.agents['contact_time']
+        recovery_times = self.agents['recovery_time']
+        random_state = self.random_state
+        for agent in agents.tolist():
+            if recovery_times[agent] <= self.time:
+                states[agent] = RECOVERED
+                self.i -= 1
+                continue
+            contact = random_state.randint(self.N)
+            if states[contact] == SUSCEPTIBLE:
+                self.s -= 1
+                self.i += 1
+                states[contact] = INFECTIOUS
+                contact_times[contact] = self.time + random_state.exponential(1.0 / self.beta)
+                recovery_times[contact] = self.time + random_state.exponential(1.0 / self.gamma)
+                self.schedule_agent(contact, float(min(contact_times[contact], recovery_times[contact])))
+            contact_times[agent] = self.time + random_state.exponential(1.0 / self.beta)
+            self.schedule_agent(agent, float(min(contact_times[agent], recovery_times[agent])))
+
+    def record_trajectory(self, event):
+        """ Add another record to the SIR history
+
+        Args:
+            event (:obj:`Event`): simulation event; not used
+        """
+        self.history.append(dict(time=self.time,
+                                 s=self.s,
+                                 i=self.i))
+        self.send_event(self.recording_period, self, RecordTrajectory())
+
+    event_handlers = [*PopulationSimulationObject.metadata.event_handlers_dict.items(),
+                      (RecordTrajectory, 'record_trajectory')]
+
+    # register the message types sent
+    messages_sent = [*PopulationSimulationObject.metadata.message_types_sent, RecordTrajectory]
+
+
+### SIR and SIRS epidemic models simulated as reaction networks ###
+class SIRReactionNetwork(object):
+    """ The SIR epidemic model as a reaction network, for simulation by a reaction network simulation object
+
+    The infection reaction `s + i -> 2 i` has propensity `beta * s * i / N`, and the recovery reaction
+    `i -> r` has propensity `gamma * i`, as in :obj:`SIR`. A subclass also inherits from a reaction network
+    simulation object, such as :obj:`NextReactionSimulationObject`.
+
+    Attributes:
+        N (:obj:`int`): total population, a constant
+        beta (:obj:`float`): SIR beta parameter
+        gamma (:obj:`float`): SIR gamma parameter
+        recording_period (:obj:`float`): time step for recording state
+        history (:obj:`list`): list of recorded states
+    """
+    def __init__(self, name, s, i, N, beta, gamma, recording_period):
+        """ Initialize an SIR reaction network
+
+        Args:
+            name (:obj:`str`): the instance's name
+            s (:obj:`int`): initial number of susceptible subjects, s(0)
+            i (:obj:`int`): initial number of infectious subjects, i(0)
+            N (:obj:`int`): total population, a constant
+            beta (:obj:`float`): SIR beta parameter
+            gamma (:obj:`float`): SIR gamma parameter
+            recording_period (:obj:`float`): time step for recording state
+        """
+        self.N = N
+        self.beta = beta
+        self.gamma = gamma
+        self.recording_period = recording_period
+        self.history = []
+        reactions, propensities, propensity_species = self.reaction_network()
+        super().__init__(name, dict(s=s, i=i, r=N - s - i), reactions, propensities,
+                         **self.simulation_args(reactions, propensity_species))
+
+    def reaction_network(self):
+        """ Provide the model's reactions
+
+        Returns:
+            :obj:`tuple`: the reactions, their propensity functions, and the species each propensity reads
+        """
+        reactions = [dict(s=-1, i=1),
+                     dict(i=-1, r=1)]
+        propensities = [lambda state: self.beta * state['s'] * state['i'] / self.N,
+                        lambda state: self.gamma * state['i']]
+        propensity_species = [('s', 'i'), ('i',)]
+        return reactions, propensities, propensity_species
+
+    def simulation_args(self, reactions, propensity_species):
+        """ Provide the keyword arguments of the reaction network simulation object
+
+        Args:
+            reactions (:obj:`list` of :obj:`dict`): the reactions
+            propensity_species (:obj:`list` of :obj:`tuple`): the species each propensity reads
+
+        Returns:
+            :obj:`dict`: keyword arguments
+        """
+        return {}
+
+    @property
+    def s(self):
+        return self.state['s']
+
+    @property
+    def i(self):
+        return self.state['i']
+
+    def send_initial_events(self):
+        """ Start simulating the reactions, and record the initial state
+        """
+        super().send_initial_events()
+        self.record_trajectory(None)
+
+    def record_trajectory(self, event):
+        """ Add another record to the SIR history
+
+        Args:
+            event (:obj:`Event`): simulation event; not used
+        """
+        self.history.append(dict(time=self.time,
+                                 s=self.s,
+                                 i=self.i))
+        self.send_event(self.recording_period, self, RecordTrajectory())
+
+
+class NextReactionSIR(SIRReactionNetwork, NextReactionSimulationObject):
+    """ The SIR epidemic model, simulated exactly with the next reaction method
+    """
+    def simulation_args(self, reactions, propensity_species):
+        return dict(dependencies=self.dependency_graph(reactions, propensity_species))
+
+    event_handlers = [*NextReactionSimulationObject.metadata.event_handlers_dict.items(),
+                      (RecordTrajectory, SIRReactionNetwork.record_trajectory)]
+
+    # register the message types sent
+    messages_sent = [*NextReactionSimulationObject.metadata.message_types_sent, RecordTrajectory]
+
+
+class NextReactionSIRS(NextReactionSIR):
+    """ The SIRS epidemic model, in which recovered subjects lose their immunity
+
+    Adds the waning reaction `r -> s`, with propensity `xi * r`, to :obj:`NextReactionSIR`.
+
+    Attributes:
+        xi (:obj:`float`): the rate at which a recovered subject becomes susceptible
+    """
+    def __init__(self, name, s, i, N, beta, gamma, recording_period, xi):
+        """ Initialize a NextReactionSIRS instance
+
+        Args:
+            name (:obj:`str`): the instance's name
+            s (:obj:`int`): initial number of susceptible subjects, s(0)
+            i (:obj:`int`): initial number of infectious subjects, i(0)
+            N (:obj:`int`): total population, a constant
+            beta (:obj:`float`): SIR beta parameter
+            gamma (:obj:`float`): SIR gamma parameter
+            recording_period (:obj:`float`): time step for recording state
+            xi (:obj:`float`): the rate at which a recovered subject becomes susceptible
+        """
+        self.xi = xi
+        super().__init__(name, s, i, N, beta, gamma, recording_period)
+
+    def reaction_network(self):
+        reactions, propensities, propensity_species = super().reaction_network()
+        reactions.append(dict(r=-1, s=1))
+        propensities.append(lambda state: self.xi * state['r'])
+        propensity_species.append(('r',))
+        return reactions, propensities, propensity_species
+
+
+class TauLeapingSIR(SIRReactionNetwork, TauLeapingSimulationObject):
+    """ The SIR epidemic model, simulated approximately by tau-leaping
+
+    Attributes:
+        epsilon (:obj:`float`): the accuracy parameter of tau-leaping
+    """
+    def __init__(self, name, s, i, N, beta, gamma, recording_period, epsilon=0.03):
+        """ Initialize a TauLeapingSIR instance
+
+        Args:
+            name (:obj:`str`): the instance's name
+            s (:obj:`int`): initial number of susceptible subjects, s(0)
+            i (:obj:`int`): initial number of infectious subjects, i(0)
+            N (:obj:`int`): total population, a constant
+            beta (:obj:`float`): SIR beta parameter
+            gamma (:obj:`float`): SIR gamma parameter
+            recording_period (:obj:`float`): time step for recording state
+            epsilon (:obj:`float`, optional): the accuracy parameter of tau-leaping
+        """
+        self.epsilon = epsilon
+        super().__init__(name, s, i, N, beta, gamma, recording_period)
+
+    def simulation_args(self, reactions, propensity_species):
+        return dict(epsilon=self.epsilon)
+
+    event_handlers = [*TauLeapingSimulationObject.metadata.event_handlers_dict.items(),
+                      (RecordTrajectory, SIRReactionNetwork.record_trajectory)]
+
+    # register the message types sent
+    messages_sent = [*TauLeapingSimulationObject.metadata.message_types_sent, RecordTrajectory]
+
+
 class RunSIRs(object):
 
     @staticmethod
@@ -0,0 +1,980 @@
+""" Parallel simulation engines, which execute partitions of a simulation in worker processes
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-12
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from collections import Counter, namedtuple
+import itertools
+import math
+import multiprocessing
+import queue
+import traceback
+
+from de_sim.errors import SimulatorError
+from de_sim.simulation_engine import SimulationEngine
+from de_sim.simulation_object import EventQueue
+
+
+def lookahead(sim_obj_class, message_type):
+    """ Get the declared lookahead of a type of message sent by a type of simulation object
+
+    A simulation object class or a message class declares a lookahead with a `lookahead` class attribute:
+    the minimum delay of the events it sends, or that carry it. The lookahead of a send is the larger.
+
+    Args:
+        sim_obj_class (:obj:`type`): a subclass of :obj:`ApplicationSimulationObject`
+        message_type (:obj:`type`): a subclass of :obj:`SimulationMessage`
+
+    Returns:
+        :obj:`float`: the lookahead of `message_type` messages sent by `sim_obj_class` objects
+    """
+    return max(getattr(sim_obj_class, 'lookahead', 0), getattr(message_type, 'lookahead', 0))
+
+
+class PartitionEventQueue(EventQueue):
+    """ The event queue of a partition, which diverts events for other partitions' objects to an outbox
+
+    Attributes:
+        partition_of (:obj:`list` of :obj:`int`): the partition of each simulation object, indexed by
+            `object_id`; `None` for objects that every partition executes
+        partition (:obj:`int`): the index of this queue's partition
+        outbox (:obj:`list` of :obj:`tuple`): `(partition, event)` pairs for events sent to other
+            partitions, where each event is a `(send_time, receive_time, sending object id,
+            receiving object id, message)` tuple
+    """
+
+    def __init__(self, partition_of, partition, backend=None):
+        self.partition_of = partition_of
+        self.partition = partition
+        self.outbox = []
+        super().__init__(backend=backend)
+
+    def _remote_partition(self, receiving_object):
+        """ Get the partition that executes an object, if it's not this queue's partition
+
+        Args:
+            receiving_object (:obj:`SimulationObject`): a simulation object
+
+        Returns:
+            :obj:`int`: the partition of `receiving_object`, or `None` if it is this partition
+        """
+        object_id = receiving_object.object_id
+        if object_id is None or len(self.partition_of) <= object_id:
+            return None
+        partition = self.partition_of[object_id]
+        if partition is None or partition == self.partition:
+            return None
+        return partition
+
+    def _send_remote(self, partition, send_time, receive_time, sending_object, receiving_object, message):
+        """ Divert an event to another partition
+
+        Raises:
+            :obj:`SimulatorError`: if the event's delay is less than the lookahead of the send
+        """
+        min_delay = lookahead(sending_object.__class__, message.__class__)
+        if receive_time - send_time < min_delay:
+            raise SimulatorError("'{}' sent a {} to '{}' in another partition with delay {}, less than its "
+                                 "lookahead {}".format(sending_object.name, message.__class__.__name__,
+                                                       receiving_object.name, receive_time - send_time,
+                                                       min_delay))
+        self.outbox.append((partition, (send_time, receive_time, sending_object.object_id,
+                                        receiving_object.object_id, message)))
+
+    def _insert_event(self, send_time, receive_time, sending_object, receiving_object, message):
+        """ Insert an event, or divert it to another partition
+
+        Returns:
+            :obj:`EventHandle`: a handle that can cancel or reschedule the event, or `None` if the event
+                was sent to another partition, where it cannot be cancelled
+        """
+        partition = self._remote_partition(receiving_object)
+        if partition is None:
+            return super()._insert_event(send_time, receive_time, sending_object, receiving_object, message)
+        self._send_remote(partition, send_time, receive_time, sending_object, receiving_object, message)
+
+    def _insert_events(self, events):
+        local_events = []
+        handles = []
+        for event in events:
+            partition = self._remote_partition(event[3])
+            if partition is None:
+                handles.append(len(local_events))
+                local_events.append(event)
+            else:
+                handles.append(None)
+                self._send_remote(partition, *event)
+        local_handles = super()._insert_events(local_events)
+        return [None if index is None else local_handles[index] for index in handles]
+
+
+class PartitionSimulationEngine(SimulationEngine):
+    """ A simulation engine that executes one partition of a simulation
+
+    Every partition adds all of the simulation's objects, so that objects have the same ids and ranks in
+    all partitions, but executes only its own objects, and the services, such as the
+    :obj:`PeriodicScheduler`, that every partition provides.
+
+    Attributes:
+        partition (:obj:`int`): the index of this engine's partition
+    """
+    # the class of the engine's event queue
+    EVENT_QUEUE_CLASS = PartitionEventQueue
+
+    def __init__(self, partition, event_queue=None):
+        """
+        Args:
+            partition (:obj:`int`): the index of this engine's partition
+            event_queue (:obj:`object`, optional): the backend of the event queue
+        """
+        super().__init__(event_queue=event_queue)
+        self.partition = partition
+        self.event_queue = self.EVENT_QUEUE_CLASS([], partition, backend=event_queue)
+
+    def assign_partitions(self, objects, partition_of):
+        """ Assign the simulation's objects to partitions
+
+        Objects that are not assigned, such as services added by the engine, are executed by every partition.
+
+        Args:
+            objects (:obj:`list` of :obj:`SimulationObject`): the simulation objects
+            partition_of (:obj:`list` of :obj:`int`): the partition of each object in `objects`
+        """
+        partitions = {id(sim_obj): partition for sim_obj, partition in zip(objects, partition_of)}
+        self.event_queue.partition_of = [partitions.get(id(sim_obj)) for sim_obj in self.simulation_objects_by_id]
+
+    def own_objects(self):
+        """ Provide the objects assigned to this engine's partition
+
+        Returns:
+            :obj:`list` of :obj:`SimulationObject`: the objects in this partition
+        """
+        partition_of = self.event_queue.partition_of
+        return [sim_obj for sim_obj in self.simulation_objects_by_id
+                if partition_of[sim_obj.object_id] == self.partition]
+
+    def _initial_event_senders(self):
+        return [sim_obj for sim_obj in self.simulation_objects.values()
+                if self.event_queue._remote_partition(sim_obj) is None]
+
+    def execute_events(self, horizon, time_max):
+        """ Execute the events earlier than `horizon` and no later than `time_max`
+
+        Args:
+            horizon (:obj:`float`): the earliest time at which an event from another partition may occur
+            time_max (:obj:`float`): the simulation's end time
+
+        Raises:
+            :obj:`SimulatorError`: if an object's time is later than an event that it's dispatched
+        """
+        event_queue = self.event_queue
+        event_counts = self.event_counts
+        count_events_by_object = self.count_events_by_object
+        while True:
+            next_time = event_queue.next_event_time()
+            if horizon <= next_time or time_max < next_time:
+                return
+            next_sim_obj = event_queue.next_event_obj()
+            if next_time < next_sim_obj.time:
+                raise SimulatorError("Dispatching '{}', but event time ({}) "
+                                     "< object time ({})".format(next_sim_obj.name, next_time, next_sim_obj.time))
+            self.time = next_sim_obj.time = next_time
+
+            class_event_handler = next_sim_obj.__class__.metadata.class_event_handler
+            if class_event_handler is not None:
+                self.num_events_handled += self._handle_class_event_lists(next_sim_obj, class_event_handler)
+                continue
+
+            next_events = event_queue.next_events()
+            counted_object = next_sim_obj.object_id if count_events_by_object else next_sim_obj.__class__
+            for e in next_events:
+                event_counts[(counted_object, e.message.__class__)] += 1
+            next_sim_obj._SimulationEngine__handle_event_list(next_events)
+            if not next_sim_obj.RETAINS_EVENTS:
+                event_queue.recycle_events(next_events)
+            self.num_events_handled += 1
+
+    def insert_remote_events(self, events):
+        """ Insert events sent by objects in other partitions
+
+        Args:
+            events (:obj:`list` of :obj:`tuple`): `(send_time, receive_time, sending object id,
+                receiving object id, message)` tuples
+        """
+        objects = self.simulation_objects_by_id
+        for send_time, receive_time, sending_id, receiving_id, message in events:
+            EventQueue._insert_event(self.event_queue, send_time, receive_time, objects[sending_id],
+                                     objects[receiving_id], message)
+
+    def take_outbox(self, partitions):
+        """ Remove the events sent to other partitions from the event queue's outbox
+
+        Args:
+            partitions (:obj:`list` of :obj:`int`): the other partitions
+
+        Returns:
+            :obj:`dict`: map from each partition in `partitions` to the events sent to it
+        """
+        outgoing = {partition: [] for partition in partitions}
+        for partition, event in self.event_queue.outbox:
+            outgoing[partition].append(event)
+        self.event_queue.outbox = []
+        return outgoing
+
+
+class TimeWarpEventQueue(PartitionEventQueue):
+    """ The event queue of a partition of an optimistic simulation, which tracks the events inserted in it
+
+    A rolled back event is returned to the queue by pushing its original entry, so that its handles and its
+    order among simultaneous events are unchanged. Simulation objects can't cancel or reschedule events,
+    because cancellations and reschedulings aren't rolled back; the engine cancels events by tombstoning
+    their entries.
+
+    Attributes:
+        handles (:obj:`dict`): map from the `id()` of each tracked event to its handle
+        sent_events (:obj:`list` of :obj:`EventHandle`): handles of the events inserted in this queue by the
+            event being executed, which are cancelled if it is rolled back
+    """
+
+    def __init__(self, partition_of, partition, backend=None):
+        self.handles = {}
+        self.sent_events = []
+        super().__init__(partition_of, partition, backend=backend)
+
+    def track(self, handle):
+        """ Track an event inserted in this queue
+
+        Args:
+            handle (:obj:`EventHandle`): the event's handle
+        """
+        self.handles[id(handle.event)] = handle
+        self.sent_events.append(handle)
+
+    def untrack(self, event):
+        """ Stop tracking an event, which will not return to the queue
+
+        Args:
+            event (:obj:`Event`): the event
+        """
+        del self.handles[id(event)]
+
+    def restore(self, event):
+        """ Return an executed event to the queue
+
+        Args:
+            event (:obj:`Event`): the event
+        """
+        entry = self.handles[id(event)].entry
+        entry[-1] = event
+        self.backend.push(entry)
+
+    def cancel(self, handle):
+        """ Refuse to cancel an event for a simulation object
+
+        Raises:
+            :obj:`SimulatorError`: always
+        """
+        raise SimulatorError("optimistic simulation doesn't support cancelling events, because cancellations "
+                             "aren't rolled back")
+
+    def reschedule(self, handle, new_time):
+        """ Refuse to reschedule an event for a simulation object
+
+        Raises:
+            :obj:`SimulatorError`: always
+        """
+        raise SimulatorError("optimistic simulation doesn't support rescheduling events, because reschedulings "
+                             "aren't rolled back")
+
+    def _insert_event(self, send_time, receive_time, sending_object, receiving_object, message):
+        handle = super()._insert_event(send_time, receive_time, sending_object, receiving_object, message)
+        if handle is not None:
+            self.track(handle)
+        return handle
+
+    def _insert_events(self, events):
+        handles = super()._insert_events(events)
+        for handle in handles:
+            if handle is not None:
+                self.track(handle)
+        return handles
+
+
+# an execution of events by a simulation object that has not been committed; `saved_state` is the object's
+# `(time, num_events, save_state())` before the execution, and `remote_sends` contains
+# `(partition, remote id, receive time)` triples for the events sent to other partitions
+ProcessedEvents = namedtuple('ProcessedEvents', 'time sim_obj saved_state events sent_events remote_sends')
+
+
+class TimeWarpSimulationEngine(PartitionSimulationEngine):
+    """ A simulation engine that executes one partition of an optimistic simulation
+
+    Events are executed speculatively, without waiting for events from other partitions. An engine saves
+    an object's state before each execution, and keeps the execution until global virtual time passes it.
+    When an event arrives with a time no later than an execution, the execution and all later ones are rolled
+    back: their objects' states are restored, the events they executed are returned to the event queue, the
+    events they sent to this partition are cancelled, and anti-messages cancel those they sent to other
+    partitions. Executions are counted when they are committed.
+
+    Each event sent to another partition is identified by a remote id, a `(partition, serial number)` pair.
+
+    Attributes:
+        processed (:obj:`list` of :obj:`ProcessedEvents`): the executions that have not been committed, in the
+            order in which they were executed
+        remote_handles (:obj:`dict`): map from the remote id of each uncommitted event received from
+            another partition to its handle
+        remote_ids (:obj:`dict`): map from the `id()` of each uncommitted event received from another
+            partition to its remote id
+        serial_numbers (:obj:`itertools.count`): source of the serial numbers of the events sent to other
+            partitions
+        outgoing_events (:obj:`dict`): map from each partition to the `(remote id, event)` pairs to send it
+        outgoing_anti_messages (:obj:`dict`): map from each partition to the `(remote id, receive time)`
+            pairs of the events sent to it that have been rolled back
+        num_rolled_back (:obj:`int`): the number of executions rolled back
+    """
+    EVENT_QUEUE_CLASS = TimeWarpEventQueue
+
+    def __init__(self, partition, num_partitions, event_queue=None):
+        """
+        Args:
+            partition (:obj:`int`): the index of this engine's partition
+            num_partitions (:obj:`int`): the number of partitions
+            event_queue (:obj:`object`, optional): the backend of the event queue
+        """
+        super().__init__(partition, event_queue=event_queue)
+        # objects aren't registered with a periodic scheduler, whose executions would change their states
+        self.coalesce_periodic_events = False
+        self.processed = []
+        self.remote_handles = {}
+        self.remote_ids = {}
+        self.serial_numbers = itertools.count()
+        others = [other for other in range(num_partitions) if other != partition]
+        self.outgoing_events = {other: [] for other in others}
+        self.outgoing_anti_messages = {other: [] for other in others}
+        self.num_rolled_back = 0
+
+    def take_remote_sends(self):
+        """ Move the events in the event queue's outbox to `outgoing_events`, giving each a remote id
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: `(partition, remote id, receive time)` triples for the events
+        """
+        remote_sends = []
+        for partition, event in self.event_queue.outbox:
+            remote_id = (self.partition, next(self.serial_numbers))
+            self.outgoing_events[partition].append((remote_id, event))
+            remote_sends.append((partition, remote_id, event[1]))
+        self.event_queue.outbox = []
+        return remote_sends
+
+    def execute_event(self):
+        """ Speculatively execute the events of the next simulation object
+
+        Raises:
+            :obj:`SimulatorError`: if an object's time is later than an event that it's dispatched
+        """
+        event_queue = self.event_queue
+        next_time = event_queue.next_event_time()
+        next_sim_obj = event_queue.next_event_obj()
+        if next_time < next_sim_obj.time:
+            raise SimulatorError("Dispatching '{}', but event time ({}) "
+                                 "< object time ({})".format(next_sim_obj.name, next_time, next_sim_obj.time))
+        saved_state = (next_sim_obj.time, next_sim_obj.num_events, next_sim_obj.save_state())
+        self.time = next_sim_obj.time = next_time
+        next_events = event_queue.next_events()
+        event_queue.sent_events = []
+        next_sim_obj._SimulationEngine__handle_event_list(next_events)
+        self.processed.append(ProcessedEvents(next_time, next_sim_obj, saved_state, next_events,
+                                              event_queue.sent_events, self.take_remote_sends()))
+
+    def insert_remote_events(self, events):
+        """ Insert events sent by objects in other partitions, rolling back executions that they precede
+
+        Args:
+            events (:obj:`list` of :obj:`tuple`): `(remote id, event)` pairs, where each event is a
+                `(send_time, receive_time, sending object id, receiving object id, message)` tuple
+        """
+        event_queue = self.event_queue
+        objects = self.simulation_objects_by_id
+        for remote_id, (send_time, receive_time, sending_id, receiving_id, message) in events:
+            self.rollback(receive_time)
+            handle = EventQueue._insert_event(event_queue, send_time, receive_time, objects[sending_id],
+                                              objects[receiving_id], message)
+            event_queue.handles[id(handle.event)] = handle
+            self.remote_handles[remote_id] = handle
+            self.remote_ids[id(handle.event)] = remote_id
+
+    def annihilate(self, anti_messages):
+        """ Cancel events sent by objects in other partitions, rolling back their executions
+
+        Args:
+            anti_messages (:obj:`list` of :obj:`tuple`): `(remote id, receive time)` pairs
+        """
+        for remote_id, receive_time in anti_messages:
+            handle = self.remote_handles.pop(remote_id)
+            if not handle.pending:
+                # the event has been executed; rolling back returns it to the event queue
+                self.rollback(receive_time)
+            self.event_queue._tombstone(handle.entry)
+            del self.remote_ids[id(handle.event)]
+            self.event_queue.untrack(handle.event)
+
+    def rollback(self, time):
+        """ Roll back the executions at or after `time`
+
+        Args:
+            time (:obj:`float`): the time of an event that has arrived, or been cancelled
+        """
+        processed = self.processed
+        if not processed or processed[-1].time < time:
+            return
+        start = len(processed)
+        while 0 < start and time <= processed[start - 1].time:
+            start -= 1
+        rolled_back = processed[start:]
+        del processed[start:]
+        self.num_rolled_back += len(rolled_back)
+        event_queue = self.event_queue
+
+        # restore each object to its state before its earliest execution that's rolled back; objects are
+        # restored in the reverse order of those executions, so that state which objects share, such as a global
+        # random number generator that each of them saves, ends in its state before the earliest execution
+        earliest_executions = {}
+        for execution in rolled_back:
+            earliest_executions.setdefault(execution.sim_obj, execution)
+        for sim_obj, execution in reversed(list(earliest_executions.items())):
+            sim_obj.time, sim_obj.num_events, state = execution.saved_state
+            sim_obj.restore_state(state)
+
+        # cancel the events that were sent
+        sent = set()
+        for execution in rolled_back:
+            for handle in execution.sent_events:
+                sent.add(id(handle.event))
+                event_queue._tombstone(handle.entry)
+                event_queue.untrack(handle.event)
+            for partition, remote_id, receive_time in execution.remote_sends:
+                self.outgoing_anti_messages[partition].append((remote_id, receive_time))
+
+        # return the executed events that weren't sent by rolled back executions to the event queue
+        for execution in rolled_back:
+            for event in execution.events:
+                if id(event) not in sent:
+                    event_queue.restore(event)
+
+    def commit(self, time):
+        """ Commit the executions earlier than `time`, which can no longer be rolled back, and count them
+
+        Args:
+            time (:obj:`float`): global virtual time
+        """
+        processed = self.processed
+        event_queue = self.event_queue
+        num_committed = 0
+        while num_committed < len(processed) and processed[num_committed].time < time:
+            num_committed += 1
+        for execution in processed[:num_committed]:
+            sim_obj = execution.sim_obj
+            counted_object = sim_obj.object_id if self.count_events_by_object else sim_obj.__class__
+            for event in execution.events:
+                self.event_counts[(counted_object, event.message.__class__)] += 1
+                event_queue.untrack(event)
+                remote_id = self.remote_ids.pop(id(event), None)
+                if remote_id is not None:
+                    del self.remote_handles[remote_id]
+        del processed[:num_committed]
+        self.num_events_handled += num_committed
+
+
+# the kinds of messages that partitions exchange
+INITIAL_EVENTS, EVENTS, ANTI_MESSAGES, GVT_MARKER, GVT_REPORT, DONE = range(6)
+
+
+def _run_partition(partition, model_builder, builder_args, partition_of, time_max, event_queue, collect,
+                   inboxes, results):
+    """ Execute a partition of a simulation, synchronized conservatively with the other partitions
+
+    First, the partitions exchange their initial events and the times of their earliest events, whose
+    minimum bounds the time of any event sent later. Then each partition repeatedly executes the events
+    that precede its earliest input time, the earliest time of an event that another partition may still
+    send it, and sends each other partition the events for it and a null message: a promise that it will
+    send no event earlier than `min(next event time, earliest input time) + lookahead`. Partitions exchange
+    these promises until they pass `time_max`, and then send infinite promises, which let the others finish.
+
+    Args:
+        partition (:obj:`int`): the index of the partition
+        model_builder (:obj:`function`): a function that returns a list of all of the simulation's objects
+        builder_args (:obj:`tuple`): arguments for `model_builder`
+        partition_of (:obj:`list` of :obj:`int`): the partition of each simulation object, in the order
+            returned by `model_builder`
+        time_max (:obj:`float`): the simulation's end time
+        event_queue (:obj:`object`): the event queue backend
+        collect (:obj:`function`): a function that returns a result from each simulation object, or `None`
+        inboxes (:obj:`list` of :obj:`multiprocessing.Queue`): each partition's inbox
+        results (:obj:`multiprocessing.Queue`): the queue to which the partition's results are sent
+    """
+    try:
+        simulator = PartitionSimulationEngine(partition, event_queue=event_queue)
+        objects = model_builder(*builder_args)
+        simulator.add_objects(objects)
+        simulator.assign_partitions(objects, partition_of)
+        own_objects = simulator.own_objects()
+        message_types = {(sim_obj.__class__, message_type) for sim_obj in own_objects
+                         for message_type in sim_obj.__class__.metadata.message_types_sent}
+        partition_lookahead = min((lookahead(*types) for types in message_types), default=math.inf)
+        other_partitions = [other for other in range(len(inboxes)) if other != partition]
+        if other_partitions and partition_lookahead <= 0:
+            raise SimulatorError("partition {} has no positive lookahead; declare a 'lookahead' in its "
+                                 "simulation object or message classes".format(partition))
+        simulator.initialize()
+        simulator.num_events_handled = 0
+        event_queue = simulator.event_queue
+        inbox = inboxes[partition]
+
+        # exchange initial events, and the earliest time of any event
+        outgoing = simulator.take_outbox(other_partitions)
+        earliest_time = min([event_queue.next_event_time()] +
+                            [event[1] for events in outgoing.values() for event in events])
+        for other in other_partitions:
+            inboxes[other].put((INITIAL_EVENTS, partition, outgoing[other], earliest_time))
+        pending_messages = []
+        num_initial_messages = 0
+        while num_initial_messages < len(other_partitions):
+            message = inbox.get()
+            if message[0] == INITIAL_EVENTS:
+                num_initial_messages += 1
+                _, _, events, other_earliest_time = message
+                simulator.insert_remote_events(events)
+                earliest_time = min(earliest_time, other_earliest_time)
+            else:
+                pending_messages.append(message)
+        # events sent later are caused by events no earlier than `earliest_time`
+        input_times = {other: earliest_time for other in other_partitions}
+        sent_times = {other: -math.inf for other in other_partitions}
+
+        while True:
+            for _, sender, events, input_time in pending_messages:
+                simulator.insert_remote_events(events)
+                input_times[sender] = max(input_times[sender], input_time)
+            earliest_input_time = min(input_times.values(), default=math.inf)
+            simulator.execute_events(earliest_input_time, time_max)
+
+            # send the events for other partitions, and null messages
+            outgoing = simulator.take_outbox(other_partitions)
+            safe_time = min(event_queue.next_event_time(), earliest_input_time)
+            finished = time_max < safe_time
+            promise = math.inf if finished else safe_time + partition_lookahead
+            for other in other_partitions:
+                if outgoing[other] or sent_times[other] < promise:
+                    inboxes[other].put((EVENTS, partition, outgoing[other], promise))
+                    sent_times[other] = promise
+
+            if finished and all(input_time == math.inf for input_time in input_times.values()):
+                break
+
+            # wait for input from other partitions
+            pending_messages = [inbox.get()]
+            while True:
+                try:
+                    pending_messages.append(inbox.get_nowait())
+                except queue.Empty:
+                    break
+
+        collected = None
+        if collect is not None:
+            collected = {sim_obj.name: collect(sim_obj) for sim_obj in own_objects}
+        results.put((partition, None, simulator.num_events_handled, simulator.event_counts, collected, 0))
+    except BaseException:
+        results.put((partition, traceback.format_exc(), None, None, None, None))
+
+
+class GvtRound(object):
+    """ A computation of global virtual time, by a Chandy-Lamport snapshot of the partitions
+
+    A partition joins a round by recording its local virtual time, the time of its earliest unexecuted
+    event, and sending a marker to every other partition. The events and anti-messages that arrive after
+    a partition joins a round, and before the sender's marker, were in transit when the snapshot was
+    taken. Once every marker has arrived, a partition reports the minimum of its local virtual time and
+    the times of the messages in transit to it to every partition, and global virtual time is the
+    minimum report.
+
+    Attributes:
+        local_time (:obj:`float`): the partition's local virtual time when it joined the round
+        transit_time (:obj:`float`): the earliest time of the messages that were in transit to the partition
+        markers (:obj:`set` of :obj:`int`): the partitions whose markers have arrived
+        reports (:obj:`dict`): map from each partition whose report has arrived to its report
+    """
+
+    def __init__(self, local_time):
+        self.local_time = local_time
+        self.transit_time = math.inf
+        self.markers = set()
+        self.reports = {}
+
+
+class TimeWarpWorker(object):
+    """ A worker process that executes a partition of an optimistic simulation
+
+    Partition 0 starts a round of global virtual time computation after it has executed `gvt_interval`
+    events since the last round, or when it has no events to execute. Once global virtual time passes
+    `time_max` the partitions have executed all of the simulation's events, and finish.
+
+    Attributes:
+        simulator (:obj:`TimeWarpSimulationEngine`): the partition's engine
+        partition (:obj:`int`): the index of the partition
+        others (:obj:`list` of :obj:`int`): the other partitions
+        inboxes (:obj:`list` of :obj:`multiprocessing.Queue`): each partition's inbox
+        time_max (:obj:`float`): the simulation's end time
+        gvt_interval (:obj:`int`): the number of events partition 0 executes between rounds
+        gvt (:obj:`float`): global virtual time
+        rounds (:obj:`dict`): map from the number of each round in progress to its :obj:`GvtRound`
+        num_rounds (:obj:`int`): the number of rounds partition 0 has started
+        events_since_round (:obj:`int`): the number of events executed since partition 0 last started a round
+        finished (:obj:`bool`): whether global virtual time has passed `time_max`
+        num_done (:obj:`int`): the number of other partitions that have finished
+    """
+    # the number of events a partition executes between reading its inbox
+    EVENTS_PER_POLL = 10
+
+    def __init__(self, simulator, inboxes, time_max, gvt_interval):
+        self.simulator = simulator
+        self.partition = simulator.partition
+        self.others = [other for other in range(len(inboxes)) if other != self.partition]
+        self.inboxes = inboxes
+        self.time_max = time_max
+        self.gvt_interval = gvt_interval
+        self.gvt = -math.inf
+        self.rounds = {}
+        self.num_rounds = 0
+        self.events_since_round = 0
+        self.finished = False
+        self.num_done = 0
+
+    def idle(self):
+        """ Does this partition have no events to execute?
+
+        Returns:
+            :obj:`bool`: `True` if this partition has no events at or before `time_max`
+        """
+        return self.time_max < self.simulator.event_queue.next_event_time()
+
+    def send(self, message):
+        """ Send a message to every other partition
+
+        Args:
+            message (:obj:`tuple`): the message
+        """
+        for other in self.others:
+            self.inboxes[other].put(message)
+
+    def flush(self):
+        """ Send the outgoing events and anti-messages
+        """
+        simulator = self.simulator
+        for other in self.others:
+            if simulator.outgoing_events[other]:
+                self.inboxes[other].put((EVENTS, self.partition, simulator.outgoing_events[other]))
+                simulator.outgoing_events[other] = []
+            if simulator.outgoing_anti_messages[other]:
+                self.inboxes[other].put((ANTI_MESSAGES, self.partition, simulator.outgoing_anti_messages[other]))
+                simulator.outgoing_anti_messages[other] = []
+
+    def join_round(self, round_num):
+        """ Join a round of global virtual time computation
+
+        Args:
+            round_num (:obj:`int`): the round's number
+        """
+        # markers must follow every message sent before the snapshot
+        self.flush()
+        self.rounds[round_num] = GvtRound(self.simulator.event_queue.next_event_time())
+        self.send((GVT_MARKER, self.partition, round_num))
+        self.advance_round(round_num)
+
+    def advance_round(self, round_num):
+        """ Report this partition's minimum time once all markers have arrived, and finish the round
+        once all reports have arrived
+
+        Args:
+            round_num (:obj:`int`): the round's number
+        """
+        gvt_round = self.rounds[round_num]
+        if self.partition not in gvt_round.reports and len(gvt_round.markers) == len(self.others):
+            report = min(gvt_round.local_time, gvt_round.transit_time)
+            gvt_round.reports[self.partition] = report
+            self.send((GVT_REPORT, self.partition, round_num, report))
+        if len(gvt_round.reports) == len(self.others) + 1:
+            del self.rounds[round_num]
+            self.gvt = max(self.gvt, min(gvt_round.reports.values()))
+            self.simulator.commit(self.gvt)
+            if self.time_max < self.gvt:
+                self.finished = True
+
+    def receive(self, message):
+        """ Receive a message from another partition
+
+        Args:
+            message (:obj:`tuple`): the message
+        """
+        kind, sender = message[:2]
+        if kind in (EVENTS, ANTI_MESSAGES):
+            if kind == EVENTS:
+                earliest_time = min(event[1] for _, event in message[2])
+                self.simulator.insert_remote_events(message[2])
+            else:
+                earliest_time = min(receive_time for _, receive_time in message[2])
+                self.simulator.annihilate(message[2])
+            for gvt_round in self.rounds.values():
+                if sender not in gvt_round.markers:
+                    gvt_round.transit_time = min(gvt_round.transit_time, earliest_time)
+        elif kind == GVT_MARKER:
+            round_num = message[2]
+            if round_num not in self.rounds:
+                self.join_round(round_num)
+            self.rounds[round_num].markers.add(sender)
+            self.advance_round(round_num)
+        elif kind == GVT_REPORT:
+            _, _, round_num, report = message
+            self.rounds[round_num].reports[sender] = report
+            self.advance_round(round_num)
+        elif kind == DONE:
+            self.num_done += 1
+
+    def run(self):
+        """ Execute the partition until global virtual time passes `time_max`
+        """
+        simulator = self.simulator
+        inbox = self.inboxes[self.partition]
+        simulator.take_remote_sends()
+        while True:
+            idle = self.idle()
+            if self.partition == 0 and not self.rounds and (idle or self.gvt_interval <= self.events_since_round):
+                self.events_since_round = 0
+                self.join_round(self.num_rounds)
+                self.num_rounds += 1
+            if self.finished:
+                break
+
+            # read the inbox, waiting for a message if there's nothing to execute
+            messages = [inbox.get()] if idle else []
+            while True:
+                try:
+                    messages.append(inbox.get_nowait())
+                except queue.Empty:
+                    break
+            for message in messages:
+                self.receive(message)
+            if self.finished:
+                break
+            self.flush()
+
+            for _ in range(self.EVENTS_PER_POLL):
+                if self.idle():
+                    break
+                simulator.execute_event()
+                self.events_since_round += 1
+            self.flush()
+
+        # other partitions may still be sending events later than `time_max`; read them until all have
+        # finished, so that no partition waits to write to a full inbox
+        self.send((DONE, self.partition))
+        while self.num_done < len(self.others):
+            if inbox.get()[0] == DONE:
+                self.num_done += 1
+
+
+def _run_time_warp_partition(partition, model_builder, builder_args, partition_of, time_max, event_queue, collect,
+                             inboxes, results, gvt_interval):
+    """ Execute a partition of an optimistic simulation
+
+    Args:
+        partition (:obj:`int`): the index of the partition
+        model_builder (:obj:`function`): a function that returns a list of all of the simulation's objects
+        builder_args (:obj:`tuple`): arguments for `model_builder`
+        partition_of (:obj:`list` of :obj:`int`): the partition of each simulation object, in the order
+            returned by `model_builder`
+        time_max (:obj:`float`): the simulation's end time
+        event_queue (:obj:`object`): the event queue backend
+        collect (:obj:`function`): a function that returns a result from each simulation object, or `None`
+        inboxes (:obj:`list` of :obj:`multiprocessing.Queue`): each partition's inbox
+        results (:obj:`multiprocessing.Queue`): the queue to which the partition's results are sent
+        gvt_interval (:obj:`int`): the number of events partition 0 executes between computations of
+            global virtual time
+    """
+    try:
+        simulator = TimeWarpSimulationEngine(partition, len(inboxes), event_queue=event_queue)
+        objects = model_builder(*builder_args)
+        simulator.add_objects(objects)
+        simulator.assign_partitions(objects, partition_of)
+        own_objects = simulator.own_objects()
+        for sim_obj in own_objects:
+            if sim_obj.__class__.metadata.class_event_handler is not None:
+                raise SimulatorError("optimistic simulation doesn't support class event handlers, which '{}' "
+                                     "uses".format(sim_obj.name))
+        simulator.initialize()
+        simulator.num_events_handled = 0
+        TimeWarpWorker(simulator, inboxes, time_max, gvt_interval).run()
+
+        collected = None
+        if collect is not None:
+            collected = {sim_obj.name: collect(sim_obj) for sim_obj in own_objects}
+        results.put((partition, None, simulator.num_events_handled, simulator.event_counts, collected,
+                     simulator.num_rolled_back))
+    except BaseException:
+        results.put((partition, traceback.format_exc(), None, None, None, None))
+
+
+class ParallelSimulationEngine(object):
+    """ A parallel simulation engine
+
+    The simulation objects are partitioned across local worker processes. Each worker builds the
+    whole model with `model_builder`, and executes its own partition's objects. Events sent to objects in
+    other partitions are exchanged with their timestamps. Workers synchronize in one of two ways:
+
+    * Conservatively, with a :obj:`PartitionSimulationEngine` and the Chandy-Misra-Bryant null message
+      protocol :cite:`chandy1979distributed`, which requires that every event sent to another partition be
+      delayed by at least a positive lookahead. Lookaheads are declared by `lookahead` class attributes of
+      simulation object or message classes; see :obj:`lookahead`.
+    * Optimistically, with a :obj:`TimeWarpSimulationEngine`, which implements Time Warp
+      :cite:`jefferson1985virtual`. Partitions execute events speculatively, save the states of their
+      objects with `save_state()`, and roll back executions that events from other partitions precede.
+      Global virtual time, computed every `gvt_interval` events, reclaims saved states. Optimistic
+      simulation needs no lookahead, but it doesn't support class event handlers, or objects that cancel or
+      reschedule events, because cancellations and reschedulings aren't rolled back; both raise a
+      :obj:`SimulatorError`.
+
+    Because each partition executes, or commits, its events in the sequential engine's order, a simulation's
+    results are identical to the sequential engine's if its objects
+
+    * use their own random number generators,
+    * do not read the state of other objects, such as that of an event's sender, and
+    * do not receive simultaneous events with equal messages, which are ordered by the order in which they
+      were sent, from objects in different partitions.
+
+    Objects that share a generator, such as the global `random` generator, get a copy of it in each worker,
+    which the worker reseeds. If each object saves the shared generator's state with `save_state()`, a
+    rollback leaves the generator in its state before the earliest execution that's rolled back, so that
+    an optimistic simulation's results depend on its partition and seeds, but not on when rollbacks occur.
+
+    Attributes:
+        model_builder (:obj:`function`): a picklable function that returns a list of all of the simulation's
+            objects, in the order in which they are added to the simulation
+        builder_args (:obj:`tuple`): arguments for `model_builder`
+        partition (:obj:`dict` or :obj:`list`): the partition, that is, the index of the worker, that executes
+            each simulation object, as a map from object name to partition, or a list in the order of the
+            objects
+        num_partitions (:obj:`int`): the number of partitions, and worker processes
+        event_queue (:obj:`object`): the event queue backend used by each worker
+        synchronization (:obj:`str`): `CONSERVATIVE` or `OPTIMISTIC`
+        gvt_interval (:obj:`int`): in optimistic simulation, the number of events partition 0 executes between
+            computations of global virtual time
+    """
+    CONSERVATIVE = 'conservative'
+    OPTIMISTIC = 'optimistic'
+
+    SimulationReturnValue = namedtuple('SimulationReturnValue', 'num_events event_counts results num_rolled_back')
+    SimulationReturnValue.__doc__ += (': the number of times any simulation object executed, the '
+                                      'counts of the events executed, the results collected from the objects, '
+                                      'and the number of executions rolled back by optimistic simulation')
+
+    def __init__(self, model_builder, partition, builder_args=(), event_queue=None, synchronization=CONSERVATIVE,
+                 gvt_interval=1000):
+        """
+        Raises:
+            :obj:`SimulatorError`: if `synchronization` is not `CONSERVATIVE` or `OPTIMISTIC`
+        """
+        if synchronization not in (self.CONSERVATIVE, self.OPTIMISTIC):
+            raise SimulatorError("synchronization must be '{}' or '{}', but is '{}'".format(
+                self.CONSERVATIVE, self.OPTIMISTIC, synchronization))
+        self.model_builder = model_builder
+        self.builder_args = tuple(builder_args)
+        self.partition = partition
+        self.event_queue = event_queue
+        self.synchronization = synchronization
+        self.gvt_interval = gvt_interval
+        self.num_partitions = None
+
+    def partition_of_objects(self):
+        """ Get the partition of each of the simulation's objects
+
+        Returns:
+            :obj:`list` of :obj:`int`: the partition of each object, in the order returned by `model_builder`
+
+        Raises:
+            :obj:`SimulatorError`: if the partition doesn't assign every object to a non-negative partition
+        """
+        objects = self.model_builder(*self.builder_args)
+        if isinstance(self.partition, dict):
+            missing = [sim_obj.name for sim_obj in objects if sim_obj.name not in self.partition]
+            if missing:
+                raise SimulatorError("partition does not assign simulation objects: {}".format(missing))
+            partition_of = [self.partition[sim_obj.name] for sim_obj in objects]
+        else:
+            partition_of = list(self.partition)
+            if len(partition_of) != len(objects):
+                raise SimulatorError("partition assigns {} simulation objects, but the model has {}".format(
+                    len(partition_of), len(objects)))
+        if any(not isinstance(index, int) or index < 0 for index in partition_of):
+            raise SimulatorError("partitions must be non-negative ints")
+        return partition_of
+
+    def simulate(self, time_max, collect=None):
+        """ Run a simulation
+
+        Args:
+            time_max (:obj:`float`): the simulation's end time
+            collect (:obj:`function`, optional): a picklable function that returns a result from a
+                simulation object, which is collected from every object
+
+        Returns:
+            :obj:`SimulationReturnValue`: the number of times any simulation object executed, the counts of the
+                events executed, keyed as in :obj:`SimulationEngine`, a map from each object's name to its
+                collected result, or `None` if `collect` is not provided, and the number of executions
+                rolled back
+
+        Raises:
+            :obj:`SimulatorError`: if the partition is invalid, or a worker raises an exception
+        """
+        partition_of = self.partition_of_objects()
+        self.num_partitions = max(partition_of, default=0) + 1
+        context = multiprocessing.get_context()
+        inboxes = [context.Queue() for _ in range(self.num_partitions)]
+        results = context.Queue()
+        if self.synchronization == self.CONSERVATIVE:
+            target, extra_args = _run_partition, ()
+        else:
+            target, extra_args = _run_time_warp_partition, (self.gvt_interval,)
+        workers = [context.Process(target=target,
+                                   args=(partition, self.model_builder, self.builder_args, partition_of, time_max,
+                                         self.event_queue, collect, inboxes, results, *extra_args))
+                   for partition in range(self.num_partitions)]
+        for worker in workers:
+            worker.start()
+
+        num_events = 0
+        num_rolled_back = 0
+        event_counts = Counter()
+        collected = {} if collect is not None else None
+        failed = False
+        try:
+            for _ in workers:
+                partition, error, partition_num_events, partition_event_counts, partition_results, \
+                    partition_num_rolled_back = results.get()
+                if error is not None:
+                    failed = True
+                    raise SimulatorError("partition {} failed:\n{}".format(partition, error))
+                num_events += partition_num_events
+                num_rolled_back += partition_num_rolled_back
+                event_counts.update(partition_event_counts)
+                if collect is not None:
+                    collected.update(partition_results)
+        finally:
+            # the other workers can't finish without a failed worker
+            for worker in workers:
+                if failed:
+                    worker.terminate()
+                worker.join()
+        return self.SimulationReturnValue(num_events, event_counts, collected, num_rolled_back)
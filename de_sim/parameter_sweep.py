@@ -0,0 +1,244 @@
+""" Sweep the parameters of a model, storing results as they finish, and resuming interrupted sweeps
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-17
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import dataclasses
+import itertools
+import json
+import numpy
+import os
+import random
+
+from de_sim.config import core
+from de_sim.errors import SimulatorError
+from de_sim.replications import _init_worker, spawn_seeds
+from de_sim.simulation_engine import SimulationEngine
+
+
+def grid(parameter_values):
+    """ Get the points of a grid of parameter values
+
+    Args:
+        parameter_values (:obj:`dict`): map from each parameter's name to a list of its values
+
+    Returns:
+        :obj:`list` of :obj:`dict`: every combination of parameter values, with the last parameter
+            varying fastest
+    """
+    names = list(parameter_values)
+    return [dict(zip(names, values)) for values in itertools.product(*parameter_values.values())]
+
+
+def latin_hypercube(parameter_ranges, num_points, seed=None):
+    """ Get a Latin hypercube sample of parameter values
+
+    Each parameter's range is divided into `num_points` equal strata, and each stratum is sampled by
+    exactly one point.
+
+    Args:
+        parameter_ranges (:obj:`dict`): map from each parameter's name to a `(low, high)` pair
+        num_points (:obj:`int`): the number of points
+        seed (:obj:`int`, optional): seed for the sample
+
+    Returns:
+        :obj:`list` of :obj:`dict`: the points
+
+    Raises:
+        :obj:`SimulatorError`: if a range is empty
+    """
+    rng = numpy.random.default_rng(seed)
+    columns = []
+    for name, (low, high) in parameter_ranges.items():
+        if high < low:
+            raise SimulatorError(f"range of '{name}' ({low}, {high}) is empty")
+        strata = rng.permutation(num_points) + rng.random(num_points)
+        columns.append(low + (high - low) * strata / num_points)
+    names = list(parameter_ranges)
+    return [{name: float(column[i]) for name, column in zip(names, columns)} for i in range(num_points)]
+
+
+def _run_point(model_builder, builder_args, point, parameters, seed, sim_config, collect, event_queue):
+    """ Run the simulation of one point in a parameter sweep
+
+    Args:
+        model_builder (:obj:`function`): a function that returns a list of all of the simulation's objects
+        builder_args (:obj:`tuple`): arguments for `model_builder`, which follow `parameters` and `seed`
+        point (:obj:`int`): the index of the point
+        parameters (:obj:`dict`): the point's parameter values
+        seed (:obj:`int`): the point's seed
+        sim_config (:obj:`SimulationConfig`): the simulation's configuration
+        collect (:obj:`function`): a function that returns a result from each simulation object, or `None`
+        event_queue (:obj:`object`): the event queue backend
+
+    Returns:
+        :obj:`dict`: the point's record in the results store
+    """
+    random.seed(seed)
+    numpy.random.seed(seed)
+    simulator = SimulationEngine(event_queue=event_queue)
+    simulator.add_objects(model_builder(parameters, seed, *builder_args))
+    simulator.initialize()
+    num_events = simulator.simulate(sim_config=sim_config).num_events
+    results = None
+    if collect is not None:
+        results = {sim_obj.name: collect(sim_obj) for sim_obj in simulator.get_objects()}
+    return dict(point=point, parameters=parameters, seed=seed, num_events=num_events, results=results)
+
+
+class ParameterSweep(object):
+    """ Run a simulation at each point in a sweep of its model's parameters
+
+    Each point's simulation builds its objects with `model_builder(parameters, seed, *builder_args)`, and
+    runs them with a :obj:`SimulationEngine` configured by `sim_config`. The points are run by a pool of
+    worker processes, which load the de_sim configuration once. Only a few points per worker are queued
+    at a time, and idle workers take the next queued point, so the load stays balanced when points' run
+    times vary.
+
+    As each point finishes, its record is appended to a JSON Lines results store in `sim_config.output_dir`,
+    and flushed to disk. A record contains the point's index, parameters and seed, the number of events
+    executed, and the results collected from its simulation objects. When a sweep is restarted, the points
+    already in the store are skipped, so a sweep interrupted by a crash resumes where it stopped.
+
+    Attributes:
+        model_builder (:obj:`function`): a picklable function that takes a point's parameters, a seed and
+            `builder_args`, and returns a list of all of the simulation's objects
+        points (:obj:`list` of :obj:`dict`): the parameter values of each point, which must be
+            JSON-serializable, such as those made by :obj:`grid` or :obj:`latin_hypercube`
+        sim_config (:obj:`SimulationConfig`): the configuration of every point's simulation; its `output_dir`
+            stores the sweep's results, rather than the metadata of each simulation
+        builder_args (:obj:`tuple`): arguments for `model_builder`
+        seed (:obj:`int`): the seed from which the points' seeds are spawned; if `None`, fresh entropy
+            is used
+        max_workers (:obj:`int`): the number of worker processes; defaults to the number of processors
+        event_queue (:obj:`object`): the event queue backend used by each simulation
+    """
+    # the number of points queued per worker
+    POINTS_QUEUED_PER_WORKER = 2
+
+    def __init__(self, model_builder, points, sim_config, builder_args=(), seed=None, max_workers=None,
+                 event_queue=None):
+        """
+        Raises:
+            :obj:`SimulatorError`: if `sim_config` has no `output_dir`, or `output_dir` is not a directory
+        """
+        if sim_config.output_dir is None:
+            raise SimulatorError('a parameter sweep needs an output_dir to store its results')
+        self.output_dir = os.path.abspath(os.path.expanduser(sim_config.output_dir))
+        if os.path.exists(self.output_dir) and not os.path.isdir(self.output_dir):
+            raise SimulatorError(f"output_dir '{self.output_dir}' must be a directory")
+        self.model_builder = model_builder
+        self.points = list(points)
+        self.sim_config = sim_config
+        self.builder_args = tuple(builder_args)
+        self.seed = seed
+        self.max_workers = max_workers
+        self.event_queue = event_queue
+
+    def results_file(self):
+        """ Get the pathname of the results store
+
+        Returns:
+            :obj:`str`: the pathname of the results store
+        """
+        return os.path.join(self.output_dir, core.get_config()['de_sim']['sweep_results_file'])
+
+    def _read_results(self):
+        """ Read the records in the results store
+
+        A crash while a record is being written may leave an incomplete last line, which is ignored.
+
+        Returns:
+            :obj:`tuple`: the records, and the length of the store's complete records
+
+        Raises:
+            :obj:`SimulatorError`: if a complete record cannot be parsed, or belongs to another sweep
+        """
+        records = []
+        length = 0
+        if not os.path.exists(self.results_file()):
+            return records, length
+        with open(self.results_file(), 'rb') as results_file:
+            for line in results_file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise SimulatorError(f"cannot parse record at offset {length} of '{self.results_file()}': {e}")
+                point = record['point']
+                if not (0 <= point < len(self.points)) or \
+                        record['parameters'] != json.loads(json.dumps(self.points[point])):
+                    raise SimulatorError(f"point {point} in '{self.results_file()}' is not in this sweep")
+                records.append(record)
+                length += len(line)
+        return records, length
+
+    def results(self):
+        """ Get the records of the completed points
+
+        Returns:
+            :obj:`list` of :obj:`dict`: the records of the completed points, ordered by point
+        """
+        return sorted(self._read_results()[0], key=lambda record: record['point'])
+
+    def remaining_points(self):
+        """ Get the points that have not been completed
+
+        Returns:
+            :obj:`list` of :obj:`int`: the indices of the points that have not been completed
+        """
+        completed = {record['point'] for record in self._read_results()[0]}
+        return [point for point in range(len(self.points)) if point not in completed]
+
+    def run(self, collect=None):
+        """ Run the points that have not been completed, and provide their records as they finish
+
+        Args:
+            collect (:obj:`function`, optional): a picklable function that returns a JSON-serializable
+                result from a simulation object, which is collected from every object in each simulation
+
+        Returns:
+            :obj:`generator` of :obj:`dict`: the records of the points run, in the order in which they finish
+
+        Raises:
+            :obj:`Exception`: an exception raised by a point's simulation; the points that finished
+                before it remain in the results store
+        """
+        records, length = self._read_results()
+        completed = {record['point'] for record in records}
+        os.makedirs(self.output_dir, exist_ok=True)
+        sim_config = dataclasses.replace(self.sim_config, output_dir=None)
+        sim_config.validate()
+        seeds = spawn_seeds(self.seed, len(self.points))
+        remaining = (point for point in range(len(self.points)) if point not in completed)
+        num_workers = self.max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as executor, \
+                open(self.results_file(), 'ab') as results_file:
+            # discard an incomplete record left by a crash
+            results_file.truncate(length)
+            pending = set()
+            try:
+                while True:
+                    for point in itertools.islice(remaining,
+                                                  self.POINTS_QUEUED_PER_WORKER * num_workers - len(pending)):
+                        pending.add(executor.submit(_run_point, self.model_builder, self.builder_args, point,
+                                                    self.points[point], seeds[point], sim_config, collect,
+                                                    self.event_queue))
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    # store the points that finished before raising an exception from a failed point
+                    for future in sorted(done, key=lambda future: future.exception() is not None):
+                        record = future.result()
+                        results_file.write(json.dumps(record).encode() + b'\n')
+                        results_file.flush()
+                        os.fsync(results_file.fileno())
+                        yield record
+            finally:
+                for future in pending:
+                    future.cancel()
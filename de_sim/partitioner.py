@@ -0,0 +1,409 @@
+""" Partition a simulation's objects among workers by the traffic of messages between them
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-19
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from collections import Counter
+
+from de_sim.errors import SimulatorError
+from de_sim.simulation_engine import SimulationEngine
+from de_sim.simulation_object import EventQueue
+
+
+class TrafficCountingEventQueue(EventQueue):
+    """ An event queue that counts the events sent between simulation objects
+
+    Attributes:
+        traffic (:obj:`Counter`): the number of events sent, keyed by `(sending object name,
+            receiving object name)`
+    """
+
+    def __init__(self, backend=None):
+        self.traffic = Counter()
+        super().__init__(backend=backend)
+
+    def _insert_event(self, send_time, receive_time, sending_object, receiving_object, message):
+        self.traffic[(sending_object.name, receiving_object.name)] += 1
+        return super()._insert_event(send_time, receive_time, sending_object, receiving_object, message)
+
+    def _insert_events(self, events):
+        traffic = self.traffic
+        for event in events:
+            traffic[(event[2].name, event[3].name)] += 1
+        return super()._insert_events(events)
+
+
+class TrafficProfilingSimulationEngine(SimulationEngine):
+    """ A simulation engine that counts the events sent between its simulation objects
+    """
+
+    def __init__(self, shared_state=None, event_queue=None):
+        super().__init__(shared_state=shared_state, event_queue=event_queue)
+        self.event_queue = TrafficCountingEventQueue(backend=event_queue)
+
+    @property
+    def traffic(self):
+        """ Get the number of events sent between simulation objects
+
+        Returns:
+            :obj:`Counter`: the number of events sent, keyed by `(sending object name, receiving object name)`
+        """
+        return self.event_queue.traffic
+
+
+class TrafficPartitioner(object):
+    """ Partition simulation objects so that objects which exchange many events share a partition
+
+    The objects and the events they exchange form a communication graph, whose edges are weighted by the
+    number of events sent in either direction. The partitioner finds a balanced partition with a small
+    cut, the number of events sent between partitions, with a multilevel heuristic
+    :cite:`karypis1998fast`. The graph is coarsened by repeatedly merging heavily communicating pairs of
+    objects, the coarsest graph is partitioned greedily, and the partition is projected back to each finer
+    graph, where it's refined by moving objects between partitions to reduce the cut while keeping the
+    partitions balanced.
+
+    Attributes:
+        num_partitions (:obj:`int`): the number of partitions
+        loads (:obj:`dict`): map from each object's name to its load
+        imbalance (:obj:`float`): the fraction by which a partition's load may exceed the mean load
+        graph (:obj:`dict`): map from each object's name to a map from each object it communicates with
+            to the number of events they exchange
+    """
+    # coarsening stops when the graph has at most this many nodes per partition
+    COARSEST_NODES_PER_PARTITION = 8
+
+    # the maximum number of refinement passes over a graph
+    MAX_REFINEMENT_PASSES = 8
+
+    def __init__(self, traffic, num_partitions, loads=None, imbalance=0.05):
+        """
+        Args:
+            traffic (:obj:`dict`): the number of events sent, keyed by `(sending object name, receiving
+                object name)`
+            num_partitions (:obj:`int`): the number of partitions
+            loads (:obj:`dict`, optional): map from each object's name to its load; defaults to one more
+                than the number of events it receives; objects with no traffic must be included in `loads`
+            imbalance (:obj:`float`, optional): the fraction by which a partition's load may exceed the
+                mean load
+
+        Raises:
+            :obj:`SimulatorError`: if `num_partitions` is not positive, or `imbalance` or a load is negative
+        """
+        if num_partitions < 1:
+            raise SimulatorError("num_partitions ({}) must be positive".format(num_partitions))
+        if imbalance < 0:
+            raise SimulatorError("imbalance ({}) must be non-negative".format(imbalance))
+        self.num_partitions = num_partitions
+        self.imbalance = imbalance
+        if loads is None:
+            loads = {}
+            for (sender, receiver), count in traffic.items():
+                loads.setdefault(sender, 1)
+                loads[receiver] = loads.get(receiver, 1) + count
+        if any(load < 0 for load in loads.values()):
+            raise SimulatorError("loads must be non-negative")
+        self.loads = dict(loads)
+        self.graph = {name: {} for name in self.loads}
+        for (sender, receiver), count in traffic.items():
+            if sender == receiver:
+                continue
+            if sender not in self.graph or receiver not in self.graph:
+                raise SimulatorError("traffic between '{}' and '{}' involves an object without a load".format(
+                    sender, receiver))
+            self.graph[sender][receiver] = self.graph[sender].get(receiver, 0) + count
+            self.graph[receiver][sender] = self.graph[receiver].get(sender, 0) + count
+
+    @classmethod
+    def from_profile(cls, model_builder, time_max, num_partitions, builder_args=(), event_queue=None, **kwargs):
+        """ Make a partitioner from the traffic of a short profiling run of a simulation
+
+        Each object's load is the number of events it executes in the profiling run.
+
+        Args:
+            model_builder (:obj:`function`): a function that returns a list of all of the simulation's objects
+            time_max (:obj:`float`): the end time of the profiling run
+            num_partitions (:obj:`int`): the number of partitions
+            builder_args (:obj:`tuple`, optional): arguments for `model_builder`
+            event_queue (:obj:`object`, optional): the event queue backend
+            kwargs (:obj:`dict`): other arguments for :obj:`TrafficPartitioner`
+
+        Returns:
+            :obj:`TrafficPartitioner`: a partitioner of the objects returned by `model_builder`
+        """
+        simulator = TrafficProfilingSimulationEngine(event_queue=event_queue)
+        objects = model_builder(*builder_args)
+        simulator.add_objects(objects)
+        simulator.initialize()
+        simulator.simulate(time_max)
+        # ignore services added by the engine, which every partition executes
+        names = {sim_obj.name for sim_obj in objects}
+        traffic = {pair: count for pair, count in simulator.traffic.items() if names.issuperset(pair)}
+        loads = {sim_obj.name: 1 + sim_obj.num_events for sim_obj in objects}
+        return cls(traffic, num_partitions, loads=loads, **kwargs)
+
+    @classmethod
+    def from_trace(cls, event_messages, num_partitions, **kwargs):
+        """ Make a partitioner from a recorded trace of a simulation's events
+
+        Args:
+            event_messages (:obj:`list` of :obj:`EventMessage`): the events of a simulation, such as those
+                read from a plot log by :obj:`SpaceTime.get_data`
+            num_partitions (:obj:`int`): the number of partitions
+            kwargs (:obj:`dict`): other arguments for :obj:`TrafficPartitioner`
+
+        Returns:
+            :obj:`TrafficPartitioner`: a partitioner of the objects in the trace
+        """
+        traffic = Counter((event_message.send_coordinates.sim_obj_id, event_message.receive_coordinates.sim_obj_id)
+                          for event_message in event_messages)
+        return cls(traffic, num_partitions, **kwargs)
+
+    def capacity(self):
+        """ Get the maximum load of a balanced partition
+
+        Returns:
+            :obj:`float`: the maximum load of a balanced partition
+        """
+        return (1 + self.imbalance) * sum(self.loads.values()) / self.num_partitions
+
+    def partition(self):
+        """ Partition the simulation objects
+
+        Returns:
+            :obj:`dict`: map from each object's name to its partition, which can be provided to a
+                :obj:`ParallelSimulationEngine`
+        """
+        levels = []
+        graph, loads = self.graph, self.loads
+        while self.COARSEST_NODES_PER_PARTITION * self.num_partitions < len(graph):
+            coarse_graph, coarse_loads, coarse_node_of = self._coarsen(graph, loads)
+            if len(graph) * 0.95 < len(coarse_graph):
+                break
+            levels.append((graph, loads, coarse_node_of))
+            graph, loads = coarse_graph, coarse_loads
+
+        partition_of = self._refine(graph, loads, self._initial_partition(graph, loads))
+        for graph, loads, coarse_node_of in reversed(levels):
+            partition_of = {node: partition_of[coarse_node_of[node]] for node in graph}
+            partition_of = self._refine(graph, loads, partition_of)
+        return partition_of
+
+    def cut(self, partition_of):
+        """ Get the number of events sent between partitions
+
+        Args:
+            partition_of (:obj:`dict`): map from each object's name to its partition
+
+        Returns:
+            :obj:`int`: the number of events sent between partitions
+        """
+        return sum(weight for node, neighbors in self.graph.items() for neighbor, weight in neighbors.items()
+                   if partition_of[node] != partition_of[neighbor]) // 2
+
+    def partition_loads(self, partition_of):
+        """ Get the load of each partition
+
+        Args:
+            partition_of (:obj:`dict`): map from each object's name to its partition
+
+        Returns:
+            :obj:`list`: the load of each partition
+        """
+        partition_loads = [0] * self.num_partitions
+        for node, partition in partition_of.items():
+            partition_loads[partition] += self.loads[node]
+        return partition_loads
+
+    def _coarsen(self, graph, loads):
+        """ Coarsen a graph by merging pairs of nodes joined by heavy edges
+
+        Args:
+            graph (:obj:`dict`): a graph's weighted adjacency lists
+            loads (:obj:`dict`): the load of each node in `graph`
+
+        Returns:
+            :obj:`tuple`: the coarse graph, the loads of its nodes, and a map from each node in `graph`
+                to its node in the coarse graph
+        """
+        # don't make nodes too heavy to balance
+        max_load = sum(loads.values()) / (2 * self.num_partitions)
+        coarse_node_of = {}
+        coarse_loads = {}
+        for node in graph:
+            if node in coarse_node_of:
+                continue
+            coarse_node = len(coarse_loads)
+            coarse_node_of[node] = coarse_node
+            coarse_loads[coarse_node] = loads[node]
+            mate = None
+            for neighbor, weight in graph[node].items():
+                if neighbor not in coarse_node_of and loads[node] + loads[neighbor] <= max_load and \
+                        (mate is None or graph[node][mate] < weight):
+                    mate = neighbor
+            if mate is not None:
+                coarse_node_of[mate] = coarse_node
+                coarse_loads[coarse_node] += loads[mate]
+
+        coarse_graph = {coarse_node: {} for coarse_node in coarse_loads}
+        for node, neighbors in graph.items():
+            coarse_neighbors = coarse_graph[coarse_node_of[node]]
+            for neighbor, weight in neighbors.items():
+                coarse_neighbor = coarse_node_of[neighbor]
+                if coarse_neighbor != coarse_node_of[node]:
+                    coarse_neighbors[coarse_neighbor] = coarse_neighbors.get(coarse_neighbor, 0) + weight
+        return coarse_graph, coarse_loads, coarse_node_of
+
+    def _initial_partition(self, graph, loads):
+        """ Partition a graph by greedy graph growing
+
+        Each partition but the last is grown from a seed node by repeatedly adding the unassigned node that
+        communicates most with it, until it reaches the mean load. The last partition gets the remaining
+        nodes.
+
+        Args:
+            graph (:obj:`dict`): a graph's weighted adjacency lists
+            loads (:obj:`dict`): the load of each node in `graph`
+
+        Returns:
+            :obj:`dict`: map from each node in `graph` to its partition
+        """
+        mean_load = sum(loads.values()) / self.num_partitions
+        capacity = self.capacity()
+        unassigned = dict.fromkeys(graph)
+        partition_of = {}
+        for partition in range(self.num_partitions - 1):
+            partition_load = 0
+            # the number of events each unassigned node exchanges with the partition
+            connections = {}
+            while unassigned and partition_load < mean_load:
+                if connections:
+                    node = max(connections, key=connections.get)
+                    del connections[node]
+                else:
+                    node = next(iter(unassigned))
+                if 0 < partition_load and capacity < partition_load + loads[node]:
+                    break
+                del unassigned[node]
+                partition_of[node] = partition
+                partition_load += loads[node]
+                for neighbor, weight in graph[node].items():
+                    if neighbor in unassigned:
+                        connections[neighbor] = connections.get(neighbor, 0) + weight
+        for node in unassigned:
+            partition_of[node] = self.num_partitions - 1
+        return partition_of
+
+    def _refine(self, graph, loads, partition_of):
+        """ Refine a partition of a graph by moving nodes between partitions
+
+        Overloaded partitions are relieved first, by moving their nodes to partitions with room for them, or,
+        when no node fits elsewhere, by swapping them for lighter nodes. Then each pass moves nodes to
+        partitions with room for them, when the move reduces the cut, or keeps the cut and evens the
+        partitions' loads. A pass that moves no nodes swaps pairs of boundary nodes in different partitions,
+        when the swap reduces the cut.
+
+        Args:
+            graph (:obj:`dict`): a graph's weighted adjacency lists
+            loads (:obj:`dict`): the load of each node in `graph`
+            partition_of (:obj:`dict`): map from each node in `graph` to its partition
+
+        Returns:
+            :obj:`dict`: the refined partition
+        """
+        capacity = self.capacity()
+        partition_loads = [0] * self.num_partitions
+        for node, partition in partition_of.items():
+            partition_loads[partition] += loads[node]
+
+        def gains(node):
+            # the reduction in the cut from moving node to each partition
+            connections = [0] * self.num_partitions
+            for neighbor, weight in graph[node].items():
+                connections[partition_of[neighbor]] += weight
+            return [connection - connections[partition_of[node]] for connection in connections]
+
+        def move(node, partition):
+            partition_loads[partition_of[node]] -= loads[node]
+            partition_loads[partition] += loads[node]
+            partition_of[node] = partition
+
+        def swap_boundary_nodes():
+            # swap pairs of nodes in different partitions that would reduce the cut, but not fit, if moved
+            boundary = [node for node in graph if 0 < max(gains(node))]
+            swapped = False
+            for node in boundary:
+                node_gains = gains(node)
+                for other in boundary:
+                    partition, other_partition = partition_of[node], partition_of[other]
+                    if partition == other_partition or node_gains[other_partition] <= 0 or \
+                            capacity < partition_loads[other_partition] - loads[other] + loads[node] or \
+                            capacity < partition_loads[partition] - loads[node] + loads[other]:
+                        continue
+                    if 0 < node_gains[other_partition] + gains(other)[partition] - 2 * graph[node].get(other, 0):
+                        move(node, other_partition)
+                        move(other, partition)
+                        node_gains = gains(node)
+                        swapped = True
+            return swapped
+
+        # balance
+        for overloaded in range(self.num_partitions):
+            while capacity < partition_loads[overloaded]:
+                best = None
+                for node in graph:
+                    if partition_of[node] != overloaded:
+                        continue
+                    node_gains = gains(node)
+                    for partition in range(self.num_partitions):
+                        if partition != overloaded and partition_loads[partition] + loads[node] <= capacity and \
+                                (best is None or best[0] < node_gains[partition]):
+                            best = (node_gains[partition], node, partition)
+                if best is not None:
+                    move(best[1], best[2])
+                    continue
+                for node in graph:
+                    if partition_of[node] != overloaded:
+                        continue
+                    node_gains = gains(node)
+                    for other in graph:
+                        partition = partition_of[other]
+                        if partition == overloaded or loads[node] <= loads[other] or \
+                                capacity < partition_loads[partition] - loads[other] + loads[node]:
+                            continue
+                        gain = node_gains[partition] + gains(other)[overloaded] - 2 * graph[node].get(other, 0)
+                        if best is None or best[0] < gain:
+                            best = (gain, node, other)
+                if best is None:
+                    break
+                _, node, other = best
+                partition = partition_of[other]
+                move(other, overloaded)
+                move(node, partition)
+
+        # reduce the cut
+        for _ in range(self.MAX_REFINEMENT_PASSES):
+            moved = False
+            for node in graph:
+                current = partition_of[node]
+                node_gains = gains(node)
+                best = None
+                for partition in range(self.num_partitions):
+                    if partition == current or capacity < partition_loads[partition] + loads[node]:
+                        continue
+                    if 0 < node_gains[partition] or \
+                            (node_gains[partition] == 0 and
+                             partition_loads[partition] + loads[node] < partition_loads[current]):
+                        if best is None or (node_gains[best], -partition_loads[best]) < \
+                                (node_gains[partition], -partition_loads[partition]):
+                            best = partition
+                if best is not None:
+                    move(node, best)
+                    moved = True
+            if not moved:
+                moved = swap_boundary_nodes()
+            if not moved:
+                break
+        return partition_of
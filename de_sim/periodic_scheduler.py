@@ -0,0 +1,178 @@
+""" A scheduler that coalesces the events of periodic simulation objects
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-10
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+import itertools
+import math
+
+from de_sim.errors import SimulatorError
+from de_sim.simulation_message import SimulationMessage
+from de_sim.simulation_object import ApplicationSimulationObject, batch_event_handler
+from de_sim.template_sim_objs import NextEvent
+
+
+class NextPeriod(SimulationMessage):
+    "Execute the periodic events of a group of periodic simulation objects"
+    attributes = ['group_key']
+
+
+class PeriodicGroup(object):
+    """ Periodic simulation objects that share a start time and period
+
+    Attributes:
+        start_time (:obj:`float`): the time of the group's first event
+        period (:obj:`float`): the interval between the group's events
+        num_periods (:obj:`int`): the number of the group's events that have executed
+        members (:obj:`list` of :obj:`SimulationObject`): the group's members
+        sorted (:obj:`bool`): whether `members` is in dispatch order
+        handle (:obj:`EventHandle`): the handle of the group's next :obj:`NextPeriod` event, or `None`
+    """
+    __slots__ = ('start_time', 'period', 'num_periods', 'members', 'sorted', 'handle')
+
+    def __init__(self, start_time, period):
+        self.start_time = start_time
+        self.period = period
+        self.num_periods = 0
+        self.members = []
+        self.sorted = True
+        self.handle = None
+
+    def next_event_time(self):
+        """ Provide the time of the group's next event
+
+        To minimize roundoff errors in event times the number of periods is multiplied by the period.
+
+        Returns:
+            :obj:`float`: the time of the group's next event
+        """
+        return self.start_time + self.num_periods * self.period
+
+
+class PeriodicScheduler(ApplicationSimulationObject):
+    """ A simulation engine's service that executes the events of periodic simulation objects
+
+    Rather than schedule its own event every period, a periodic simulation object, such as a
+    :obj:`TemplatePeriodicSimulationObject`, registers with the scheduler. The scheduler keeps one
+    event in the event queue for each distinct `(start_time, period)` group of registered objects,
+    and when it executes calls `handle_event()` of each of the group's members. So a model with thousands
+    of periodic recorders or updaters adds one event to the event queue per group and period, rather than
+    one per object.
+
+    The members of simultaneous groups execute among themselves in the order in which their own
+    simultaneous events would be executed. But they all execute when the scheduler's events do, that is,
+    in the position of the scheduler's `event_rank` among the simulation's simultaneous events, rather than
+    in their own positions. Also, the scheduler is one of the simulation's objects. Because these change the
+    execution order and objects of a simulation, periodic objects register with the scheduler only if the
+    simulation's `coalesce_periodic_events` is set, which it is not by default.
+
+    Each member's periodic event is counted as an event handled by the simulation, and in the
+    simulation's event counts as a :obj:`NextEvent` received by the member, as if it were self-scheduled.
+
+    Attributes:
+        groups (:obj:`dict`): map from `(start_time, period)` to the :obj:`PeriodicGroup` of registered
+            objects with that start time and period
+    """
+    NAME = 'periodic_scheduler'
+
+    def __init__(self, name=NAME):
+        self.groups = {}
+        # members may start at any time
+        super().__init__(name, start_time=-math.inf)
+
+    def register(self, member):
+        """ Register a periodic simulation object, whose `handle_event()` will be called every period
+
+        Args:
+            member (:obj:`SimulationObject`): a simulation object with `start_time` and `period`
+                attributes and a `handle_event()` method
+        """
+        group_key = (member.start_time, member.period)
+        group = self.groups.get(group_key)
+        if group is None:
+            group = self.groups[group_key] = PeriodicGroup(member.start_time, member.period)
+        # a group with many members is sorted once, before its next event
+        group.members.append(member)
+        group.sorted = False
+        if group.handle is None:
+            group.handle = self.send_event_absolute(group.next_event_time(), self, NextPeriod(group_key))
+
+    def unregister(self, member):
+        """ Stop executing the periodic events of a registered simulation object
+
+        Args:
+            member (:obj:`SimulationObject`): a registered simulation object
+
+        Raises:
+            :obj:`SimulatorError`: if `member` is not registered
+        """
+        group_key = (member.start_time, member.period)
+        group = self.groups.get(group_key)
+        if group is None or member not in group.members:
+            raise SimulatorError("'{}' is not registered with the periodic scheduler".format(member.name))
+        group.members.remove(member)
+        if not group.members:
+            if group.handle is not None:
+                group.handle.cancel()
+            del self.groups[group_key]
+
+    @batch_event_handler
+    def handle_next_periods(self, events):
+        """ Execute the periodic events of the members of simultaneous groups, and schedule the groups' next events
+
+        The members of all the groups execute in the order in which their own simultaneous events would execute
+        among themselves.
+
+        Args:
+            events (:obj:`list` of :obj:`Event`): the groups' simultaneous :obj:`NextPeriod` events
+
+        Raises:
+            :obj:`SimulatorError`: if a member's time is later than the current time
+        """
+        groups = [self.groups[event.message.group_key] for event in events]
+        for group in groups:
+            if not group.sorted:
+                group.members.sort(key=self._dispatch_order)
+                group.sorted = True
+        if len(groups) == 1:
+            members = list(groups[0].members)
+        else:
+            members = sorted(itertools.chain.from_iterable(group.members for group in groups),
+                             key=self._dispatch_order)
+        simulator = self.simulator
+        event_counts = simulator.event_counts
+        count_events_by_object = simulator.count_events_by_object
+        now = self.time
+        for member in members:
+            if now < member.time:
+                raise SimulatorError("Dispatching '{}', but event time ({}) "
+                                     "< object time ({})".format(member.name, now, member.time))
+            member.time = now
+            counted_object = member.object_id if count_events_by_object else member.__class__
+            event_counts[(counted_object, NextEvent)] += 1
+            member.num_periods += 1
+            member.handle_event()
+        # the engine counts the dispatch of this object as one event
+        simulator.num_events_handled += len(members) - 1
+        for event, group in zip(events, groups):
+            group.num_periods += 1
+            group.handle = None
+            # members may have unregistered while their events executed
+            group_key = event.message.group_key
+            if self.groups.get(group_key) is group:
+                group.handle = self.send_event_absolute(group.next_event_time(), self, NextPeriod(group_key))
+
+    @staticmethod
+    def _dispatch_order(member):
+        return (member.event_rank, member.object_id)
+
+    def get_state(self):
+        return ''    # pragma: no cover
+
+    event_handlers = [(NextPeriod, 'handle_next_periods')]
+
+    # register the message type sent
+    messages_sent = [NextPeriod]
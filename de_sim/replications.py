@@ -0,0 +1,143 @@
+""" Run independent replications of a simulation in a pool of worker processes
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-14
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy
+import random
+
+from de_sim.config import core
+from de_sim.errors import SimulatorError
+from de_sim.simulation_engine import SimulationEngine
+
+
+def _init_worker():
+    """ Load the de_sim configuration once in each worker process, rather than for each replication
+    """
+    core.get_config()
+    core.get_debug_logs()
+
+
+def spawn_seeds(seed, num_seeds):
+    """ Spawn independent seeds from a seed
+
+    Args:
+        seed (:obj:`int`): the seed from which the seeds are spawned; if `None`, fresh entropy is used
+        num_seeds (:obj:`int`): the number of seeds
+
+    Returns:
+        :obj:`list` of :obj:`int`: the seeds, each of which is a valid seed for `random`,
+            :obj:`numpy.random.RandomState` and :obj:`numpy.random.default_rng`
+    """
+    seed_sequences = numpy.random.SeedSequence(seed).spawn(num_seeds)
+    return [int(seed_sequence.generate_state(1)[0]) for seed_sequence in seed_sequences]
+
+
+def _run_replication(model_builder, builder_args, replication, seed, time_max, collect, event_queue):
+    """ Run one replication of a simulation
+
+    Args:
+        model_builder (:obj:`function`): a function that returns a list of all of the simulation's objects
+        builder_args (:obj:`tuple`): arguments for `model_builder`, which follow `seed`
+        replication (:obj:`int`): the index of the replication
+        seed (:obj:`int`): the replication's seed
+        time_max (:obj:`float`): the simulation's end time
+        collect (:obj:`function`): a function that returns a result from each simulation object, or `None`
+        event_queue (:obj:`object`): the event queue backend
+
+    Returns:
+        :obj:`Replications.ReplicationResult`: the replication's result
+    """
+    # objects that draw from the global random number generators are seeded too
+    random.seed(seed)
+    numpy.random.seed(seed)
+    simulator = SimulationEngine(event_queue=event_queue)
+    simulator.add_objects(model_builder(seed, *builder_args))
+    simulator.initialize()
+    simulation_return_value = simulator.simulate(time_max)
+    results = None
+    if collect is not None:
+        results = {sim_obj.name: collect(sim_obj) for sim_obj in simulator.get_objects()}
+    return Replications.ReplicationResult(replication, seed, simulation_return_value, results)
+
+
+class Replications(object):
+    """ Run independent replications of a simulation in a pool of worker processes
+
+    Each replication builds the simulation's objects with `model_builder(seed, *builder_args)`, and runs
+    them with a :obj:`SimulationEngine`. Replications are fanned out over a :obj:`ProcessPoolExecutor`,
+    whose workers run many replications, so that importing de_sim and loading its configuration is done once
+    per worker. The seeds of the replications are independent streams spawned from `seed` by a
+    :obj:`numpy.random.SeedSequence`, so a replication's results depend only on `seed` and its index. Before
+    a replication is built the global `random` and `numpy.random` generators are seeded with its seed, but
+    models that create their own random number generators must seed them with `seed`.
+
+    Attributes:
+        model_builder (:obj:`function`): a picklable function that takes a seed and `builder_args`, and
+            returns a list of all of the simulation's objects
+        num_replications (:obj:`int`): the number of replications
+        builder_args (:obj:`tuple`): arguments for `model_builder`
+        seed (:obj:`int`): the seed from which the replications' seeds are spawned; if `None`, fresh entropy
+            is used
+        max_workers (:obj:`int`): the number of worker processes; defaults to the number of processors
+        event_queue (:obj:`object`): the event queue backend used by each replication
+    """
+    ReplicationResult = namedtuple('ReplicationResult', 'replication seed simulation_return_value results')
+    ReplicationResult.__doc__ += (": the index and seed of a replication, the `SimulationReturnValue` of its "
+                                  "simulation, and the results collected from its objects")
+    ReplicationResult.__qualname__ = 'Replications.ReplicationResult'
+
+    def __init__(self, model_builder, num_replications, builder_args=(), seed=None, max_workers=None,
+                 event_queue=None):
+        """
+        Raises:
+            :obj:`SimulatorError`: if `num_replications` is negative
+        """
+        if num_replications < 0:
+            raise SimulatorError("num_replications ({}) must be non-negative".format(num_replications))
+        self.model_builder = model_builder
+        self.num_replications = num_replications
+        self.builder_args = tuple(builder_args)
+        self.seed = seed
+        self.max_workers = max_workers
+        self.event_queue = event_queue
+
+    def seeds(self):
+        """ Get the seed of each replication
+
+        Returns:
+            :obj:`list` of :obj:`int`: the seed of each replication
+        """
+        return spawn_seeds(self.seed, self.num_replications)
+
+    def run(self, time_max, collect=None):
+        """ Run the replications, and provide their results as they finish
+
+        Args:
+            time_max (:obj:`float`): the simulations' end time
+            collect (:obj:`function`, optional): a picklable function that returns a result from a
+                simulation object, which is collected from every object in each replication
+
+        Returns:
+            :obj:`generator` of :obj:`ReplicationResult`: the replications' results, in the order in which
+                they finish
+
+        Raises:
+            :obj:`Exception`: an exception raised by a replication
+        """
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as executor:
+            futures = [executor.submit(_run_replication, self.model_builder, self.builder_args, replication, seed,
+                                       time_max, collect, self.event_queue)
+                       for replication, seed in enumerate(self.seeds())]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                # don't run the remaining replications if the caller stops early, or a replication fails
+                for future in futures:
+                    future.cancel()
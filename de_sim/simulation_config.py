@@ -25,6 +25,7 @@ class SimulationConfig(EnhancedDataClass):
     - Progress bar switch
     - Profiling switch
     - Control profiling of changes in heap objects
+    - Validation level of the events sent
 
     Attributes:
         time_max (:obj:`float`): maximum simulation time
@@ -41,6 +42,12 @@ class SimulationConfig(EnhancedDataClass):
         object_memory_change_interval (:obj:`int`, optional): number of simulation events between reporting
             changes in heap object count and memory use; if 0 do not report; defaults to do not report;
             cannot be used with `profile` as they run much too slowly
+        validation (:obj:`str`, optional): how thoroughly the events sent during a simulation are
+            checked: 'full' checks every event; 'sampled' checks one in every `validation_sample_interval`
+            events; 'off' trusts the simulation application and checks no events; events sent before the
+            simulation starts, such as initial events, are always checked; defaults to 'full'
+        validation_sample_interval (:obj:`int`, optional): the number of events sent per event checked
+            when `validation` is 'sampled'
     """
 
     time_max: float
@@ -50,6 +57,9 @@ class SimulationConfig(EnhancedDataClass):
     progress: bool = False
     profile: bool = False
     object_memory_change_interval: int = 0
+    validation: str = 'full'
+    validation_sample_interval: int = 100
+    VALIDATION_LEVELS = ('full', 'sampled', 'off')
     DO_NOT_PICKLE = ['stop_condition']
 
     def __setattr__(self, name, value):
@@ -97,6 +107,25 @@ class SimulationConfig(EnhancedDataClass):
             raise SimulatorError(f"object_memory_change_interval ('{self.object_memory_change_interval}') "
                                  "must be non-negative")
 
+        if self.validation not in self.VALIDATION_LEVELS:
+            raise SimulatorError(f"validation ('{self.validation}') must be one of {self.VALIDATION_LEVELS}")
+
+        if self.validation_sample_interval < 1:
+            raise SimulatorError(f"validation_sample_interval ('{self.validation_sample_interval}') "
+                                 "must be positive")
+
+    def send_check_interval(self):
+        """ Get the number of events sent per event checked
+
+        Returns:
+            :obj:`float`: the number of events sent per event checked; infinity if events are not checked
+        """
+        if self.validation == 'sampled':
+            return self.validation_sample_interval
+        if self.validation == 'off':
+            return float('inf')
+        return 1
+
     def validate(self):
         """ Validate a `SimulationConfig` instance
 
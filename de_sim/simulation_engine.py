@@ -16,8 +16,10 @@ import tempfile
 from de_sim.config import core
 from de_sim.simulation_metadata import SimulationMetadata, RunMetadata, AuthorMetadata
 from de_sim.errors import SimulatorError
+from de_sim.periodic_scheduler import PeriodicScheduler
 from de_sim.shared_state_interface import SharedStateInterface  # noqa: F401
 from de_sim.simulation_config import SimulationConfig
+from de_sim.simulation_message import SimulationMessageMeta
 from de_sim.simulation_object import EventQueue, SimulationObject  # noqa: F401
 from de_sim.utilities import SimulationProgressBar, FastLogger
 from wc_utils.util.git import get_repo_metadata, RepoMetadataCollectionType
@@ -37,6 +39,8 @@ class SimulationEngine(object):
     Attributes:
         time (:obj:`float`): the simulations's current time
         simulation_objects (:obj:`dict` of :obj:`SimulationObject`): all simulation objects, keyed by name
+        simulation_objects_by_id (:obj:`list` of :obj:`SimulationObject`): all simulation objects, indexed
+            by their `object_id`s; the entries of deleted objects are `None`
         shared_state (:obj:`list` of :obj:`object`, optional): the shared state of the simulation, needed to
             log or checkpoint the entire state of a simulation; all objects in `shared_state` must
             implement :obj:`SharedStateInterface`
@@ -44,7 +48,22 @@ class SimulationEngine(object):
         fast_debug_file_logger (:obj:`FastLogger`): a fast logger for debugging messages
         fast_plotting_logger (:obj:`FastLogger`): a fast logger for trajectory data for plotting
         event_queue (:obj:`EventQueue`): the queue of future events
-        event_counts (:obj:`Counter`): a counter of event types
+        event_counts (:obj:`Counter`): a counter of executed events, keyed by `(object_id, message type)`
+            if `count_events_by_object` is set, or by `(simulation object type, message type)` otherwise
+        count_events_by_object (:obj:`bool`): whether to count events per simulation object
+        coalesce_periodic_events (:obj:`bool`): whether periodic simulation objects register with
+            `periodic_scheduler` rather than scheduling their own events
+        periodic_scheduler (:obj:`PeriodicScheduler`): the simulation's periodic scheduler, or `None` until
+            a periodic simulation object needs it
+        send_check_interval (:obj:`float`): the number of events sent per event checked, as set by the
+            `validation` of the simulation that's running; 1 when no simulation is running
+        sends_until_check (:obj:`float`): the number of events to send without checks before the next
+            event that's checked
+        send_permissions (:obj:`bytearray`): the (sender type, message type, receiver type) permission
+            table built by `compile()`
+        num_compiled_message_types (:obj:`int`): the number of message types in `send_permissions`
+        compiled_types (:obj:`dict`): map from each type of object compiled by `compile()` to its
+            send permissions offset, receive permissions offset and event handler array
         num_events_handled (:obj:`int`): the number of events in a simulation
         sim_config (:obj:`SimulationConfig`): a simulation run's configuration
         sim_metadata (:obj:`SimulationMetadata`): a simulation run's metadata
@@ -61,7 +80,15 @@ class SimulationEngine(object):
     # number of rows to print in a performance profile
     NUM_PROFILE_ROWS = 50
 
-    def __init__(self, shared_state=None):
+    def __init__(self, shared_state=None, event_queue=None):
+        """
+        Args:
+            shared_state (:obj:`list` of :obj:`object`, optional): the shared state of the simulation
+            event_queue (:obj:`object`, optional): the backend of the simulation's event queue, either an
+                :obj:`EventQueueBackend` or the name of a backend in `EVENT_QUEUE_BACKENDS`: 'heap',
+                'indexed_heap', 'calendar', 'ladder' or 'two_level'; defaults to the `event_queue_backend`
+                in the de_sim config
+        """
         if shared_state is None:
             self.shared_state = []
         else:
@@ -72,13 +99,24 @@ class SimulationEngine(object):
         # self.time is not known until a simulation starts
         self.time = None
         self.simulation_objects = {}
-        self.event_queue = EventQueue()
+        self.simulation_objects_by_id = []
+        self.event_queue = EventQueue(backend=event_queue)
         self.event_counts = Counter()
+        self.count_events_by_object = core.get_config()['de_sim']['count_events_by_object']
+        self.coalesce_periodic_events = core.get_config()['de_sim']['coalesce_periodic_events']
+        self.periodic_scheduler = None
+        self.send_check_interval = 1
+        self.sends_until_check = 0
+        self.send_permissions = bytearray()
+        self.num_compiled_message_types = 0
+        self.compiled_types = {}
         self.__initialized = False
 
     def add_object(self, simulation_object):
         """ Add a simulation object instance to this simulation
 
+        The object is given the next `object_id`, so objects' ids are the order in which they were added.
+
         Args:
             simulation_object (:obj:`SimulationObject`): a simulation object instance that
                 will be used by this simulation
@@ -91,6 +129,40 @@ class SimulationEngine(object):
             raise SimulatorError("cannot add simulation object '{}', name already in use".format(name))
         simulation_object.add(self)
         self.simulation_objects[name] = simulation_object
+        simulation_object.object_id = len(self.simulation_objects_by_id)
+        self.simulation_objects_by_id.append(simulation_object)
+        # objects added before initialization are ranked and compiled together by initialize()
+        if self.__initialized:
+            if simulation_object.event_rank is None:
+                self.event_queue.rank_object(simulation_object)
+            # the table only needs rebuilding for a new type of object
+            if simulation_object.__class__ in self.compiled_types:
+                (simulation_object._send_permissions_offset, simulation_object._receive_permissions_offset,
+                 simulation_object._event_handlers) = self.compiled_types[simulation_object.__class__]
+            else:
+                self.compile()
+
+    def get_periodic_scheduler(self):
+        """ Provide the simulation's periodic scheduler, which is added to the simulation when it's first needed
+
+        Returns:
+            :obj:`PeriodicScheduler`: the simulation's periodic scheduler
+        """
+        if self.periodic_scheduler is None:
+            self.periodic_scheduler = PeriodicScheduler()
+            self.add_object(self.periodic_scheduler)
+        return self.periodic_scheduler
+
+    def rank_objects(self):
+        """ Rank the simulation objects, so that simultaneous events are ordered by integer comparison
+
+        Ranks preserve the `(class_event_priority, event_time_tiebreaker)` order of the objects, and
+        objects with equal keys share a rank, so events are ordered as before but simultaneous events
+        are compared by integer rather than by string. The objects are ranked together, and events
+        already in the event queue are rekeyed, at a cost of `O(n log(n) + m)`, where `n` is the
+        number of objects and `m` the number of scheduled events. See `EventQueue.rank_object()`.
+        """
+        self.event_queue.rank_objects(self.simulation_objects.values())
 
     def add_objects(self, simulation_objects):
         """ Add many simulation objects into the simulation
@@ -115,6 +187,71 @@ class SimulationEngine(object):
             raise SimulatorError("cannot get simulation object '{}'".format(simulation_object_name))
         return self.simulation_objects[simulation_object_name]
 
+    def compile(self):
+        """ Precompute the tables that check the events sent and dispatch the events received
+
+        Once the simulation objects are known, the types of objects and messages in a simulation are fixed.
+        This builds a dense table of the (sender type, message type, receiver type) combinations that the
+        types' registrations permit, indexed by `(sender type index * number of object types +
+        receiver type index) * number of message types + message type id`, where message type ids
+        are assigned when `SimulationMessage` subclasses are defined. Each object stores its offsets into
+        the table, so checking a send is a single lookup, and the array of its type's event handlers,
+        indexed by message type id, so dispatching an event needs no dict lookup. The table uses
+        `t^2 * m` bytes for `t` types of objects and `m` types of messages.
+        Sends that the table does not cover, such as those of message types defined after compilation,
+        are checked with the objects' registrations.
+        """
+        objects = list(self.simulation_objects.values())
+        object_types = list(dict.fromkeys(obj.__class__ for obj in objects))
+        type_indices = {object_type: index for index, object_type in enumerate(object_types)}
+        num_object_types = len(object_types)
+        num_message_types = SimulationMessageMeta.num_message_types
+
+        send_permissions = bytearray(num_object_types * num_object_types * num_message_types)
+        for sender_type, sender_index in type_indices.items():
+            for receiver_type, receiver_index in type_indices.items():
+                received_message_types = receiver_type.metadata.event_handler_priorities
+                row = (sender_index * num_object_types + receiver_index) * num_message_types
+                for message_type in sender_type.metadata.message_types_sent:
+                    if message_type in received_message_types:
+                        send_permissions[row + message_type._message_type_id] = 1
+        self.send_permissions = send_permissions
+        self.num_compiled_message_types = num_message_types
+
+        compiled_types = {}
+        for object_type, type_index in type_indices.items():
+            handlers = [None] * num_message_types
+            for message_type, handler in object_type.metadata.event_handlers_dict.items():
+                handlers[message_type._message_type_id] = handler
+            compiled_types[object_type] = (type_index * num_object_types * num_message_types,
+                                           type_index * num_message_types,
+                                           handlers)
+        self.compiled_types = compiled_types
+
+        for obj in objects:
+            (obj._send_permissions_offset, obj._receive_permissions_offset,
+             obj._event_handlers) = compiled_types[obj.__class__]
+
+    def get_object_by_id(self, object_id):
+        """ Get a simulation object instance by its id
+
+        Args:
+            object_id (:obj:`int`): the `object_id` of a simulation object that is part of this simulation
+
+        Returns:
+            :obj:`SimulationObject`: the simulation object whose id is `object_id`
+
+        Raises:
+            :obj:`SimulatorError`: if no simulation object in this simulation has id `object_id`
+        """
+        try:
+            simulation_object = self.simulation_objects_by_id[object_id] if 0 <= object_id else None
+        except (IndexError, TypeError):
+            simulation_object = None
+        if simulation_object is None:
+            raise SimulatorError("cannot get simulation object with id '{}'".format(object_id))
+        return simulation_object
+
     def get_objects(self):
         """ Get all simulation object instances in the simulation
         """
@@ -137,8 +274,12 @@ class SimulationEngine(object):
         name = simulation_object.name
         if name not in self.simulation_objects:
             raise SimulatorError("cannot delete simulation object '{}', has not been added".format(name))
+        # leave the ids of the other objects unchanged
+        self.simulation_objects_by_id[simulation_object.object_id] = None
         simulation_object.delete()
         del self.simulation_objects[name]
+        if simulation_object is self.periodic_scheduler:
+            self.periodic_scheduler = None
 
     def initialize(self):
         """ Initialize a simulation
@@ -150,11 +291,21 @@ class SimulationEngine(object):
         """
         if self.__initialized:
             raise SimulatorError('Simulation has already been initialized')
-        for sim_obj in self.simulation_objects.values():
+        self.rank_objects()
+        self.compile()
+        for sim_obj in self._initial_event_senders():
             sim_obj.send_initial_events()
         self.event_counts.clear()
         self.__initialized = True
 
+    def _initial_event_senders(self):
+        """ Provide the simulation objects whose initial events `initialize()` sends
+
+        Returns:
+            :obj:`list` of :obj:`SimulationObject`: the simulation objects
+        """
+        return list(self.simulation_objects.values())
+
     def init_metadata_collection(self, sim_config):
         """ Initialize a simulation metatdata object
 
@@ -195,6 +346,11 @@ class SimulationEngine(object):
         """
         for simulation_object in list(self.simulation_objects.values()):
             self.delete_object(simulation_object)
+        self.simulation_objects_by_id = []
+        self.event_counts.clear()
+        self.send_permissions = bytearray()
+        self.num_compiled_message_types = 0
+        self.compiled_types = {}
         self.event_queue.reset()
         self.__initialized = False
 
@@ -274,6 +430,8 @@ class SimulationEngine(object):
 
     SimulationReturnValue = namedtuple('SimulationReturnValue', 'num_events profile_stats',
                                        defaults=(None, None))
+    # picklable, so that simulations can be run in other processes
+    SimulationReturnValue.__qualname__ = 'SimulationEngine.SimulationReturnValue'
 
     def simulate(self, time_max=None, sim_config=None, config_dict=None, author_metadata=None):
         """ Run a simulation
@@ -378,10 +536,16 @@ class SimulationEngine(object):
 
         self.num_events_handled = 0
         self.log_with_time(f"Simulation to {self.sim_config.time_max} starting")
+        event_counts = self.event_counts
+        count_events_by_object = self.count_events_by_object
+        # a stop condition is evaluated between objects' dispatches, so it prevents dispatching objects together
+        use_class_event_handlers = self.sim_config.stop_condition is None
 
         try:
             self.progress.start(self.sim_config.time_max)
             self.init_metadata_collection(self.sim_config)
+            self.send_check_interval = self.sim_config.send_check_interval()
+            self.sends_until_check = 0
 
             while True:
 
@@ -420,18 +584,33 @@ class SimulationEngine(object):
                 # dispatch object that's ready to execute next event
                 next_sim_obj.time = next_time
 
-                self.log_with_time(" Running '{}' at {}".format(next_sim_obj.name, next_sim_obj.time))
+                class_event_handler = next_sim_obj.__class__.metadata.class_event_handler
+                if class_event_handler is not None and use_class_event_handlers:
+                    self.num_events_handled += self._handle_class_event_lists(next_sim_obj, class_event_handler)
+                    self.progress.progress(next_time)
+                    continue
+
+                if self.fast_debug_file_logger.active:
+                    self.log_with_time(" Running '{}' at {}", next_sim_obj.name, next_sim_obj.time)
                 next_events = self.event_queue.next_events()
+                # count events by structured keys; provide_event_counts() formats them
+                counted_object = next_sim_obj.object_id if count_events_by_object else next_sim_obj.__class__
                 for e in next_events:
-                    e_name = ' - '.join([next_sim_obj.__class__.__name__, next_sim_obj.name, e.message.__class__.__name__])
-                    self.event_counts[e_name] += 1
+                    event_counts[(counted_object, e.message.__class__)] += 1
                 next_sim_obj.__handle_event_list(next_events)
+                if not next_sim_obj.RETAINS_EVENTS:
+                    self.event_queue.recycle_events(next_events)
                 self.num_events_handled += 1
                 self.progress.progress(next_time)
 
         except SimulatorError as e:
             raise SimulatorError('Simulation ended with error:\n' + str(e))
 
+        finally:
+            # check all events sent outside simulations
+            self.send_check_interval = 1
+            self.sends_until_check = 0
+
         self.finish_metadata_collection()
         return self.num_events_handled
 
@@ -458,19 +637,103 @@ class SimulationEngine(object):
                 print(heading)
                 self.mem_tracker.print_diff()
 
-    def log_with_time(self, msg):
+    def log_with_time(self, msg, *args):
         """ Write a debug log message with the simulation time.
+
+        Args:
+            msg (:obj:`str`): the log message, or a format string for `args`
+            args (:obj:`list`): arguments to format into `msg`, only if the debug log is active
         """
-        self.fast_debug_file_logger.fast_log(msg, sim_time=self.time)
+        self.fast_debug_file_logger.fast_log(msg, *args, sim_time=self.time)
+
+    def _handle_class_event_lists(self, first_sim_obj, class_event_handler):
+        """ Handle the simultaneous events of consecutive objects of one class with its class event handler
+
+        Starting with `first_sim_obj`, which is the next object to dispatch, gather the event lists of
+        the objects dispatched next at the current time while they have the class of `first_sim_obj`,
+        and pass them all to `class_event_handler`.
+
+        Args:
+            first_sim_obj (:obj:`SimulationObject`): the next simulation object to dispatch
+            class_event_handler (:obj:`method`): the class event handler of `first_sim_obj`'s class
+
+        Returns:
+            :obj:`int`: the number of objects whose events were handled
+
+        Raises:
+            :obj:`SimulatorError`: if an object's time is later than the current time, or
+                if `class_event_handler` schedules an event for the current time that would have been
+                dispatched before one of the objects whose events it handled
+        """
+        event_queue = self.event_queue
+        now = self.time
+        sim_obj_class = first_sim_obj.__class__
+        objects = []
+        event_lists = []
+        sim_obj = first_sim_obj
+        while True:
+            if now < sim_obj.time:
+                raise SimulatorError("Dispatching '{}', but event time ({}) "
+                                     "< object time ({})".format(sim_obj.name, now, sim_obj.time))
+            sim_obj.time = now
+            objects.append(sim_obj)
+            event_lists.append(event_queue.next_events())
+            next_entry = event_queue._peek_entry()
+            if next_entry is None or next_entry[0] != now:
+                break
+            sim_obj = next_entry[-1].receiving_object
+            if sim_obj.__class__ is not sim_obj_class:
+                break
+
+        if self.fast_debug_file_logger.active:
+            self.log_with_time(" Running {} '{}' objects at {}", len(objects), sim_obj_class.__name__, now)
+        event_counts = self.event_counts
+        for sim_obj, events in zip(objects, event_lists):
+            counted_object = sim_obj.object_id if self.count_events_by_object else sim_obj_class
+            for event in events:
+                event_counts[(counted_object, event.message.__class__)] += 1
+            sim_obj.num_events += 1
+            if sim_obj.LOG_EVENTS and sim_obj.fast_plot_file_logger.active:
+                for event in events:
+                    sim_obj.fast_plot_file_logger.fast_log(str(event), sim_time=now)
+        class_event_handler(objects, event_lists)
+
+        # in sequential dispatch, an event for the current time that's ordered before the last object
+        # would have been handled before it
+        next_entry = event_queue._peek_entry()
+        if (next_entry is not None and next_entry[0] == now and
+                next_entry[-1].receiving_object.event_rank <= objects[-1].event_rank):
+            raise SimulatorError("class event handler of '{}' scheduled an event at the current time ({}) "
+                                 "for '{}'".format(sim_obj_class.__name__, now,
+                                                   next_entry[-1].receiving_object.name))
+        if not sim_obj_class.RETAINS_EVENTS:
+            for events in event_lists:
+                event_queue.recycle_events(events)
+        return len(objects)
 
     def provide_event_counts(self):
         """ Provide the simulation's categorized event counts
 
+        Events are counted per simulation object if `count_events_by_object` is set, and per simulation
+        object type otherwise.
+
         Returns:
             :obj:`str`: the simulation's categorized event counts, in a tab-separated table
         """
-        rv = ['\t'.join(['Count', 'Event type (Object type - object name - event type)'])]
-        for event_type, count in self.event_counts.most_common():
+        if self.count_events_by_object:
+            rv = ['\t'.join(['Count', 'Event type (Object type - object name - event type)'])]
+        else:
+            rv = ['\t'.join(['Count', 'Event type (Object type - event type)'])]
+        for (counted_object, message_type), count in self.event_counts.most_common():
+            if self.count_events_by_object:
+                sim_obj = self.simulation_objects_by_id[counted_object]
+                if sim_obj is None:
+                    names = ['deleted object {}'.format(counted_object)]
+                else:
+                    names = [sim_obj.__class__.__name__, sim_obj.name]
+            else:
+                names = [counted_object.__name__]
+            event_type = ' - '.join(names + [message_type.__name__])
             rv.append("{}\t{}".format(count, event_type))
         return '\n'.join(rv)
 
@@ -7,6 +7,7 @@
 """
 
 from abc import ABCMeta
+import itertools
 import warnings
 
 from de_sim.errors import SimulatorError
@@ -187,6 +188,11 @@ class SimulationMessageMeta(type):
     # attributes mapping keyword
     ATTRIBUTES = 'attributes'
 
+    # source of the dense integer ids of SimulationMessage subclasses, which index the tables built by
+    # `SimulationEngine.compile()`
+    _message_type_ids = itertools.count()
+    num_message_types = 0
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -199,7 +205,9 @@ class SimulationMessageMeta(type):
             warnings.warn("SimulationMessage '{}' definition does not contain a docstring.".format(
                 clsname))
 
-        attrs = {}
+        # keep the class' namespace, such as its module and qualified name, which pickling uses to find
+        # the class, and class attributes like `lookahead`
+        attrs = {key: value for key, value in namespace.items() if key != cls.ATTRIBUTES}
         if cls.ATTRIBUTES in namespace:
 
             # check types
@@ -216,6 +224,9 @@ class SimulationMessageMeta(type):
         new_simulation_message_class = super().__new__(cls, clsname, superclasses, attrs)
         if '__doc__' in namespace:
             new_simulation_message_class.__doc__ = namespace['__doc__'].strip()
+        # each subclass gets its own id, so that a message type never shares its superclass' id
+        new_simulation_message_class._message_type_id = next(cls._message_type_ids)
+        SimulationMessageMeta.num_message_types = new_simulation_message_class._message_type_id + 1
         return new_simulation_message_class
 
 
@@ -10,13 +10,15 @@ from abc import ABCMeta
 from copy import deepcopy
 from enum import IntEnum
 import abc
-import heapq
+import bisect
+import itertools
 import math
 import warnings
 
 from de_sim.config import core
 from de_sim.errors import SimulatorError
 from de_sim.event import Event
+from de_sim.event_queue_backends import get_event_queue_backend
 from de_sim.simulation_message import SimulationMessage
 from de_sim.utilities import ConcreteABCMeta, FastLogger
 from wc_utils.util.list import elements_to_str
@@ -25,34 +27,213 @@ from wc_utils.util.misc import most_qual_cls_name, round_direct
 config = core.get_config()
 
 
+class EventHandle(object):
+    """ A handle on a scheduled event, which can cancel or reschedule the event before it executes
+
+    Once the event has executed it may be recycled by the event queue's free list, after which `event`
+    no longer describes it.
+
+    Attributes:
+        event_queue (:obj:`EventQueue`): the event queue that stores the event
+        entry (:obj:`list`): the event's entry in `event_queue`
+        event (:obj:`Event`): the event
+    """
+    __slots__ = ('event_queue', 'entry', 'event')
+
+    def __init__(self, event_queue, entry):
+        """
+        Args:
+            event_queue (:obj:`EventQueue`): the event queue that stores the event
+            entry (:obj:`list`): the event's entry in `event_queue`
+        """
+        self.event_queue = event_queue
+        self.entry = entry
+        self.event = entry[-1]
+
+    @property
+    def pending(self):
+        """ Is the event still scheduled, that is, neither executed nor cancelled?
+
+        Returns:
+            :obj:`bool`: `True` if the event is still scheduled
+        """
+        return self.entry[-1] is not None
+
+    def __deepcopy__(self, memo):
+        # a handle identifies an event in its queue, so copies of the handle's holder share it
+        return self
+
+    def cancel(self):
+        """ Cancel the event, so that it will not execute
+
+        Returns:
+            :obj:`bool`: `True` if the event was cancelled, or `False` if it had already been executed or
+                cancelled
+        """
+        return self.event_queue.cancel(self)
+
+
 # TODO(Arthur): move to engine
 class EventQueue(object):
     """ A simulation's event queue
 
-    Stores a `SimulationEngine`'s events in a heap (also known as a priority queue).
-    The heap is a 'min heap', which keeps the event with the smallest
-    `(event_time, sending_object.name)` at the root in heap[0].
-    This is implemented via comparison operations in `Event`.
-    Thus, all entries with equal `(event_time, sending_object.name)` will be popped from the heap
-    adjacently. `schedule_event()` costs `O(log(n))`, where `n` is the size of the heap,
-    while `next_events()`, which returns all events with the minimum
-    `(event_time, sending_object.name)`, costs `O(mlog(n))`, where `m` is the number of events
-    returned.
+    Stores a `SimulationEngine`'s events in a priority queue, which is provided by an
+    :obj:`EventQueueBackend`. Each event is stored in an entry, a list
+    `[event_time, receiving_object.event_rank, sequence_number, event]`, which the backend orders by
+    native sequence comparison. Entries are
+    ordered like the comparison operations in `Event`, and the unique sequence number ensures that
+    `Event`'s comparison operations are never called.
+
+    An object's rank is an integer that orders its `(class_event_priority, event_time_tiebreaker)`
+    key among the keys of all objects that have been ranked by this queue; objects with equal keys
+    share a rank. Ranks are spaced `RANK_SPACING` apart, so that a new key can usually be ranked
+    between its neighbours without changing any other rank. Only when no integer remains between
+    them are all keys respaced and the entries rekeyed. An object that receives an event before it
+    is ranked, such as an object that has not been added to a `SimulationEngine`, is ranked then, so
+    all entries have the same shape.
+    Thus, all entries with equal `(event_time, receiving_object)` will be removed from the backend
+    adjacently. With the default heap backend `schedule_event()` costs `O(log(n))`, where `n` is the
+    number of events in the queue, while `next_events()`, which returns all events with the minimum
+    `(event_time, receiving_object)`, costs `O(mlog(n))`, where `m` is the number of events
+    returned. The calendar and ladder backends reduce these costs to amortized `O(1)` and `O(m)`.
+
+    Events are cancelled lazily: cancelling an event replaces the event in its entry with `None`,
+    leaving a tombstone that is discarded when it reaches the front of the queue. When tombstones
+    exceed the fraction `compaction_fraction` of the entries in the backend, they are all removed.
+
+    To reduce allocation, executed events are recycled: the `SimulationEngine` returns them to a
+    bounded free list, from which new events are taken. Simulation objects whose handlers keep
+    references to events after handling them must opt out by setting `RETAINS_EVENTS`.
 
     Attributes:
-        event_heap (:obj:`list`): a `SimulationEngine`'s heap of events
+        backend (:obj:`EventQueueBackend`): the priority queue that stores a `SimulationEngine`'s events
+        sequence_numbers (:obj:`itertools.count`): source of the sequence numbers that order
+            otherwise simultaneous entries by the order in which they were scheduled
+        num_cancelled (:obj:`int`): the number of tombstones in `backend`
+        compaction_fraction (:obj:`float`): the fraction of the entries in `backend` that tombstones
+            may reach before they are removed
+        break_ties_by_send_order (:obj:`bool`): if set, `next_events()` orders simultaneous events
+            with equal message type priorities by the order in which they were scheduled, rather than
+            by comparing their messages
+        free_events (:obj:`list` of :obj:`Event`): executed events available for reuse
+        max_free_events (:obj:`int`): the maximum size of `free_events`; 0 disables recycling
+        num_events_allocated (:obj:`int`): the number of events allocated
+        num_events_reused (:obj:`int`): the number of events taken from `free_events`
+        num_events_recycled (:obj:`int`): the number of executed events added to `free_events`
+        ranked_keys (:obj:`list` of :obj:`tuple`): the sorted `(class_event_priority, event_time_tiebreaker)`
+            keys of the ranked objects
+        key_ranks (:obj:`list` of :obj:`int`): the rank of each key in `ranked_keys`
+        ranked_objects (:obj:`dict`): map from each key in `ranked_keys` to the objects that have it
         debug_logs (:obj:`wc_utils.debug_logs.core.DebugLogsManager`): a `DebugLogsManager`
     """
+    # the difference between the ranks of adjacent keys when they are spaced
+    RANK_SPACING = 1 << 16
 
-    def __init__(self):
-        self.event_heap = []
+    def __init__(self, backend=None):
+        """
+        Args:
+            backend (:obj:`object`, optional): an :obj:`EventQueueBackend`, or the name of one in
+                `EVENT_QUEUE_BACKENDS`; defaults to the `event_queue_backend` in the de_sim config
+        """
+        if backend is None:
+            backend = config['de_sim']['event_queue_backend']
+        self.backend = get_event_queue_backend(backend)
+        self.sequence_numbers = itertools.count()
+        self.num_cancelled = 0
+        self.compaction_fraction = config['de_sim']['cancelled_event_compaction_fraction']
+        self.break_ties_by_send_order = config['de_sim']['break_ties_by_send_order']
+        self.max_free_events = config['de_sim']['event_free_list_size']
+        self.free_events = []
+        self.num_events_allocated = self.num_events_reused = self.num_events_recycled = 0
+        self.ranked_keys = []
+        self.key_ranks = []
+        self.ranked_objects = {}
         self.debug_logs = core.get_debug_logs()
         self.fast_debug_file_logger = FastLogger(self.debug_logs.get_log('de_sim.debug.file'), 'debug')
 
     def reset(self):
         """ Empty the event queue
         """
-        self.event_heap = []
+        # make the handles of the discarded events inactive
+        for entry in self.backend.entries():
+            entry[-1] = None
+        self.backend.clear()
+        self.num_cancelled = 0
+        self.free_events = []
+        self.num_events_allocated = self.num_events_reused = self.num_events_recycled = 0
+        for objects in self.ranked_objects.values():
+            for obj in objects:
+                obj.event_rank = None
+        self.ranked_keys = []
+        self.key_ranks = []
+        self.ranked_objects = {}
+
+    def rank_object(self, obj):
+        """ Rank a simulation object among the objects already ranked by this queue
+
+        Costs `O(n)` in the number of ranked keys for the insertion into the sorted keys, and
+        `O(n + m)`, where `m` is the number of scheduled events, in the rare case that the keys
+        must be respaced.
+
+        Args:
+            obj (:obj:`SimulationObject`): the object to rank
+        """
+        key = (obj.class_event_priority, obj.event_time_tiebreaker)
+        if key in self.ranked_objects:
+            self.ranked_objects[key].append(obj)
+            obj.event_rank = self.key_ranks[bisect.bisect_left(self.ranked_keys, key)]
+            return
+        ranked_keys = self.ranked_keys
+        key_ranks = self.key_ranks
+        index = bisect.bisect_left(ranked_keys, key)
+        lower = key_ranks[index - 1] if index else None
+        upper = key_ranks[index] if index < len(key_ranks) else None
+        ranked_keys.insert(index, key)
+        self.ranked_objects[key] = [obj]
+        if lower is None and upper is None:
+            rank = 0
+        elif upper is None:
+            rank = lower + self.RANK_SPACING
+        elif lower is None:
+            rank = upper - self.RANK_SPACING
+        elif 1 < upper - lower:
+            rank = (lower + upper) // 2
+        else:
+            key_ranks.insert(index, None)
+            self._respace_ranks()
+            return
+        key_ranks.insert(index, rank)
+        obj.event_rank = rank
+
+    def rank_objects(self, objects):
+        """ Rank many simulation objects together with the objects already ranked by this queue
+
+        All keys are respaced, which costs `O(n log(n) + m)`, where `n` is the number of ranked keys
+        and `m` the number of scheduled events, rather than the `O(n)` per object of `rank_object()`.
+
+        Args:
+            objects (:obj:`iterable` of :obj:`SimulationObject`): the objects to rank
+        """
+        ranked_objects = self.ranked_objects
+        for obj in objects:
+            key = (obj.class_event_priority, obj.event_time_tiebreaker)
+            objects_with_key = ranked_objects.setdefault(key, [])
+            if all(other is not obj for other in objects_with_key):
+                objects_with_key.append(obj)
+        self.ranked_keys = sorted(ranked_objects)
+        self._respace_ranks()
+
+    def _respace_ranks(self):
+        """ Space the ranks of the keys in `ranked_keys` `RANK_SPACING` apart, and rekey the scheduled events
+        """
+        spacing = self.RANK_SPACING
+        self.key_ranks = [index * spacing for index in range(len(self.ranked_keys))]
+        ranked_objects = self.ranked_objects
+        for key, rank in zip(self.ranked_keys, self.key_ranks):
+            for obj in ranked_objects[key]:
+                obj.event_rank = rank
+        if len(self.backend):
+            self.rekey()
 
     def len(self):
         """ Size of the event queue
@@ -60,7 +241,7 @@ class EventQueue(object):
         Returns:
             :obj:`int`: number of events in the event queue
         """
-        return len(self.event_heap)
+        return len(self.backend) - self.num_cancelled
 
     def schedule_event(self, send_time, receive_time, sending_object, receiving_object, message):
         """ Create an event and insert in this event queue, scheduled to execute at `receive_time`
@@ -80,10 +261,72 @@ class EventQueue(object):
                 provides the simulation application's type for an `Event`; it may also carry a payload
                 for the `Event` in its attributes.
 
+        Returns:
+            :obj:`EventHandle`: a handle that can cancel or reschedule the event
+
         Raises:
             :obj:`SimulatorError`: if `receive_time` < `send_time`, or `receive_time` or `send_time` is NaN
         """
+        self._check_event(send_time, receive_time, message)
+        return self._insert_event(send_time, receive_time, sending_object, receiving_object, message)
+
+    def _insert_event(self, send_time, receive_time, sending_object, receiving_object, message):
+        """ Create an event that has already been checked and insert it in this event queue
+
+        Args:
+            send_time (:obj:`float`): the simulation time at which the event was generated (sent)
+            receive_time (:obj:`float`): the simulation time at which the event will execute
+            sending_object (:obj:`SimulationObject`): the object sending the event
+            receiving_object (:obj:`SimulationObject`): the object that will receive the event
+            message (:obj:`SimulationMessage`): a `SimulationMessage` carried by the event
+
+        Returns:
+            :obj:`EventHandle`: a handle that can cancel or reschedule the event
+        """
+        event = self._new_event(send_time, receive_time, sending_object, receiving_object, message)
+        # As per David Jefferson's thinking, the event queue is ordered by data provided by the
+        # simulation application, in particular the tuple (event time, receiving object name).
+        # See the comparison operators for Event. This achieves deterministic and reproducible
+        # simulations.
+        entry = [*event._order_time, next(self.sequence_numbers), event]
+        self.backend.push(entry)
+        return EventHandle(self, entry)
+
+    def schedule_events(self, events):
+        """ Create multiple events and insert them in this event queue
+
+        The events are inserted together, which lets the backend reorganize itself once instead of
+        inserting each event separately when the batch is large relative to the queue.
+
+        Args:
+            events (:obj:`iterable` of :obj:`tuple`): `(send_time, receive_time, sending_object,
+                receiving_object, message)` tuples, with the arguments of `schedule_event()`
+
+        Returns:
+            :obj:`list` of :obj:`EventHandle`: handles for the events, in the order of `events`
 
+        Raises:
+            :obj:`SimulatorError`: if any event is invalid, as in `schedule_event()`; then no events are
+                scheduled
+        """
+        events = list(events)
+        for send_time, receive_time, _, _, message in events:
+            self._check_event(send_time, receive_time, message)
+        return self._insert_events(events)
+
+    @staticmethod
+    def _check_event(send_time, receive_time, message):
+        """ Check the times and message of an event
+
+        Args:
+            send_time (:obj:`float`): the simulation time at which the event was generated (sent)
+            receive_time (:obj:`float`): the simulation time at which the event will execute
+            message (:obj:`SimulationMessage`): a `SimulationMessage` carried by the event
+
+        Raises:
+            :obj:`SimulatorError`: if `receive_time` < `send_time`, or `receive_time` or `send_time` is NaN,
+                or if `message` is not a `SimulationMessage`
+        """
         if math.isnan(send_time) or math.isnan(receive_time):
             raise SimulatorError("send_time ({}) and/or receive_time ({}) is NaN".format(
                 receive_time, send_time))
@@ -99,12 +342,179 @@ class EventQueue(object):
             raise SimulatorError("message should be an instance of {} but is a '{}'".format(
                 SimulationMessage.__name__, type(message).__name__))
 
-        event = Event(send_time, receive_time, sending_object, receiving_object, message)
-        # As per David Jefferson's thinking, the event queue is ordered by data provided by the
-        # simulation application, in particular the tuple (event time, receiving object name).
-        # See the comparison operators for Event. This achieves deterministic and reproducible
-        # simulations.
-        heapq.heappush(self.event_heap, event)
+    def _insert_events(self, events):
+        """ Create events that have already been checked and insert them in this event queue
+
+        Args:
+            events (:obj:`list` of :obj:`tuple`): `(send_time, receive_time, sending_object,
+                receiving_object, message)` tuples
+
+        Returns:
+            :obj:`list` of :obj:`EventHandle`: handles for the events, in the order of `events`
+        """
+        sequence_numbers = self.sequence_numbers
+        entries = []
+        for send_time, receive_time, sending_object, receiving_object, message in events:
+            event = self._new_event(send_time, receive_time, sending_object, receiving_object, message)
+            entries.append([*event._order_time, next(sequence_numbers), event])
+        self.backend.push_many(entries)
+        return [EventHandle(self, entry) for entry in entries]
+
+    def _new_event(self, send_time, receive_time, sending_object, receiving_object, message):
+        """ Get an event, reusing a recycled event if one is available
+
+        Args:
+            send_time (:obj:`float`): the simulation time at which the event was generated (sent)
+            receive_time (:obj:`float`): the simulation time at which the event will execute
+            sending_object (:obj:`SimulationObject`): the object sending the event
+            receiving_object (:obj:`SimulationObject`): the object that will receive the event
+            message (:obj:`SimulationMessage`): a `SimulationMessage` carried by the event
+
+        Returns:
+            :obj:`Event`: the event
+        """
+        if receiving_object.event_rank is None:
+            self.rank_object(receiving_object)
+        if self.free_events:
+            event = self.free_events.pop()
+            event.__init__(send_time, receive_time, sending_object, receiving_object, message)
+            self.num_events_reused += 1
+            return event
+        self.num_events_allocated += 1
+        return Event(send_time, receive_time, sending_object, receiving_object, message)
+
+    def recycle_events(self, events):
+        """ Add executed events to the free list, up to its maximum size
+
+        The events must not be referenced by anything that will use them later.
+
+        Args:
+            events (:obj:`list` of :obj:`Event`): executed events
+        """
+        free_events = self.free_events
+        num_recycled = min(len(events), self.max_free_events - len(free_events))
+        if 0 < num_recycled:
+            for event in events[:num_recycled]:
+                # release the message, which may be large
+                event.message = None
+            free_events.extend(events[:num_recycled])
+            self.num_events_recycled += num_recycled
+
+    def event_allocation_counts(self):
+        """ Get counts of event allocation and reuse
+
+        Returns:
+            :obj:`dict`: the number of events `allocated`, `reused` from the free list, and `recycled`
+                into the free list, and the fraction of new events that were reused, `reuse_rate`
+        """
+        num_new_events = self.num_events_allocated + self.num_events_reused
+        reuse_rate = self.num_events_reused / num_new_events if num_new_events else 0.
+        return dict(allocated=self.num_events_allocated,
+                    reused=self.num_events_reused,
+                    recycled=self.num_events_recycled,
+                    reuse_rate=reuse_rate)
+
+    def cancel(self, handle):
+        """ Cancel a scheduled event
+
+        Args:
+            handle (:obj:`EventHandle`): the handle of the event to cancel
+
+        Returns:
+            :obj:`bool`: `True` if the event was cancelled, or `False` if it had already been executed or
+                cancelled
+        """
+        return self._tombstone(handle.entry)
+
+    def _tombstone(self, entry):
+        """ Make an entry a tombstone, and compact the backend if tombstones are too numerous
+
+        Args:
+            entry (:obj:`list`): an entry in the backend
+
+        Returns:
+            :obj:`bool`: `True` if `entry` was made a tombstone, or `False` if it already was one
+        """
+        if entry[-1] is None:
+            return False
+        entry[-1] = None
+        self.num_cancelled += 1
+        if self.compaction_fraction * len(self.backend) < self.num_cancelled:
+            self.compact()
+        return True
+
+    def reschedule(self, handle, new_time):
+        """ Move a scheduled event to a new event time
+
+        The event is reused. If the backend is `UPDATABLE` the event's entry is moved in place;
+        otherwise the entry is tombstoned and a new entry for the event is inserted. Either way, among
+        simultaneous events the rescheduled event is ordered as if it had been scheduled now.
+
+        Args:
+            handle (:obj:`EventHandle`): the handle of the event to reschedule
+            new_time (:obj:`float`): the event's new event time
+
+        Raises:
+            :obj:`SimulatorError`: if the event has been executed or cancelled, or
+                if `new_time` is NaN or earlier than the time the event was sent
+        """
+        entry = handle.entry
+        event = entry[-1]
+        if event is None:
+            raise SimulatorError("cannot reschedule an event that has been executed or cancelled")
+        if math.isnan(new_time):
+            raise SimulatorError("new_time is NaN")
+        if new_time < event.creation_time:
+            raise SimulatorError("new_time < send_time in reschedule(): {} < {}".format(
+                new_time, event.creation_time))
+
+        event.event_time = new_time
+        event._order_time = event._get_order_time()
+        if self.backend.UPDATABLE:
+            entry[0] = new_time
+            entry[-2] = next(self.sequence_numbers)
+            self.backend.update(entry)
+        else:
+            new_entry = [*event._order_time, next(self.sequence_numbers), event]
+            self.backend.push(new_entry)
+            handle.entry = new_entry
+            self._tombstone(entry)
+
+    def rekey(self):
+        """ Recompute the order of the scheduled events, after the ranks of their receiving objects change
+
+        Entries are modified in place, so the events' handles remain valid, and tombstones are removed.
+        """
+        entries = []
+        for entry in self.backend.entries():
+            event = entry[-1]
+            if event is not None:
+                event._order_time = event._get_order_time()
+                entry[:-2] = event._order_time
+                entries.append(entry)
+        self.backend.clear()
+        self.backend.push_many(entries)
+        self.num_cancelled = 0
+
+    def compact(self):
+        """ Remove all tombstones from the backend
+        """
+        self.backend.compact()
+        self.num_cancelled = 0
+
+    def _peek_entry(self):
+        """ Get the earliest entry that has not been cancelled, discarding any tombstones before it
+
+        Returns:
+            :obj:`list`: the earliest entry that has not been cancelled, or `None` if the queue is empty
+        """
+        backend = self.backend
+        entry = backend.peek()
+        while entry is not None and entry[-1] is None:
+            backend.pop()
+            self.num_cancelled -= 1
+            entry = backend.peek()
+        return entry
 
     def empty(self):
         """ Is the event queue empty?
@@ -112,7 +522,7 @@ class EventQueue(object):
         Returns:
             :obj:`bool`: return `True` if the event queue is empty
         """
-        return not self.event_heap
+        return not self.len()
 
     def next_event_time(self):
         """ Get the time of the next event
@@ -120,12 +530,10 @@ class EventQueue(object):
         Returns:
             :obj:`float`: the time of the next event; return infinity if no event is scheduled
         """
-        if not self.event_heap:
+        next_entry = self._peek_entry()
+        if next_entry is None:
             return float('inf')
-
-        next_event = self.event_heap[0]
-        next_event_time = next_event.event_time
-        return next_event_time
+        return next_entry[0]
 
     def next_event_obj(self):
         """ Get the simulation object that receives the next event
@@ -134,11 +542,10 @@ class EventQueue(object):
             :obj:`SimulationObject`): the simulation object that will execute the next event, or `None`
                 if no event is scheduled
         """
-        if not self.event_heap:
+        next_entry = self._peek_entry()
+        if next_entry is None:
             return None
-
-        next_event = self.event_heap[0]
-        return next_event.receiving_object
+        return next_entry[-1].receiving_object
 
     def next_events(self):
         """ Get all events at the smallest event time destined for the object whose name sorts earliest
@@ -150,33 +557,49 @@ class EventQueue(object):
         with the same event_time (aka receive_time), pass them all to the object in a list.
 
         Returns:
-            :obj:`list` of :obj:`Event`: the earliest event(s), sorted by message type priority. If no
-                events are available the list is empty.
+            :obj:`list` of :obj:`Event`: the earliest event(s), sorted by message type priority, and
+                within priority by message content or, if `break_ties_by_send_order` is set, by the order
+                in which they were scheduled. If no events are available the list is empty.
         """
-        if not self.event_heap:
+        backend = self.backend
+        next_entry = self._peek_entry()
+        if next_entry is None:
             return []
 
-        events = []
-        next_event = heapq.heappop(self.event_heap)
+        # remove each event from its entry as it's popped, which makes its handle inactive
+        backend.pop()
+        next_event = next_entry[-1]
+        next_entry[-1] = None
         now = next_event.event_time
         receiving_obj = next_event.receiving_object
-        events.append(next_event)
+        events = [next_event]
 
         # gather all events with the same event_time and receiving_object
-        while (self.event_heap and now == self.next_event_time() and
-               receiving_obj == self.next_event_obj()):
-            events.append(heapq.heappop(self.event_heap))
+        next_entry = self._peek_entry()
+        while (next_entry is not None and now == next_entry[0] and
+               receiving_obj == next_entry[-1].receiving_object):
+            backend.pop()
+            events.append(next_entry[-1])
+            next_entry[-1] = None
+            next_entry = self._peek_entry()
 
         if 1 < len(events):
             # sort events by message type priority, and within priority by message content
             # thus, a sim object handles simultaneous messages in priority order;
             # this costs O(n log(n)) in the number of event messages in events
             receiver_priority_dict = receiving_obj.get_receiving_priorities_dict()
-            events = sorted(events,
-                            key=lambda event: (receiver_priority_dict[event.message.__class__], event.message))
-
-        for event in events:
-            self.log_event(event)
+            if self.break_ties_by_send_order:
+                # events were popped in the order in which they were scheduled, and the sort is
+                # stable, so sorting by priority alone orders events with equal priorities by
+                # their sequence numbers, without comparing messages
+                events.sort(key=lambda event: receiver_priority_dict[event.message.__class__])
+            else:
+                events = sorted(events,
+                                key=lambda event: (receiver_priority_dict[event.message.__class__], event.message))
+
+        if self.fast_debug_file_logger.active:
+            for event in events:
+                self.log_event(event)
 
         return events
 
@@ -212,19 +635,21 @@ class EventQueue(object):
             :obj:`str`: String representation of the values of an `EventQueue`, or a :obj:`list`
                 representation if `as_list` is set
         """
-        event_heap = self.event_heap
-        if sim_obj is not None:
-            event_heap = list(filter(lambda event: event.receiving_object == sim_obj, event_heap))
+        if sim_obj is None:
+            entries = self.backend.entries()
+        else:
+            entries = self.backend.object_entries(sim_obj)
+        events = [entry[-1] for entry in entries if entry[-1] is not None]
 
-        if not event_heap:
+        if not events:
             return None
 
         # Sort the events in non-decreasing event time (receive_time, receiving_object.name)
-        sorted_events = sorted(event_heap)
+        sorted_events = sorted(events)
 
         # Does the queue contain multiple message types?
         message_types = set()
-        for event in event_heap:
+        for event in events:
             message_types.add(event.message.__class__)
             if 1 < len(message_types):
                 break
@@ -262,6 +687,23 @@ class EventQueue(object):
         return rv
 
 
+def batch_event_handler(handler):
+    """ Decorate an event handler so that it handles all simultaneous events of its message type in one call
+
+    A batch handler is called with a :obj:`list` of the events of its message type that an object
+    receives at one time, rather than with each event, so it pays call overhead once and can
+    vectorize its work. Handlers are still called in the priority order of their message types.
+
+    Args:
+        handler (:obj:`function`): an event handler method
+
+    Returns:
+        :obj:`function`: `handler`, marked as a batch handler
+    """
+    handler.handles_event_batches = True
+    return handler
+
+
 class SimulationObject(object):
     """ Base class for simulation objects.
 
@@ -273,15 +715,27 @@ class SimulationObject(object):
         name (:obj:`str`): this simulation object's name, which is unique across all simulation objects
             handled by a `SimulationEngine`
         time (:obj:`float`): this simulation object's current simulation time
+        object_id (:obj:`int`): this simulation object's index in its `SimulationEngine`'s table of objects,
+            which can address it in place of the object in `send_event()`; `None` until it is added to a
+            `SimulationEngine`
         event_time_tiebreaker (:obj:`str`): the least significant component of an object's 'sub-tme'
             priority, which orders simultaneous events received by different instances of the same
             `ApplicationSimulationObject`
+        event_rank (:obj:`int`): orders this object's `(class_event_priority, event_time_tiebreaker)` among
+            those of the objects ranked by an `EventQueue`, so that simultaneous events are ordered with an
+            integer comparison; `None` until the object is ranked
+        RETAINS_EVENTS (:obj:`bool`): whether this object's handlers keep references to the events they
+            handle; if not set, events are recycled after they are handled
         num_events (:obj:`int`): number of events processed
         simulator (:obj:`int`): the `SimulationEngine` that uses this `SimulationObject`
         debug_logs (:obj:`wc_utils.debug_logs.core.DebugLogsManager`): the debug logs
     """
     LOG_EVENTS = config['de_sim']['log_events']
 
+    # set in subclasses whose event handlers keep references to the events they handle, so that
+    # their events are not recycled
+    RETAINS_EVENTS = False
+
     def __init__(self, name, start_time=0, **kwargs):
         """ Initialize a SimulationObject.
 
@@ -299,6 +753,11 @@ class SimulationObject(object):
         self.time = start_time
         self.num_events = 0
         self.simulator = None
+        self.object_id = None
+        self.event_rank = None
+        # set by `SimulationEngine.compile()`; `None` offsets make sends use the registration checks
+        self._send_permissions_offset = self._receive_permissions_offset = None
+        self._event_handlers = None
         if 'event_time_tiebreaker' in kwargs and kwargs['event_time_tiebreaker']:
             self.event_time_tiebreaker = kwargs['event_time_tiebreaker']
         else:
@@ -328,31 +787,118 @@ class SimulationObject(object):
         # TODO(Arthur): is this an operation that makes sense to support? if not, remove it; if yes,
         # remove all of this object's state from simulator, and test it properly
         self.simulator = None
+        self.object_id = None
+        self._send_permissions_offset = self._receive_permissions_offset = None
+        self._event_handlers = None
 
     def send_event_absolute(self, event_time, receiving_object, message, copy=False):
         """ Send a simulation event message with an absolute event time.
 
         Args:
             event_time (:obj:`float`): the absolute simulation time at which `receiving_object` will execute the event
-            receiving_object (:obj:`SimulationObject`): the simulation object that will receive and
-                execute the event
+            receiving_object (:obj:`SimulationObject` or :obj:`int`): the simulation object that will
+                receive and execute the event, or its `object_id`
             message (:obj:`SimulationMessage`): the simulation message which will be carried by the event
             copy (:obj:`bool`, optional): if `True`, copy the message before adding it to the event;
                 set `False` by default to optimize performance; set `True` as a safety measure to avoid
                 unexpected changes to shared objects
 
+        Unless every event is checked, as configured by the `validation` of the simulation that's
+        running, the event may be sent without checks.
+
+        Returns:
+            :obj:`EventHandle`: a handle that can cancel or reschedule the event
+
         Raises:
             :obj:`SimulatorError`: if `event_time` < 0, or
                 if the sending object type is not registered to send messages with the type of `message`, or
                 if the receiving simulation object type is not registered to receive
-                messages with the type of `message`
+                messages with the type of `message`, or
+                if `receiving_object` is an id that no simulation object has
         """
+        simulator = self.simulator
+        if simulator is not None and simulator.sends_until_check:
+            simulator.sends_until_check -= 1
+            return self._send_event_unchecked(event_time, receiving_object, message, copy)
+
         if math.isnan(event_time):
             raise SimulatorError("event_time is 'NaN'")
         if event_time < self.time:
             raise SimulatorError("event_time ({}) < current time ({}) in send_event_absolute()".format(
                 round_direct(event_time, precision=3), round_direct(self.time, precision=3)))
+        if not isinstance(receiving_object, SimulationObject):
+            receiving_object = simulator.get_object_by_id(receiving_object)
+
+        # these checks subsume EventQueue._check_event()
+        if not self._send_permitted(receiving_object, message):
+            self._check_message_route(receiving_object, message)
+        simulator.sends_until_check = simulator.send_check_interval - 1
+        return self._send_event_unchecked(event_time, receiving_object, message, copy)
 
+    def _send_event_unchecked(self, event_time, receiving_object, message, copy):
+        """ Send a simulation event message that's trusted to be valid, with an absolute event time
+
+        Args:
+            event_time (:obj:`float`): the absolute simulation time at which `receiving_object` will execute the event
+            receiving_object (:obj:`SimulationObject` or :obj:`int`): the simulation object that will
+                receive and execute the event, or its `object_id`
+            message (:obj:`SimulationMessage`): the simulation message which will be carried by the event
+            copy (:obj:`bool`): if `True`, copy the message before adding it to the event
+
+        Returns:
+            :obj:`EventHandle`: a handle that can cancel or reschedule the event
+        """
+        if not isinstance(receiving_object, SimulationObject):
+            receiving_object = self.simulator.get_object_by_id(receiving_object)
+        if copy:
+            message = deepcopy(message)
+
+        event_handle = self.simulator.event_queue._insert_event(self.time, event_time, self,
+                                                                receiving_object, message)
+        if self.fast_debug_file_logger.active:
+            self.log_with_time("Send: ({}, {:6.2f}) -> ({}, {:6.2f}): {}", self.name, self.time,
+                               receiving_object.name, event_time, message.__class__.__name__)
+        return event_handle
+
+    def _send_permitted(self, receiving_object, message):
+        """ Look up whether the permissions compiled by `SimulationEngine.compile()` permit a send
+
+        Args:
+            receiving_object (:obj:`SimulationObject`): the simulation object that will receive `message`
+            message (:obj:`SimulationMessage`): a simulation message
+
+        Returns:
+            :obj:`bool`: `True` if the compiled permissions permit sending `message` to `receiving_object`;
+                `False` if they do not, or do not cover the send, in which case it must be checked by
+                `_check_message_route()`
+        """
+        simulator = self.simulator
+        try:
+            # a message class, rather than an instance, has no `_message_type_id` in its type
+            message_type_id = message.__class__._message_type_id
+            if (simulator.num_compiled_message_types <= message_type_id or
+                    receiving_object.simulator is not simulator):
+                return False
+            # uncompiled objects have `None` offsets, which raise a TypeError
+            return bool(simulator.send_permissions[self._send_permissions_offset +
+                                                   receiving_object._receive_permissions_offset +
+                                                   message_type_id])
+        except (AttributeError, TypeError):
+            return False
+
+    def _check_message_route(self, receiving_object, message):
+        """ Check that this object can send `message` to `receiving_object`
+
+        Args:
+            receiving_object (:obj:`SimulationObject`): the simulation object that will receive `message`
+            message (:obj:`SimulationMessage`): a simulation message
+
+        Raises:
+            :obj:`SimulatorError`: if `message` is not a `SimulationMessage`, or
+                if the sending object type is not registered to send messages with the type of `message`, or
+                if the receiving simulation object type is not registered to receive
+                messages with the type of `message`
+        """
         # Do not put a class reference in a message, as the message might not be received in the
         # same address space.
         # To eliminate the risk of name collisions use the fully qualified classname.
@@ -374,38 +920,125 @@ class SimulationObject(object):
             raise SimulatorError("'{}' simulation objects not registered to receive '{}' messages".format(
                 most_qual_cls_name(receiving_object), event_type_name))
 
-        if copy:
-            message = deepcopy(message)
+    def send_events(self, events, copy=False):
+        """ Send multiple simulation event messages, specifying their event times as delays
+
+        Each event is checked with the permissions compiled by `SimulationEngine.compile()`, falling back
+        to the objects' registrations for sends that they do not cover, and the events are inserted into
+        the event queue together.
 
-        self.simulator.event_queue.schedule_event(self.time, event_time, self,
-                                                  receiving_object, message)
-        self.log_with_time("Send: ({}, {:6.2f}) -> ({}, {:6.2f}): {}".format(self.name, self.time,
-                                                                             receiving_object.name, event_time,
-                                                                             message.__class__.__name__))
+        Args:
+            events (:obj:`iterable` of :obj:`tuple`): `(delay, receiving_object, message)` tuples, with
+                the arguments of `send_event()`; `receiving_object` may be an `object_id`
+            copy (:obj:`bool`, optional): if `True`, copy each message before adding it to its event
+
+        Returns:
+            :obj:`list` of :obj:`EventHandle`: handles for the events, in the order of `events`
+
+        Raises:
+            :obj:`SimulatorError`: if any event is invalid, as in `send_event()`; then no events are sent
+        """
+        send_permitted = self._send_permitted
+        get_object_by_id = self.simulator.get_object_by_id
+        now = self.time
+        scheduled_events = []
+        for delay, receiving_object, message in events:
+            if math.isnan(delay):
+                raise SimulatorError("delay is 'NaN'")
+            if delay < 0:
+                raise SimulatorError("delay < 0 in send_events(): {}".format(str(delay)))
+            if not isinstance(receiving_object, SimulationObject):
+                receiving_object = get_object_by_id(receiving_object)
+            if not send_permitted(receiving_object, message):
+                self._check_message_route(receiving_object, message)
+            if copy:
+                message = deepcopy(message)
+            scheduled_events.append((now, now + delay, self, receiving_object, message))
+
+        # the events' times and messages have been checked
+        event_handles = self.simulator.event_queue._insert_events(scheduled_events)
+        if self.fast_debug_file_logger.active:
+            for _, event_time, _, receiving_object, message in scheduled_events:
+                self.log_with_time("Send: ({}, {:6.2f}) -> ({}, {:6.2f}): {}", self.name, now,
+                                   receiving_object.name, event_time, message.__class__.__name__)
+        return event_handles
 
     def send_event(self, delay, receiving_object, message, copy=False):
         """ Send a simulation event message, specifing the event time as a delay.
 
         Args:
             delay (:obj:`float`): the simulation delay at which `receiving_object` should execute the event
-            receiving_object (:obj:`SimulationObject`): the simulation object that will receive and
-                execute the event
+            receiving_object (:obj:`SimulationObject` or :obj:`int`): the simulation object that will
+                receive and execute the event, or its `object_id`
             message (:obj:`SimulationMessage`): the simulation message which will be carried by the event
             copy (:obj:`bool`, optional): if `True`, copy the message before adding it to the event;
                 set `False` by default to optimize performance; set `True` as a safety measure to avoid
                 unexpected changes to shared objects
 
+        Returns:
+            :obj:`EventHandle`: a handle that can cancel or reschedule the event
+
         Raises:
             :obj:`SimulatorError`: if `delay` < 0 or `delay` is NaN, or
                 if the sending object type is not registered to send messages with the type of `message`, or
                 if the receiving simulation object type is not registered to receive messages with
-                the type of `message`
+                the type of `message`, or
+                if `receiving_object` is an id that no simulation object has
         """
+        simulator = self.simulator
+        if simulator is not None and simulator.sends_until_check:
+            simulator.sends_until_check -= 1
+            return self._send_event_unchecked(delay + self.time, receiving_object, message, copy)
         if math.isnan(delay):
             raise SimulatorError("delay is 'NaN'")
         if delay < 0:
             raise SimulatorError("delay < 0 in send_event(): {}".format(str(delay)))
-        self.send_event_absolute(delay + self.time, receiving_object, message, copy=copy)
+        return self.send_event_absolute(delay + self.time, receiving_object, message, copy=copy)
+
+    def reschedule_event_absolute(self, event_handle, event_time):
+        """ Move an event sent by this object to a new, absolute event time
+
+        The event is reused, rather than cancelled and sent again.
+
+        Args:
+            event_handle (:obj:`EventHandle`): the handle of an event sent by this object
+            event_time (:obj:`float`): the absolute simulation time at which the event will execute
+
+        Raises:
+            :obj:`SimulatorError`: if the event was not sent by this object, or
+                if `event_time` < the current time or `event_time` is NaN, or
+                if the event has been executed or cancelled
+        """
+        # an executed event may have been recycled, so its handle's event may describe another event
+        if not event_handle.pending:
+            raise SimulatorError("cannot reschedule an event that has been executed or cancelled")
+        if event_handle.event.sending_object is not self:
+            raise SimulatorError("'{}' cannot reschedule an event sent by '{}'".format(
+                self.name, event_handle.event.sending_object.name))
+        if math.isnan(event_time):
+            raise SimulatorError("event_time is 'NaN'")
+        if event_time < self.time:
+            raise SimulatorError("event_time ({}) < current time ({}) in reschedule_event_absolute()".format(
+                round_direct(event_time, precision=3), round_direct(self.time, precision=3)))
+        self.simulator.event_queue.reschedule(event_handle, event_time)
+
+    def reschedule_event(self, event_handle, delay):
+        """ Move an event sent by this object to a new event time, specified as a delay
+
+        Args:
+            event_handle (:obj:`EventHandle`): the handle of an event sent by this object
+            delay (:obj:`float`): the delay from the current time at which the event will execute
+
+        Raises:
+            :obj:`SimulatorError`: if `delay` < 0 or `delay` is NaN, or
+                if the event was not sent by this object, or
+                if the event has been executed or cancelled
+        """
+        if math.isnan(delay):
+            raise SimulatorError("delay is 'NaN'")
+        if delay < 0:
+            raise SimulatorError("delay < 0 in reschedule_event(): {}".format(str(delay)))
+        self.reschedule_event_absolute(event_handle, delay + self.time)
 
     @staticmethod
     def register_handlers(subclass, handlers):
@@ -424,7 +1057,8 @@ class SimulationObject(object):
                 handle them
             handlers (:obj:`list` of (`SimulationMessage`, `function`)): a list of tuples, indicating
                 which method should handle which type of `SimulationMessage` in `subclass`; ordered in
-                decreasing priority for handling simulation message types
+                decreasing priority for handling simulation message types; methods decorated by
+                `batch_event_handler` handle lists of simultaneous events
 
         Raises:
             :obj:`SimulatorError`: if a `SimulationMessage` appears repeatedly in `handlers`, or
@@ -437,6 +1071,8 @@ class SimulationObject(object):
             if not callable(handler):
                 raise SimulatorError("handler '{}' must be callable".format(handler))
             subclass.metadata.event_handlers_dict[message_type] = handler
+            if getattr(handler, 'handles_event_batches', False):
+                subclass.metadata.batch_message_types.add(message_type)
 
         for index, (message_type, _) in enumerate(handlers):
             subclass.metadata.event_handler_priorities[message_type] = index
@@ -481,22 +1117,69 @@ class SimulationObject(object):
         """
         self.num_events += 1
 
-        if self.LOG_EVENTS:
+        if self.LOG_EVENTS and self.fast_plot_file_logger.active:
             # write events to a plot log
             # plot logging is controlled by configuration files pointed to by config_constants and by env vars
             for event in event_list:
                 self.fast_plot_file_logger.fast_log(str(event), sim_time=self.time)
 
+        if self.__class__.metadata.batch_message_types:
+            self._handle_event_batches(event_list)
+            return
+
         # iterate through event_list, branching to handler
+        event_handlers = self._event_handlers
         for event in event_list:
+            message = event.message
+            try:
+                handler = event_handlers[message._message_type_id]
+            except (TypeError, IndexError):
+                # not compiled, or the message type was defined after compilation
+                handler = None
+            if handler is None:
+                try:
+                    handler = self.__class__.metadata.event_handlers_dict[message.__class__]
+                except KeyError:  # pragma: no cover
+                    # unreachable because of check that receiving sim
+                    # obj type is registered to receive the message type
+                    raise SimulatorError("No handler registered for Simulation message type: '{}'".format(
+                        message.__class__.__name__))
+            handler(self, event)
+
+    def _handle_event_batches(self, event_list):
+        """ Handle a list of simultaneous events, passing the events of each batch message type to one call
+
+        Events of one message type are adjacent in `event_list`, because they are sorted by message type
+        priority.
+
+        Args:
+            event_list (:obj:`list` of :obj:`Event`): the `Event` message(s) in the simulation event
+
+        Raises:
+            :obj:`SimulatorError`: if a message in `event_list` has an invalid type
+        """
+        metadata = self.__class__.metadata
+        batch_message_types = metadata.batch_message_types
+        num_events = len(event_list)
+        start = 0
+        while start < num_events:
+            message_type = event_list[start].message.__class__
             try:
-                handler = self.__class__.metadata.event_handlers_dict[event.message.__class__]
-                handler(self, event)
+                handler = metadata.event_handlers_dict[message_type]
             except KeyError:  # pragma: no cover
                 # unreachable because of check that receiving sim
                 # obj type is registered to receive the message type
                 raise SimulatorError("No handler registered for Simulation message type: '{}'".format(
-                    event.message.__class__.__name__))
+                    message_type.__name__))
+            if message_type in batch_message_types:
+                end = start + 1
+                while end < num_events and event_list[end].message.__class__ is message_type:
+                    end += 1
+                handler(self, event_list[start:end] if start or end < num_events else event_list)
+                start = end
+            else:
+                handler(self, event_list[start])
+                start += 1
 
     @property
     def class_event_priority(self):
@@ -508,17 +1191,22 @@ class SimulationObject(object):
         return self.__class__.metadata.class_priority
 
     def render_event_queue(self):
-        """ Format an event queue as a string
+        """ Format the events that this object will receive as a string
 
         Returns:
-            :obj:`str`: return a string representation of the simulator's event queue
+            :obj:`str`: return a string representation of the events in the simulator's event queue
+                that this object will receive
         """
-        return self.simulator.event_queue.render()
+        return self.simulator.event_queue.render(sim_obj=self)
 
-    def log_with_time(self, msg):
+    def log_with_time(self, msg, *args):
         """ Write a debug log message with the simulation time.
+
+        Args:
+            msg (:obj:`str`): the log message, or a format string for `args`
+            args (:obj:`list`): arguments to format into `msg`, only if the debug log is active
         """
-        self.fast_debug_file_logger.fast_log(msg, sim_time=self.time)
+        self.fast_debug_file_logger.fast_log(msg, *args, sim_time=self.time)
 
 
 class ApplicationSimulationObjectInterface(object, metaclass=ABCMeta):  # pragma: no cover
@@ -578,11 +1266,16 @@ class ApplicationSimulationObjectMetadata(object):
             priority is 0, and priority decreases with increasing priority values.
         message_types_sent (:obj:`set`): the types of messages a subclass of `SimulationObject` has
             registered to send
+        batch_message_types (:obj:`set`): the message types whose event handlers are batch handlers
+        class_event_handler (:obj:`method`): a class method that handles the simultaneous events of all
+            instances of a subclass of `SimulationObject` together, or `None`
     """
 
     def __init__(self):
         self.event_handlers_dict = {}
         self.event_handler_priorities = {}
+        self.batch_message_types = set()
+        self.class_event_handler = None
         self.message_types_sent = set()
         self.class_priority = SimObjClassPriority.LOW
 
@@ -594,6 +1287,8 @@ class ApplicationSimulationObjMeta(type):
     MESSAGES_SENT = 'messages_sent'
     # keyword for a class' 'subtime' priority, used to order concurrent events among classes
     CLASS_PRIORITY = 'class_priority'
+    # keyword for the name of a class method that handles the simultaneous events of all instances
+    CLASS_EVENT_HANDLER = 'class_event_handler'
 
     def __new__(cls, clsname, superclasses, namespace):
         """
@@ -613,7 +1308,8 @@ class ApplicationSimulationObjMeta(type):
                     :obj:`ApplicationSimulationObject`,
                 or if `event_handlers` isn't an iterator over pairs,
                 or if a message type sent isn't a subclass of SimulationMessage,
-                or if `messages_sent` isn't an iterator over pairs.
+                or if `messages_sent` isn't an iterator over pairs,
+                or if `class_event_handler` doesn't name a method of the :obj:`ApplicationSimulationObject`.
         """
         # Short circuit when ApplicationSimulationObject is defined
         if clsname == 'ApplicationSimulationObject':
@@ -674,6 +1370,18 @@ class ApplicationSimulationObjMeta(type):
         if class_priority is not None:
             setattr(new_application_simulation_obj_subclass.metadata, CLASS_PRIORITY, class_priority)
 
+        # a class event handler is named by a class attribute, so it is inherited like one
+        class_event_handler_name = getattr(new_application_simulation_obj_subclass, cls.CLASS_EVENT_HANDLER, None)
+        if class_event_handler_name is not None:
+            class_event_handler = None
+            if isinstance(class_event_handler_name, str):
+                class_event_handler = getattr(new_application_simulation_obj_subclass, class_event_handler_name,
+                                              None)
+            if not callable(class_event_handler):
+                raise SimulatorError("ApplicationSimulationObject '{}' definition must define a class method "
+                                     "'{}'.".format(clsname, class_event_handler_name))
+            new_application_simulation_obj_subclass.metadata.class_event_handler = class_event_handler
+
         # either messages_sent or event_handlers must contain values
         if (not event_handlers and not messages_sent):
             raise SimulatorError("ApplicationSimulationObject '{}' definition must inherit or provide a "
@@ -740,10 +1448,28 @@ class ApplicationSimulationObject(SimulationObject, ApplicationSimulationObjectI
                                   metaclass=AppSimObjAndABCMeta):
     """ Base class for all simulation objects in a simulation
 
+    A subclass may set `class_event_handler` to the name of a class method
+    `handler(cls, objects, event_lists)`. Then, at each simulation time, the simulation engine passes the
+    simultaneous events of consecutive instances of the subclass to one call of the class method, rather than
+    handling each instance's events separately. `objects` lists the instances in the order in which their
+    events would have been dispatched, and `event_lists` the lists of events that each object would have
+    received. The method must produce the same results as handling each object's events in turn, and must
+    not schedule events for the current time to any of the `objects`, or to objects ordered before them.
+    `event_handlers` still registers the message types that the subclass receives, and their priorities.
+
     Attributes:
         metadata (:obj:`ApplicationSimulationObjectMetadata`): metadata for event message sending and handling,
             initialized by `AppSimObjAndABCMeta`
+        class_event_handler (:obj:`str`): the name of a class method that handles the simultaneous events of
+            many instances, or `None`
     """
+    class_event_handler = None
+
+    # attributes that `save_state()` doesn't save, because they're managed by the simulation engine
+    UNSAVED_ATTRIBUTES = frozenset(['name', 'time', 'num_events', 'simulator', 'object_id', 'event_rank',
+                                    '_send_permissions_offset', '_receive_permissions_offset', '_event_handlers',
+                                    'event_time_tiebreaker', 'debug_logs', 'fast_debug_file_logger',
+                                    'fast_plot_file_logger'])
 
     def send_initial_events(self, *args):
         pass  # pragma: no cover
@@ -751,6 +1477,39 @@ class ApplicationSimulationObject(SimulationObject, ApplicationSimulationObjectI
     def get_state(self):
         pass  # pragma: no cover
 
+    def save_state(self):
+        """ Save this object's state, so that `restore_state()` can return the object to it
+
+        Optimistic parallel simulation saves the state of an object before it executes an event, and restores
+        the state if the event is rolled back. The default deep copies the object's attributes, other than those
+        in `UNSAVED_ATTRIBUTES`. References to the simulation engine, to its simulation objects, and to
+        :obj:`EventHandle` objects are shared by the saved state rather than copied. Subclasses whose
+        attributes can't be deep copied, or that can save their state more cheaply, should override
+        `save_state()` and `restore_state()`.
+
+        Returns:
+            :obj:`object`: the saved state
+        """
+        unsaved_attributes = self.UNSAVED_ATTRIBUTES
+        memo = {}
+        simulator = self.simulator
+        if simulator is not None:
+            memo[id(simulator)] = simulator
+            for sim_obj in simulator.simulation_objects.values():
+                memo[id(sim_obj)] = sim_obj
+        return deepcopy({attr: value for attr, value in self.__dict__.items() if attr not in unsaved_attributes},
+                        memo)
+
+    def restore_state(self, state):
+        """ Restore a state saved by `save_state()`
+
+        A saved state is restored at most once.
+
+        Args:
+            state (:obj:`object`): a state saved by `save_state()`
+        """
+        self.__dict__.update(state)
+
     @classmethod
     def set_class_priority(cls, priority):
         """ Set the execution priority for simulation object classes, `class_priority`
@@ -6,9 +6,13 @@
 :License: MIT
 """
 
+import math
+import numpy
+
 from de_sim.simulation_message import SimulationMessage
-from de_sim.simulation_object import ApplicationSimulationObject
+from de_sim.simulation_object import ApplicationSimulationObject, batch_event_handler
 from de_sim.errors import SimulatorError
+from de_sim.utilities import IndexedPriorityQueue
 
 
 class NextEvent(SimulationMessage):
@@ -23,10 +27,17 @@ class TemplatePeriodicSimulationObject(ApplicationSimulationObject):
     To minimize roundoff errors in event times track the number of periods, and multiply by period
     to determine event times.
 
+    If the simulation's `coalesce_periodic_events` is set the object registers with the simulation's
+    :obj:`PeriodicScheduler`, which executes the events of all periodic objects with the same start time
+    and period from one event, rather than scheduling its own :obj:`NextEvent` events. Then it executes at
+    the scheduler's position among simultaneous events, rather than its own.
+
     Attributes:
         period (:obj:`float`): interval between events, in simulated time units
         num_periods (:obj:`int`): number of periods executed
         start_time (:obj:`float`, optional): the time of the first periodic event
+        periodic_scheduler (:obj:`PeriodicScheduler`): the periodic scheduler with which this object is
+            registered, or `None` if it schedules its own events
     """
 
     def __init__(self, name, period, start_time=0.):
@@ -35,8 +46,21 @@ class TemplatePeriodicSimulationObject(ApplicationSimulationObject):
         self.period = period
         self.start_time = start_time
         self.num_periods = 0
+        self.periodic_scheduler = None
         super().__init__(name, start_time=start_time)
 
+    def add(self, simulator):
+        super().add(simulator)
+        # the scheduler must be added before the simulation is initialized
+        if simulator.coalesce_periodic_events:
+            simulator.get_periodic_scheduler()
+
+    def delete(self):
+        if self.periodic_scheduler is not None and self.periodic_scheduler.simulator is not None:
+            self.periodic_scheduler.unregister(self)
+        self.periodic_scheduler = None
+        super().delete()
+
     def schedule_next_event(self):
         """ Schedule the next event in `self.period` simulated time units
         """
@@ -52,8 +76,12 @@ class TemplatePeriodicSimulationObject(ApplicationSimulationObject):
         pass    # pragma: no cover     # must be overridden
 
     def send_initial_events(self):
-        # create the initial event
-        self.schedule_next_event()
+        # register with the periodic scheduler, or create the initial event
+        if self.simulator.coalesce_periodic_events:
+            self.periodic_scheduler = self.simulator.get_periodic_scheduler()
+            self.periodic_scheduler.register(self)
+        else:
+            self.schedule_next_event()
 
     def handle_simulation_event(self, event):
         self.handle_event()
@@ -66,3 +94,623 @@ class TemplatePeriodicSimulationObject(ApplicationSimulationObject):
 
     # register the message type sent
     messages_sent = [NextEvent]
+
+
+class NextAgentEvents(SimulationMessage):
+    "Execute the earliest scheduled events of a population's agents"
+
+
+class AgentEvent(SimulationMessage):
+    "An event for one agent in a population"
+    attributes = ['agent']
+
+
+class PopulationSimulationObject(ApplicationSimulationObject):
+    """ Template ApplicationSimulationObject that simulates a population of agents
+
+    Rather than one simulation object per agent, a population stores the state of all its agents in
+    a NumPy structured array, `agents`, with one record per agent. Each agent may have one scheduled
+    event, whose time is stored in an indexed priority queue. The population keeps one simulation
+    event scheduled at the time of its agents' earliest event. When that event executes, all agents
+    whose events are scheduled at that time are passed to `handle_agent_events()` together.
+
+    Other simulation objects address an agent by sending the population an :obj:`AgentEvent` that
+    contains the agent's index. Simultaneous :obj:`AgentEvent` messages are passed to
+    `handle_agent_messages()` together.
+
+    Derived classes must override `handle_agent_events()`, and usually schedule their agents' first
+    events in `send_initial_events()`, drawing the times of many agents at once with `schedule_agents()`.
+
+    Attributes:
+        agents (:obj:`numpy.ndarray`): a structured array of the agents' states
+        agent_event_times (:obj:`IndexedPriorityQueue`): the time of each agent's scheduled event, or
+            infinity if it has none
+        next_event_handle (:obj:`EventHandle`): the handle of the population's next :obj:`NextAgentEvents`
+            event, or `None`
+        executing_agents (:obj:`set`): while `handle_agent_events()` handles the agents whose events are
+            scheduled at the current time, those that haven't been rescheduled; otherwise `None`
+    """
+
+    def __init__(self, name, num_agents, agent_dtype, start_time=0):
+        """
+        Args:
+            name (:obj:`str`): the population's name
+            num_agents (:obj:`int`): the number of agents
+            agent_dtype (:obj:`numpy.dtype`): the NumPy data type of an agent's state
+            start_time (:obj:`float`, optional): the earliest time at which this population can execute an event
+        """
+        self.agents = numpy.zeros(num_agents, dtype=agent_dtype)
+        self.agent_event_times = IndexedPriorityQueue([math.inf] * num_agents)
+        self.next_event_handle = None
+        self.executing_agents = None
+        super().__init__(name, start_time=start_time)
+
+    @property
+    def num_agents(self):
+        """ Get the number of agents
+
+        Returns:
+            :obj:`int`: the number of agents
+        """
+        return len(self.agents)
+
+    def schedule_agent(self, agent, event_time):
+        """ Schedule an agent's event, replacing any event that the agent has scheduled
+
+        Args:
+            agent (:obj:`int`): the agent's index
+            event_time (:obj:`float`): the time of the agent's event; infinity cancels the agent's event
+
+        Raises:
+            :obj:`SimulatorError`: if `event_time` is NaN or earlier than the current time
+        """
+        if math.isnan(event_time) or event_time < self.time:
+            raise SimulatorError("agent event time ({}) must not be NaN or earlier than the current time "
+                                 "({})".format(event_time, self.time))
+        self.agent_event_times.update(agent, event_time)
+        if self.executing_agents:
+            self.executing_agents.discard(agent)
+        self._schedule_next_event()
+
+    def schedule_agents(self, agents, event_times):
+        """ Schedule the events of many agents, replacing any events that they have scheduled
+
+        Args:
+            agents (:obj:`numpy.ndarray`): the agents' indices
+            event_times (:obj:`numpy.ndarray`): the times of the agents' events; infinity cancels an
+                agent's event
+
+        Raises:
+            :obj:`SimulatorError`: if an event time is NaN or earlier than the current time
+        """
+        event_times = numpy.asarray(event_times, dtype=float)
+        if event_times.size and (numpy.isnan(event_times).any() or event_times.min() < self.time):
+            raise SimulatorError("agent event times must not be NaN or earlier than the current time "
+                                 "({})".format(self.time))
+        self.agent_event_times.update_many(agents, event_times)
+        if self.executing_agents:
+            self.executing_agents.difference_update(numpy.asarray(agents).tolist())
+        self._schedule_next_event()
+
+    def _schedule_next_event(self):
+        """ Schedule, move or cancel the population's next event, so it occurs at its agents' earliest event
+
+        While agents' events are being handled the next event is scheduled once, after they have been handled.
+        """
+        if self.simulator is None or not self.num_agents or self.executing_agents is not None:
+            return
+        next_event_time, _ = self.agent_event_times.peek()
+        handle = self.next_event_handle
+        if handle is not None and handle.pending:
+            if handle.event.event_time == next_event_time:
+                return
+            if next_event_time == math.inf:
+                handle.cancel()
+                self.next_event_handle = None
+            else:
+                self.reschedule_event_absolute(handle, next_event_time)
+        elif next_event_time < math.inf:
+            self.next_event_handle = self.send_event_absolute(next_event_time, self, NextAgentEvents())
+
+    def send_initial_events(self):
+        # schedule the event for the agents' earliest event
+        self._schedule_next_event()
+
+    def handle_next_agent_events(self, event):
+        """ Handle the events of all agents whose events are scheduled at the current time
+
+        Args:
+            event (:obj:`Event`): simulation event; not used
+        """
+        # the agents whose events are scheduled now are a subtree at the root of the heap; they stay in
+        # the heap while they're handled, so an agent that is rescheduled is moved only once
+        agent_event_times = self.agent_event_times
+        heap = agent_event_times.heap
+        priorities = agent_event_times.priorities
+        agents = []
+        positions = [0]
+        while positions:
+            position = positions.pop()
+            if position < len(heap) and priorities[heap[position]] == self.time:
+                agents.append(heap[position])
+                positions.extend((2 * position + 1, 2 * position + 2))
+        agents.sort()
+        self.executing_agents = set(agents)
+        try:
+            self.handle_agent_events(numpy.array(agents, dtype=int))
+            # agents that weren't rescheduled have no scheduled event
+            for agent in self.executing_agents:
+                agent_event_times.update(agent, math.inf)
+        finally:
+            self.executing_agents = None
+        self._schedule_next_event()
+
+    @batch_event_handler
+    def handle_agent_event_messages(self, events):
+        """ Handle simultaneous :obj:`AgentEvent` messages sent to this population
+
+        Args:
+            events (:obj:`list` of :obj:`Event`): the events
+        """
+        agents = numpy.array([event.message.agent for event in events], dtype=int)
+        self.handle_agent_messages(agents, [event.message for event in events])
+
+    def handle_agent_events(self, agents):
+        """ Handle the events of agents, which are scheduled at the current time
+
+        Derived classes must override this method and actually handle the events
+
+        Args:
+            agents (:obj:`numpy.ndarray`): the indices of the agents
+        """
+        pass    # pragma: no cover     # must be overridden
+
+    def handle_agent_messages(self, agents, messages):
+        """ Handle :obj:`AgentEvent` messages sent to agents by other simulation objects
+
+        By default, the agents are handled like agents whose events are scheduled at the current time.
+
+        Args:
+            agents (:obj:`numpy.ndarray`): the indices of the agents to which the messages are addressed
+            messages (:obj:`list` of :obj:`AgentEvent`): the messages
+        """
+        self.handle_agent_events(agents)
+
+    def get_state(self):
+        return ''    # pragma: no cover
+
+    event_handlers = [(NextAgentEvents, 'handle_next_agent_events'),
+                      (AgentEvent, 'handle_agent_event_messages')]
+
+    # register the message type sent
+    messages_sent = [NextAgentEvents]
+
+
+class NextReaction(SimulationMessage):
+    "Execute the reaction with the earliest putative time"
+
+
+class NextReactionSimulationObject(ApplicationSimulationObject):
+    """ Template ApplicationSimulationObject that simulates a reaction network with the next reaction method
+
+    The next reaction method of Gibson and Bruck :cite:`gibson2000efficient` is an exact stochastic
+    simulation algorithm. It stores a putative time for each reaction in an indexed priority queue, and
+    executes the reaction with the earliest time. Then it recomputes only the propensities of the reactions
+    that depend on the executed reaction, as given by a dependency graph, and rescales their putative times
+    without drawing new random numbers. Each step costs `O(d log(r))`, for `r` reactions with at most `d`
+    dependents, rather than the `O(r)` of the direct method.
+
+    Each reaction is executed by a simulation event, so a reaction network interoperates with other
+    simulation objects.
+
+    Attributes:
+        state (:obj:`dict`): the count of each species
+        reactions (:obj:`list` of :obj:`dict`): for each reaction, a map from species to the change in their
+            counts when the reaction executes
+        propensities (:obj:`list` of :obj:`function`): for each reaction, a function that computes its
+            propensity from `state`
+        dependencies (:obj:`list` of :obj:`list` of :obj:`int`): for each reaction, the reactions whose
+            propensities may change when it executes, including itself
+        propensity_values (:obj:`list` of :obj:`float`): the current propensity of each reaction
+        putative_times (:obj:`IndexedPriorityQueue`): the putative time of each reaction
+        num_reactions (:obj:`int`): the number of reactions executed
+        random_state (:obj:`numpy.random.RandomState`): a random state
+    """
+
+    def __init__(self, name, state, reactions, propensities, dependencies=None, start_time=0):
+        """
+        Args:
+            name (:obj:`str`): the object's name
+            state (:obj:`dict`): the initial count of each species
+            reactions (:obj:`list` of :obj:`dict`): for each reaction, a map from species to the change in
+                their counts when the reaction executes
+            propensities (:obj:`list` of :obj:`function`): for each reaction, a function that computes its
+                propensity from a `state`
+            dependencies (:obj:`list` of :obj:`list` of :obj:`int`, optional): for each reaction, the reactions
+                whose propensities may change when it executes, as provided by `dependency_graph()`; if not
+                provided, each reaction is assumed to affect all reactions
+            start_time (:obj:`float`, optional): the earliest time at which this object can execute an event
+
+        Raises:
+            :obj:`SimulatorError`: if `reactions`, `propensities` and `dependencies` have different lengths
+        """
+        if len(reactions) != len(propensities):
+            raise SimulatorError("{} reactions, but {} propensities".format(len(reactions), len(propensities)))
+        num_reactions = len(reactions)
+        if dependencies is None:
+            dependencies = [list(range(num_reactions))] * num_reactions
+        if len(dependencies) != num_reactions:
+            raise SimulatorError("{} reactions, but {} dependencies".format(num_reactions, len(dependencies)))
+        self.state = dict(state)
+        self.reactions = [list(reaction.items()) for reaction in reactions]
+        self.propensities = list(propensities)
+        self.dependencies = [list(dependents) if index in dependents else [index, *dependents]
+                             for index, dependents in enumerate(dependencies)]
+        self.propensity_values = [0.] * num_reactions
+        self.putative_times = IndexedPriorityQueue([math.inf] * num_reactions)
+        self.num_reactions = 0
+        self.random_state = numpy.random.RandomState()
+        super().__init__(name, start_time=start_time)
+
+    @staticmethod
+    def dependency_graph(reactions, propensity_species):
+        """ Determine which reactions' propensities each reaction can change
+
+        Args:
+            reactions (:obj:`list` of :obj:`dict`): for each reaction, a map from species to the change in
+                their counts when the reaction executes
+            propensity_species (:obj:`list` of :obj:`iterable`): for each reaction, the species on which its
+                propensity depends
+
+        Returns:
+            :obj:`list` of :obj:`list` of :obj:`int`: for each reaction, the sorted indices of the reactions
+                whose propensities depend on a species that it changes, including itself
+        """
+        dependent_reactions = {}
+        for index, species in enumerate(propensity_species):
+            for a_species in species:
+                dependent_reactions.setdefault(a_species, set()).add(index)
+        dependencies = []
+        for index, reaction in enumerate(reactions):
+            dependents = {index}
+            for species, change in reaction.items():
+                if change:
+                    dependents.update(dependent_reactions.get(species, ()))
+            dependencies.append(sorted(dependents))
+        return dependencies
+
+    def _draw_time(self, propensity):
+        """ Draw the time to a reaction's next execution
+
+        Args:
+            propensity (:obj:`float`): the reaction's propensity
+
+        Returns:
+            :obj:`float`: the reaction's putative time, or infinity if `propensity` is 0
+        """
+        if propensity <= 0:
+            return math.inf
+        return self.time + self.random_state.exponential(1.0 / propensity)
+
+    def send_initial_events(self):
+        """ Compute all propensities and putative times, and schedule the first reaction
+        """
+        self.propensity_values = [propensity(self.state) for propensity in self.propensities]
+        self.putative_times.update_many(range(len(self.propensity_values)),
+                                        [self._draw_time(value) for value in self.propensity_values])
+        self._schedule_next_reaction()
+
+    def _schedule_next_reaction(self):
+        """ Schedule the reaction with the earliest putative time, if any reaction can occur
+        """
+        if self.putative_times.priorities:
+            next_time, _ = self.putative_times.peek()
+            if next_time < math.inf:
+                self.send_event_absolute(next_time, self, NextReaction())
+
+    def handle_next_reaction(self, event):
+        """ Execute the reaction with the earliest putative time, and update the reactions that depend on it
+
+        Args:
+            event (:obj:`Event`): simulation event; not used
+        """
+        now = self.time
+        state = self.state
+        putative_times = self.putative_times
+        priorities = putative_times.priorities
+        propensity_values = self.propensity_values
+        propensities = self.propensities
+        _, executed = putative_times.peek()
+        for species, change in self.reactions[executed]:
+            state[species] += change
+        self.num_reactions += 1
+
+        for reaction in self.dependencies[executed]:
+            old_value = propensity_values[reaction]
+            new_value = propensities[reaction](state)
+            propensity_values[reaction] = new_value
+            if reaction == executed or old_value <= 0:
+                putative_times.update(reaction, self._draw_time(new_value))
+            elif new_value != old_value:
+                # rescale the time remaining until the reaction, which reuses its random number
+                if 0 < new_value:
+                    putative_times.update(reaction, now + (old_value / new_value) * (priorities[reaction] - now))
+                else:
+                    putative_times.update(reaction, math.inf)
+        self._schedule_next_reaction()
+
+    def get_state(self):
+        return str(self.state)    # pragma: no cover
+
+    event_handlers = [(NextReaction, 'handle_next_reaction')]
+
+    # register the message type sent
+    messages_sent = [NextReaction]
+
+
+class Leap(SimulationMessage):
+    "Execute the reactions of a leap"
+
+
+class TauLeapingSimulationObject(ApplicationSimulationObject):
+    """ Template ApplicationSimulationObject that approximately simulates a reaction network by tau-leaping
+
+    Each event ends a leap of length `tau`, during which each reaction executes a Poisson distributed number
+    of times, with mean its propensity at the start of the leap times `tau`. `tau` is selected adaptively
+    by the method of Cao et al. :cite:`cao2006efficient`, so that the mean and standard deviation of the
+    change in each species' count are at most `epsilon` times the count (or 1). A leap that would make
+    a count negative is halved. When a leap would execute fewer than `exact_threshold` reactions it is
+    cheaper and more accurate to take an exact step of the direct method, which executes one reaction.
+
+    Other simulation objects interoperate with a tau-leaping object by sending it events, in whose handlers
+    a subclass changes the counts of species with `update_state()`. That executes the part of the current
+    leap that precedes the current time, and starts a new leap. `max_step` bounds the length of a leap, and
+    so the error in the state observed by other objects during a leap.
+
+    Attributes:
+        state (:obj:`dict`): the count of each species
+        reactions (:obj:`list` of :obj:`list`): for each reaction, `(species, change)` pairs that give the
+            change in species' counts when the reaction executes
+        propensities (:obj:`list` of :obj:`function`): for each reaction, a function that computes its
+            propensity from `state`
+        epsilon (:obj:`float`): the accuracy parameter; smaller values take shorter, more accurate leaps
+        max_step (:obj:`float`): the maximum length of a leap
+        exact_threshold (:obj:`float`): leaps that would execute fewer reactions than this, on average, are
+            replaced by exact steps
+        species_changes (:obj:`dict`): map from each species to `(reaction, change)` pairs for the
+            reactions that change its count
+        leap_start (:obj:`float`): the start time of the current leap
+        leap_end (:obj:`float`): the end time of the current leap
+        leap_firings (:obj:`list` of :obj:`int`): the number of times each reaction executes during
+            the current leap
+        leap_handle (:obj:`EventHandle`): the handle of the :obj:`Leap` event that ends the current leap,
+            or `None` if no reaction can occur
+        exact_step (:obj:`bool`): whether the current leap is an exact step
+        num_leaps (:obj:`int`): the number of leaps executed, including exact steps
+        num_exact_steps (:obj:`int`): the number of exact steps executed
+        num_reactions (:obj:`int`): the number of reactions executed
+        random_state (:obj:`numpy.random.RandomState`): a random state
+    """
+    # the number of times `update_state()` draws the reactions that precede the current time before it caps
+    # an infeasible draw
+    MAX_THINNING_DRAWS = 100
+
+    def __init__(self, name, state, reactions, propensities, epsilon=0.03, max_step=math.inf,
+                 exact_threshold=10, start_time=0):
+        """
+        Args:
+            name (:obj:`str`): the object's name
+            state (:obj:`dict`): the initial count of each species
+            reactions (:obj:`list` of :obj:`dict`): for each reaction, a map from species to the change in
+                their counts when the reaction executes
+            propensities (:obj:`list` of :obj:`function`): for each reaction, a function that computes its
+                propensity from a `state`
+            epsilon (:obj:`float`, optional): the accuracy parameter
+            max_step (:obj:`float`, optional): the maximum length of a leap
+            exact_threshold (:obj:`float`, optional): leaps that would execute fewer reactions than this are
+                replaced by exact steps
+            start_time (:obj:`float`, optional): the earliest time at which this object can execute an event
+
+        Raises:
+            :obj:`SimulatorError`: if `reactions` and `propensities` have different lengths, or
+                if a reaction changes no species, or if `epsilon` or `max_step` is not positive
+        """
+        if len(reactions) != len(propensities):
+            raise SimulatorError("{} reactions, but {} propensities".format(len(reactions), len(propensities)))
+        if not 0 < epsilon:
+            raise SimulatorError("epsilon must be positive, but is {}".format(epsilon))
+        if not 0 < max_step:
+            raise SimulatorError("max_step must be positive, but is {}".format(max_step))
+        self.state = dict(state)
+        self.reactions = [[(species, change) for species, change in reaction.items() if change]
+                          for reaction in reactions]
+        self.propensities = list(propensities)
+        self.epsilon = epsilon
+        self.max_step = max_step
+        self.exact_threshold = exact_threshold
+        self.species_changes = {}
+        for index, reaction in enumerate(self.reactions):
+            if not reaction:
+                raise SimulatorError("reaction {} changes no species".format(index))
+            for species, change in reaction:
+                self.species_changes.setdefault(species, []).append((index, change))
+        self.leap_start = None
+        self.leap_end = None
+        self.leap_firings = None
+        self.leap_handle = None
+        self.exact_step = False
+        self.num_leaps = 0
+        self.num_exact_steps = 0
+        self.num_reactions = 0
+        self.random_state = numpy.random.RandomState()
+        super().__init__(name, start_time=start_time)
+
+    def select_tau(self, propensity_values):
+        """ Select the length of a leap that bounds the relative change in each species' count by `epsilon`
+
+        Args:
+            propensity_values (:obj:`list` of :obj:`float`): the propensity of each reaction
+
+        Returns:
+            :obj:`float`: the length of the leap
+        """
+        tau = self.max_step
+        for species, changes in self.species_changes.items():
+            mean = 0.
+            variance = 0.
+            for reaction, change in changes:
+                mean += change * propensity_values[reaction]
+                variance += change * change * propensity_values[reaction]
+            bound = max(self.epsilon * self.state[species], 1.)
+            if mean:
+                tau = min(tau, bound / abs(mean))
+            if variance:
+                tau = min(tau, bound * bound / variance)
+        return tau
+
+    def _start_leap(self):
+        """ Start a leap at the current time, and schedule the :obj:`Leap` event that ends it
+        """
+        propensity_values = [propensity(self.state) for propensity in self.propensities]
+        total_propensity = sum(propensity_values)
+        self.leap_start = self.time
+        if total_propensity <= 0:
+            self.leap_firings = None
+            self.leap_handle = None
+            return
+        random_state = self.random_state
+        tau = self.select_tau(propensity_values)
+        self.exact_step = total_propensity * tau < self.exact_threshold
+        if self.exact_step:
+            # a step of the direct method
+            tau = random_state.exponential(1.0 / total_propensity)
+            self.leap_firings = [0] * len(propensity_values)
+            # scale by the last cumulative propensity, which may differ from total_propensity by roundoff
+            cumulative_propensities = numpy.cumsum(propensity_values)
+            self.leap_firings[numpy.searchsorted(cumulative_propensities,
+                                                 random_state.random_sample() * cumulative_propensities[-1],
+                                                 side='right')] = 1
+        else:
+            while True:
+                firings = random_state.poisson(numpy.multiply(propensity_values, tau)).tolist()
+                if self._feasible(firings):
+                    break
+                tau /= 2
+            self.leap_firings = firings
+        self.leap_end = self.time + tau
+        self.leap_handle = self.send_event_absolute(self.leap_end, self, Leap())
+
+    def _feasible(self, firings):
+        """ Determine whether executing reactions would leave every species' count non-negative
+
+        Args:
+            firings (:obj:`list` of :obj:`int`): the number of times each reaction executes
+
+        Returns:
+            :obj:`bool`: whether all counts remain non-negative
+        """
+        state = self.state
+        for species, changes in self.species_changes.items():
+            if state[species] + sum(change * firings[reaction] for reaction, change in changes) < 0:
+                return False
+        return True
+
+    def _capped(self, firings):
+        """ Reduce the number of times reactions execute, so that executing them in order leaves every
+        species' count non-negative
+
+        Args:
+            firings (:obj:`list` of :obj:`int`): the number of times each reaction executes
+
+        Returns:
+            :obj:`list` of :obj:`int`: the number of times each reaction executes, reduced where necessary
+        """
+        state = dict(self.state)
+        capped = []
+        for reaction, count in enumerate(firings):
+            for species, change in self.reactions[reaction]:
+                if change < 0:
+                    count = min(count, state[species] // -change)
+            for species, change in self.reactions[reaction]:
+                state[species] += count * change
+            capped.append(count)
+        return capped
+
+    def _execute(self, firings):
+        """ Execute reactions
+
+        Args:
+            firings (:obj:`list` of :obj:`int`): the number of times each reaction executes
+        """
+        state = self.state
+        for reaction, count in enumerate(firings):
+            if count:
+                for species, change in self.reactions[reaction]:
+                    state[species] += count * change
+                self.num_reactions += count
+
+    def send_initial_events(self):
+        """ Start the first leap
+        """
+        self._start_leap()
+
+    def handle_leap(self, event):
+        """ Execute the reactions of the leap that ends now, and start the next leap
+
+        Args:
+            event (:obj:`Event`): simulation event; not used
+        """
+        self._execute(self.leap_firings)
+        self.num_leaps += 1
+        self.num_exact_steps += self.exact_step
+        self._start_leap()
+
+    def update_state(self, changes):
+        """ Change the counts of species at the current time, as in response to another simulation object
+
+        The reactions of the current leap that precede the current time are executed: the reactions of a leap
+        occur at uniformly distributed times, so the number of each that precede the current time is binomially
+        distributed. Draws that would make a count negative are redrawn, up to `MAX_THINNING_DRAWS` times, and
+        then the last draw is capped. An exact step's reaction has not yet occurred. Then a new leap starts from
+        the changed state.
+
+        Args:
+            changes (:obj:`dict`): map from species to the change in their counts
+
+        Raises:
+            :obj:`SimulatorError`: if a change would make a count negative; then the state and the current
+                leap are unchanged
+        """
+        firings = None
+        if self.leap_handle is not None and self.leap_handle.pending and not self.exact_step:
+            fraction = (self.time - self.leap_start) / (self.leap_end - self.leap_start)
+            for _ in range(self.MAX_THINNING_DRAWS):
+                firings = self.random_state.binomial(self.leap_firings, fraction).tolist()
+                if self._feasible(firings):
+                    break
+            else:
+                firings = self._capped(firings)
+        # check the changes against the counts that executing the firings will leave
+        for species, change in changes.items():
+            count = self.state[species]
+            if firings is not None:
+                count += sum(reaction_change * firings[reaction]
+                             for reaction, reaction_change in self.species_changes.get(species, ()))
+            if count + change < 0:
+                raise SimulatorError("changing the count of '{}' by {} would make it negative".format(species,
+                                                                                                     change))
+        if self.leap_handle is not None:
+            self.leap_handle.cancel()
+        if firings is not None:
+            self._execute(firings)
+        for species, change in changes.items():
+            self.state[species] += change
+        self._start_leap()
+
+    def get_state(self):
+        return str(self.state)    # pragma: no cover
+
+    event_handlers = [(Leap, 'handle_leap')]
+
+    # register the message type sent
+    messages_sent = [Leap]
@@ -140,12 +140,160 @@ class FastLogger(object):
                 min_of_min = handler.min_level
         return min_of_min
 
-    def fast_log(self, msg, **kwargs):
+    def fast_log(self, msg, *args, **kwargs):
         """ Log, and do it quickly if nothing is being written
 
+        If `args` are provided, `msg` is a format string that's formatted with them only if this logger is
+        active. Hot paths should test `active` before calling `fast_log`, which avoids building its
+        arguments when nothing is being written.
+
         Args:
-            msg (:obj:`str`): the log message
+            msg (:obj:`str`): the log message, or a format string for `args`
+            args (:obj:`list`): arguments to format into `msg`
             kwargs (:obj:`dict`): other logging arguments
         """
         if self.active:
+            if args:
+                msg = msg.format(*args)
             self.method(msg, **kwargs)
+
+
+class IndexedPriorityQueue(object):
+    """ A priority queue of the keys `0, 1, ..., n - 1`, whose priorities can be changed in place
+
+    Every key is always in the queue; a key without a pending time can be given priority infinity.
+    The queue is a binary heap of keys that tracks the position of each key, so changing a key's
+    priority costs `O(log(n))`, and getting the key with the smallest priority costs `O(1)`. Keys with
+    equal priorities are ordered by key, so the order is deterministic. This is the indexed priority
+    queue used by the next reaction method :cite:`gibson2000efficient`.
+
+    Attributes:
+        priorities (:obj:`list` of :obj:`float`): the priority of each key
+        heap (:obj:`list` of :obj:`int`): a min heap of the keys
+        positions (:obj:`list` of :obj:`int`): the index in `heap` of each key
+    """
+
+    # update a batch of keys by rebuilding the heap, which costs `O(n log(n))` in C, rather than by
+    # moving each key, which costs `O(log(n))` in Python apiece, if the batch holds at least this
+    # fraction of the keys
+    BULK_REBUILD_FRACTION = 0.1
+
+    def __init__(self, priorities):
+        """
+        Args:
+            priorities (:obj:`iterable` of :obj:`float`): the initial priority of each key
+        """
+        self.priorities = [float(priority) for priority in priorities]
+        self._rebuild()
+
+    def _rebuild(self):
+        """ Rebuild the heap from `priorities`
+        """
+        priorities = self.priorities
+        # a sorted list is a heap
+        self.heap = sorted(range(len(priorities)), key=lambda key: (priorities[key], key))
+        positions = [0] * len(priorities)
+        for position, key in enumerate(self.heap):
+            positions[key] = position
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.priorities)
+
+    def peek(self):
+        """ Get the key with the smallest priority
+
+        Returns:
+            :obj:`tuple`: `(priority, key)` for the key with the smallest priority
+
+        Raises:
+            :obj:`IndexError`: if the queue has no keys
+        """
+        key = self.heap[0]
+        return (self.priorities[key], key)
+
+    def update(self, key, priority):
+        """ Change the priority of a key
+
+        Args:
+            key (:obj:`int`): a key
+            priority (:obj:`float`): the key's new priority
+        """
+        priorities = self.priorities
+        old_priority = priorities[key]
+        priorities[key] = priority
+        if priority < old_priority:
+            self._sift_up(self.positions[key])
+        elif old_priority < priority:
+            self._sift_down(self.positions[key])
+
+    def update_many(self, keys, priorities):
+        """ Change the priorities of many keys
+
+        Args:
+            keys (:obj:`iterable` of :obj:`int`): keys, which may be a NumPy array
+            priorities (:obj:`iterable` of :obj:`float`): the keys' new priorities, which may be a NumPy array
+        """
+        keys = keys.tolist() if hasattr(keys, 'tolist') else list(keys)
+        priorities = priorities.tolist() if hasattr(priorities, 'tolist') else list(priorities)
+        if self.BULK_REBUILD_FRACTION * len(self.priorities) <= len(keys):
+            for key, priority in zip(keys, priorities):
+                self.priorities[key] = float(priority)
+            self._rebuild()
+        else:
+            for key, priority in zip(keys, priorities):
+                self.update(key, float(priority))
+
+    def _sift_up(self, position):
+        """ Move the key at `position` towards the root until its parent is not later
+
+        Args:
+            position (:obj:`int`): an index in `heap`
+        """
+        heap = self.heap
+        positions = self.positions
+        priorities = self.priorities
+        key = heap[position]
+        priority = priorities[key]
+        while 0 < position:
+            parent_position = (position - 1) >> 1
+            parent = heap[parent_position]
+            parent_priority = priorities[parent]
+            if parent_priority < priority or (parent_priority == priority and parent < key):
+                break
+            heap[position] = parent
+            positions[parent] = position
+            position = parent_position
+        heap[position] = key
+        positions[key] = position
+
+    def _sift_down(self, position):
+        """ Move the key at `position` towards the leaves until its children are not earlier
+
+        Args:
+            position (:obj:`int`): an index in `heap`
+        """
+        heap = self.heap
+        positions = self.positions
+        priorities = self.priorities
+        size = len(heap)
+        key = heap[position]
+        priority = priorities[key]
+        child_position = 2 * position + 1
+        while child_position < size:
+            child = heap[child_position]
+            child_priority = priorities[child]
+            right_position = child_position + 1
+            if right_position < size:
+                right = heap[right_position]
+                right_priority = priorities[right]
+                if right_priority < child_priority or (right_priority == child_priority and right < child):
+                    child_position, child, child_priority = right_position, right, right_priority
+            if priority < child_priority or (priority == child_priority and key < child):
+                break
+            heap[position] = child
+            positions[child] = position
+            position = child_position
+            child_position = 2 * position + 1
+        heap[position] = key
+        positions[key] = position
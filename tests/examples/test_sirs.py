@@ -7,11 +7,14 @@
 """
 
 import unittest
+import numpy
 import random
+import time
 import warnings
 from capturer import CaptureOutput
 
-from de_sim.examples.sirs import SIR, SIR2, RunSIRs
+from de_sim.examples.sirs import SIR, SIR2, AgentSIR, NextReactionSIR, NextReactionSIRS, TauLeapingSIR, RunSIRs
+from de_sim.simulation_engine import SimulationEngine
 
 
 class TestSIRs(unittest.TestCase):
@@ -47,6 +50,9 @@ class TestSIRs(unittest.TestCase):
     def test_run_sir(self):
         self.run_sir_test(SIR)
         self.run_sir_test(SIR2)
+        self.run_sir_test(AgentSIR)
+        self.run_sir_test(NextReactionSIR)
+        self.run_sir_test(TauLeapingSIR)
 
     def run_P_minor_outbreak_test(self, sir_class):
         # Allen (2017) estimates P[minor outbreak] for the SIR model shown in Fig. 1 as 0.25
@@ -74,3 +80,115 @@ class TestSIRs(unittest.TestCase):
     def test_P_minor_outbreak(self):
         self.run_P_minor_outbreak_test(SIR)
         self.run_P_minor_outbreak_test(SIR2)
+        self.run_P_minor_outbreak_test(AgentSIR)
+        self.run_P_minor_outbreak_test(NextReactionSIR)
+        self.run_P_minor_outbreak_test(TauLeapingSIR)
+
+    def test_agent_sir(self):
+        sir = AgentSIR('sir', s=90, i=5, N=100, beta=0.3, gamma=0.15, recording_period=10)
+        sir.random_state.seed(3)
+        simulator = SimulationEngine()
+        simulator.add_object(sir)
+        simulator.initialize()
+        self.assertEqual(sir.history[0], dict(time=0, s=90, i=5))
+        simulator.simulate(100)
+        # the counts of agents in each state agree with the agents' states
+        states = sir.agents['state'].tolist()
+        self.assertEqual((states.count(0), states.count(1), states.count(2)), (sir.s, sir.i, sir.N - sir.s - sir.i))
+        s_history = [state['s'] for state in sir.history]
+        self.assertEqual(s_history, sorted(s_history, reverse=True))
+
+    def test_agent_sir_benchmark(self):
+        # agent-based SIR models with populations that would be too large as one object per agent
+        print()
+        print('Agent-based SIR benchmark')
+        print('N\t# events\trun time (s)\tus/event'.expandtabs(15))
+        for N in [1000, 10000]:
+            sir = AgentSIR('sir', s=N - 10, i=10, N=N, beta=0.3, gamma=0.15, recording_period=10)
+            sir.random_state.seed(17)
+            simulator = SimulationEngine()
+            simulator.add_object(sir)
+            simulator.initialize()
+            start_time = time.process_time()
+            num_events = simulator.simulate(100).num_events
+            run_time = time.process_time() - start_time
+            print("{}\t{}\t{:8.3f}\t{:8.2f}".format(N, num_events, run_time,
+                                                     1e6 * run_time / num_events).expandtabs(15))
+
+    def test_next_reaction_sirs(self):
+        sirs = NextReactionSIRS('sirs', s=98, i=2, N=100, beta=0.3, gamma=0.15, recording_period=10, xi=0.05)
+        sirs.random_state.seed(1)
+        # the waning reaction changes r, which only its own propensity reads
+        self.assertEqual(sirs.dependencies, [[0, 1], [0, 1, 2], [0, 2]])
+        simulator = SimulationEngine()
+        simulator.add_object(sirs)
+        simulator.initialize()
+        simulator.simulate(200)
+        self.assertEqual(sum(sirs.state.values()), sirs.N)
+        # waning immunity makes recovered subjects susceptible again
+        s_history = [state['s'] for state in sirs.history]
+        self.assertNotEqual(s_history, sorted(s_history, reverse=True))
+
+    def test_next_reaction_sir_benchmark(self):
+        # compare the direct method SIR models with the next reaction method
+        print()
+        print('SIR benchmark')
+        print('model\t# events\trun time (s)\tus/event'.expandtabs(20))
+        for sir_class in [SIR, SIR2, NextReactionSIR]:
+            num_events = 0
+            run_time = 0
+            for seed in range(5):
+                sir = sir_class('sir', s=990, i=10, N=1000, beta=0.3, gamma=0.15, recording_period=10)
+                sir.random_state.seed(seed)
+                simulator = SimulationEngine()
+                simulator.add_object(sir)
+                simulator.initialize()
+                start_time = time.process_time()
+                num_events += simulator.simulate(100).num_events
+                run_time += time.process_time() - start_time
+            print("{}\t{}\t{:8.3f}\t{:8.2f}".format(sir_class.__name__, num_events, run_time,
+                                                     1e6 * run_time / num_events).expandtabs(20))
+
+    def final_susceptibles(self, sir_class, N, seeds, **kwargs):
+        # run an ensemble, and return the final numbers of susceptible subjects and the mean run time
+        final_s = []
+        run_time = 0
+        for seed in seeds:
+            sir = sir_class('sir', s=N - 100, i=100, N=N, beta=0.3, gamma=0.15, recording_period=10, **kwargs)
+            sir.random_state.seed(seed)
+            simulator = SimulationEngine()
+            simulator.add_object(sir)
+            simulator.initialize()
+            start_time = time.process_time()
+            simulator.simulate(100)
+            run_time += time.process_time() - start_time
+            final_s.append(sir.history[-1]['s'])
+        return numpy.array(final_s), run_time / len(seeds)
+
+    def test_tau_leaping_sir(self):
+        # tau-leaping agrees with the exact model, and takes far fewer events
+        exact_s, _ = self.final_susceptibles(NextReactionSIR, 10000, range(10))
+        leaping_s, _ = self.final_susceptibles(TauLeapingSIR, 10000, range(10), epsilon=0.03)
+        self.assertLess(abs(exact_s.mean() - leaping_s.mean()), 3 * exact_s.std() + 50)
+
+        sir = TauLeapingSIR('sir', s=9900, i=100, N=10000, beta=0.3, gamma=0.15, recording_period=10)
+        simulator = SimulationEngine()
+        simulator.add_object(sir)
+        simulator.initialize()
+        simulator.simulate(100)
+        self.assertLess(sir.num_leaps, sir.num_reactions / 10)
+
+    def test_tau_leaping_sir_benchmark(self):
+        # compare the accuracy and speed of tau-leaping with those of exact models
+        N = 10000
+        print()
+        print('Tau-leaping SIR benchmark, N = {}'.format(N))
+        print('model\tepsilon\tmean final s\tstd final s\trun time (s)'.expandtabs(20))
+        seeds = range(5)
+        models = [(SIR, {}), (NextReactionSIR, {})] + \
+            [(TauLeapingSIR, dict(epsilon=epsilon)) for epsilon in [0.01, 0.03, 0.1]]
+        for sir_class, kwargs in models:
+            final_s, run_time = self.final_susceptibles(sir_class, N, seeds, **kwargs)
+            print("{}\t{}\t{:10.1f}\t{:10.1f}\t{:8.3f}".format(sir_class.__name__, kwargs.get('epsilon', ''),
+                                                               final_s.mean(), final_s.std(),
+                                                               run_time).expandtabs(20))
@@ -0,0 +1,326 @@
+"""
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-07-20
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from argparse import Namespace
+from capturer import CaptureOutput
+import heapq
+import itertools
+import random
+import time
+import unittest
+
+from de_sim.errors import SimulatorError
+from de_sim.event import Event
+from de_sim.event_queue_backends import (EventQueueBackend, HeapEventQueueBackend, IndexedHeapEventQueueBackend,
+                                         CalendarEventQueueBackend, LadderEventQueueBackend,
+                                         TwoLevelEventQueueBackend, EVENT_QUEUE_BACKENDS,
+                                         get_event_queue_backend)
+from de_sim.examples.phold import RunPhold, PholdSimulationObject, obj_name
+from de_sim.simulation_engine import SimulationEngine
+from de_sim.simulation_object import EventQueue
+from de_sim.testing.example_simulation_objects import ExampleSimulationObject
+from de_sim.testing.some_message_types import InitMsg
+
+
+class EventComparingHeapBackend(HeapEventQueueBackend):
+    """ A heap of `Event`s ordered by `Event.__lt__`, which is the baseline for the entry benchmark
+
+    Each peek or pop wraps the earliest event in a minimal entry.
+    """
+    NAME = 'event comparing heap'
+
+    def push(self, entry):
+        heapq.heappush(self.heap, entry[-1])
+
+    def peek(self):
+        if self.heap:
+            event = self.heap[0]
+            return [event.event_time, event]
+        return None
+
+    def pop(self):
+        event = heapq.heappop(self.heap)
+        return [event.event_time, event]
+
+
+class TestEventQueueBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.sim_objs = [ExampleSimulationObject(str(i)) for i in range(5)]
+        self.sequence_numbers = itertools.count()
+
+    def make_entries(self, event_times):
+        entries = []
+        for event_time in event_times:
+            event = Event(0, event_time, self.sim_objs[0], random.choice(self.sim_objs), InitMsg())
+            entries.append(event._order_time + (next(self.sequence_numbers), event))
+        return entries
+
+    def drain(self, backend):
+        entries = []
+        while len(backend):
+            self.assertIs(backend.peek(), backend.peek())
+            entry = backend.peek()
+            self.assertIs(backend.pop(), entry)
+            entries.append(entry)
+        self.assertEqual(backend.peek(), None)
+        return entries
+
+    def check_order(self, backend, entries):
+        for entry in entries:
+            backend.push(entry)
+        self.assertEqual(len(backend), len(entries))
+        self.assertEqual(set(backend.entries()), set(entries))
+        drained = self.drain(backend)
+        self.assertEqual(drained, sorted(entries))
+        # entries are ordered like their events
+        events = [entry[-1] for entry in drained]
+        for earlier, later in zip(events, events[1:]):
+            self.assertTrue(earlier <= later)
+
+    def test_backend_order(self):
+        random.seed(17)
+        workloads = dict(uniform=[random.uniform(0, 100) for _ in range(2000)],
+                         exponential=[random.expovariate(0.01) for _ in range(2000)],
+                         ties=[float(random.randrange(10)) for _ in range(2000)],
+                         skewed=[random.choice([1e-6, 1e6]) * random.random() for _ in range(2000)],
+                         negative=[random.uniform(-50, 50) for _ in range(500)],
+                         infinite=[float('inf'), 3., float('-inf'), 2.])
+        for backend_class in EVENT_QUEUE_BACKENDS.values():
+            for name, event_times in workloads.items():
+                with self.subTest(backend=backend_class.NAME, workload=name):
+                    self.check_order(backend_class(), self.make_entries(event_times))
+
+    def test_hold_model(self):
+        # interleave pushes and pops, as in a simulation, including events scheduled earlier than the
+        # last one popped
+        for backend_class in EVENT_QUEUE_BACKENDS.values():
+            random.seed(3)
+            backend = backend_class()
+            reference = HeapEventQueueBackend()
+            for entry in self.make_entries([random.expovariate(1.0) for _ in range(300)]):
+                backend.push(entry)
+                reference.push(entry)
+            now = 0
+            for i in range(5000):
+                entry = backend.pop()
+                self.assertIs(entry, reference.pop())
+                now = entry[0]
+                new_entries = self.make_entries([now + random.expovariate(1.0)])
+                if i % 50 == 0:
+                    new_entries.extend(self.make_entries([now, now / 2]))
+                for new_entry in new_entries:
+                    backend.push(new_entry)
+                    reference.push(new_entry)
+            self.assertEqual(len(backend), len(reference))
+            self.assertEqual(self.drain(backend), self.drain(reference))
+
+    def test_clear(self):
+        for backend_class in EVENT_QUEUE_BACKENDS.values():
+            backend = backend_class()
+            for entry in self.make_entries(range(100)):
+                backend.push(entry)
+            backend.clear()
+            self.assertEqual(len(backend), 0)
+            self.assertEqual(backend.entries(), [])
+            self.assertEqual(backend.peek(), None)
+            with self.assertRaises(IndexError):
+                backend.pop()
+
+    def test_push_many(self):
+        for backend_class in EVENT_QUEUE_BACKENDS.values():
+            random.seed(4)
+            backend = backend_class()
+            entries = self.make_entries([random.uniform(0, 10) for _ in range(200)])
+            # a large batch into an empty backend, a small batch, and an empty batch
+            backend.push_many(entries[:150])
+            backend.push_many(entries[150:160])
+            backend.push_many([])
+            for entry in entries[160:]:
+                backend.push(entry)
+            self.assertEqual(len(backend), len(entries))
+            self.assertEqual(self.drain(backend), sorted(entries))
+
+    def test_compact(self):
+        for backend_class in EVENT_QUEUE_BACKENDS.values():
+            random.seed(5)
+            backend = backend_class()
+            entries = [list(entry) for entry in self.make_entries([random.uniform(0, 10) for _ in range(500)])]
+            for entry in entries:
+                backend.push(entry)
+            for entry in entries[::3]:
+                entry[-1] = None
+            live_entries = [entry for entry in entries if entry[-1] is not None]
+            backend.compact()
+            self.assertEqual(len(backend), len(live_entries))
+            self.assertEqual(self.drain(backend), sorted(live_entries))
+
+    def test_update(self):
+        random.seed(9)
+        backend = IndexedHeapEventQueueBackend()
+        entries = [list(entry) for entry in self.make_entries([random.uniform(0, 10) for _ in range(300)])]
+        for entry in entries:
+            backend.push(entry)
+        for _ in range(1000):
+            entry = random.choice(entries)
+            entry[0] = random.uniform(0, 10)
+            backend.update(entry)
+        self.assertEqual(self.drain(backend), sorted(entries))
+        self.assertEqual(backend.positions, {})
+
+        with self.assertRaisesRegex(NotImplementedError, "'heap' event queue backend does not support update"):
+            HeapEventQueueBackend().update(entries[0])
+
+    def test_object_entries(self):
+        for backend_class in EVENT_QUEUE_BACKENDS.values():
+            backend = backend_class()
+            entries = [list(entry) for entry in self.make_entries(range(50))]
+            for entry in entries:
+                backend.push(entry)
+            for sim_obj in self.sim_objs:
+                expected = [entry for entry in entries if entry[-1].receiving_object is sim_obj]
+                self.assertEqual(sorted(backend.object_entries(sim_obj)), expected)
+            self.assertEqual(backend.object_entries(ExampleSimulationObject('other')), [])
+
+    def test_two_level(self):
+        random.seed(21)
+        backend = TwoLevelEventQueueBackend()
+        # entries that precede the heads of their local queues make global heap items stale
+        for entry in self.make_entries([100 - i for i in range(100)]):
+            backend.push(entry)
+        self.assertTrue(len(backend.global_heap) <= 2 * len(self.sim_objs))
+        self.assertEqual(set(backend.local_queues), {entry[-1].receiving_object for entry in backend.entries()})
+        self.assertEqual([entry[0] for entry in self.drain(backend)], list(range(1, 101)))
+        with self.assertRaisesRegex(IndexError, 'pop from an empty two-level queue'):
+            backend.pop()
+
+    def test_get_event_queue_backend(self):
+        self.assertTrue(isinstance(get_event_queue_backend('calendar'), CalendarEventQueueBackend))
+        self.assertTrue(isinstance(get_event_queue_backend(LadderEventQueueBackend), LadderEventQueueBackend))
+        backend = HeapEventQueueBackend()
+        self.assertIs(get_event_queue_backend(backend), backend)
+        self.assertTrue(isinstance(backend, EventQueueBackend))
+        with self.assertRaisesRegex(SimulatorError, "unknown event queue backend 'no_such_backend'"):
+            get_event_queue_backend('no_such_backend')
+        with self.assertRaisesRegex(SimulatorError, 'must be positive'):
+            CalendarEventQueueBackend(width=0)
+
+    def test_event_queue(self):
+        self.assertTrue(isinstance(EventQueue().backend, HeapEventQueueBackend))
+        for name, backend_class in EVENT_QUEUE_BACKENDS.items():
+            event_queue = EventQueue(backend=name)
+            self.assertTrue(isinstance(event_queue.backend, backend_class))
+            sender, receiver = self.sim_objs[:2]
+            for i in range(3):
+                event_queue.schedule_event(0, 2, sender, receiver, InitMsg())
+            event_queue.schedule_event(0, 1, sender, sender, InitMsg())
+            self.assertEqual(event_queue.len(), 4)
+            self.assertEqual(event_queue.next_event_time(), 1)
+            self.assertEqual(event_queue.next_event_obj(), sender)
+            self.assertEqual(len(event_queue.next_events()), 1)
+            events = event_queue.next_events()
+            self.assertEqual(len(events), 3)
+            self.assertTrue(event_queue.empty())
+            for event in events:
+                self.assertEqual(event.event_time, 2)
+                self.assertEqual(event.receiving_object, receiver)
+
+            simulator = SimulationEngine(event_queue=name)
+            self.assertTrue(isinstance(simulator.event_queue.backend, backend_class))
+
+    @staticmethod
+    def run_phold(backend, num_phold_procs, time_max, seed):
+        args = Namespace(time_max=time_max, frac_self_events=0.3, num_phold_procs=num_phold_procs,
+                         seed=seed, event_queue=backend)
+        random.seed(seed)
+        with CaptureOutput(relay=False):
+            return RunPhold.main(args)
+
+    def test_phold_equivalence(self):
+        # all backends produce the same simulation
+        for num_phold_procs in [1, 10, 50]:
+            num_events = {backend: self.run_phold(backend, num_phold_procs, 20, 11) for backend in EVENT_QUEUE_BACKENDS}
+            self.assertEqual(len(set(num_events.values())), 1)
+
+    def test_phold_benchmark(self):
+        # compare the backends on PHOLD at several queue sizes; each PHOLD object holds one pending event
+        print()
+        print('PHOLD event queue backend benchmark')
+        print('queue size\tbackend\t# events\trun time (s)\tevents/s'.expandtabs(15))
+        num_events_per_size = 5000
+        for num_phold_procs in [16, 128, 512]:
+            args = Namespace(time_max=num_events_per_size / num_phold_procs, frac_self_events=0.3,
+                             num_phold_procs=num_phold_procs)
+            # constructing simulation objects is expensive, so reuse them with each backend
+            phold_objs = [PholdSimulationObject(obj_name(obj_id), args) for obj_id in range(num_phold_procs)]
+            for backend in EVENT_QUEUE_BACKENDS:
+                simulator = SimulationEngine(event_queue=backend)
+                for phold_obj in phold_objs:
+                    phold_obj.time = 0
+                    phold_obj.simulator = None
+                    simulator.add_object(phold_obj)
+                random.seed(7)
+                simulator.initialize()
+                start_time = time.process_time()
+                num_events = simulator.simulate(args.time_max).num_events
+                run_time = time.process_time() - start_time
+                print("{}\t{}\t{}\t{:8.3f}\t{:8.0f}".format(num_phold_procs, backend, num_events, run_time,
+                                                           num_events / run_time).expandtabs(15))
+
+    def test_entry_benchmark(self):
+        # compare heap entries that are native tuples with a heap of Events compared by Event.__lt__
+        print()
+        print('PHOLD heap entry benchmark')
+        print('queue size\theap of\t# events\trun time (s)\tevents/s'.expandtabs(15))
+        num_events_per_size = 10000
+        for num_phold_procs in [16, 128, 512]:
+            args = Namespace(time_max=num_events_per_size / num_phold_procs, frac_self_events=0.3,
+                             num_phold_procs=num_phold_procs)
+            phold_objs = [PholdSimulationObject(obj_name(obj_id), args) for obj_id in range(num_phold_procs)]
+            num_events = {}
+            for backend, heap_of in [(EventComparingHeapBackend(), 'events'), ('heap', 'entries')]:
+                simulator = SimulationEngine(event_queue=backend)
+                for phold_obj in phold_objs:
+                    phold_obj.time = 0
+                    phold_obj.simulator = None
+                    simulator.add_object(phold_obj)
+                random.seed(7)
+                simulator.initialize()
+                start_time = time.process_time()
+                num_events[heap_of] = simulator.simulate(args.time_max).num_events
+                run_time = time.process_time() - start_time
+                print("{}\t{}\t{}\t{:8.3f}\t{:8.0f}".format(num_phold_procs, heap_of, num_events[heap_of],
+                                                           run_time,
+                                                           num_events[heap_of] / run_time).expandtabs(15))
+            self.assertEqual(num_events['events'], num_events['entries'])
+
+    def test_reschedule_benchmark(self):
+        # move pending events to new times, as a rate-driven model does after each reaction
+        print()
+        print('Reschedule benchmark')
+        print('queue size\tbackend\tmethod\t# moves\trun time (s)\tmoves/s'.expandtabs(15))
+        sender, receiver = self.sim_objs[:2]
+        num_moves = 50000
+        for queue_size in [100, 10000]:
+            for backend, method in [('heap', 'cancel & send'), ('heap', 'reschedule'),
+                                    ('indexed_heap', 'reschedule')]:
+                random.seed(13)
+                event_queue = EventQueue(backend=backend)
+                handles = [event_queue.schedule_event(0, random.random(), sender, receiver, InitMsg())
+                           for _ in range(queue_size)]
+                start_time = time.process_time()
+                for _ in range(num_moves):
+                    i = random.randrange(queue_size)
+                    if method == 'reschedule':
+                        event_queue.reschedule(handles[i], random.random())
+                    else:
+                        handles[i].cancel()
+                        handles[i] = event_queue.schedule_event(0, random.random(), sender, receiver, InitMsg())
+                run_time = time.process_time() - start_time
+                self.assertEqual(event_queue.len(), queue_size)
+                print("{}\t{}\t{}\t{}\t{:8.3f}\t{:8.0f}".format(queue_size, backend, method, num_moves, run_time,
+                                                               num_moves / run_time).expandtabs(15))
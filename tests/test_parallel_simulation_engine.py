@@ -0,0 +1,209 @@
+""" Test the conservative parallel simulation engine
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-12
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from argparse import Namespace
+import multiprocessing
+import random
+import time
+import unittest
+
+from de_sim.errors import SimulatorError
+from de_sim.examples.phold import (LookaheadPholdSimulationObject, MessageSentToSelf, PholdSimulationObject,
+                                   build_phold, obj_name)
+from de_sim.parallel_simulation_engine import ParallelSimulationEngine, lookahead
+from de_sim.simulation_engine import SimulationEngine
+from de_sim.simulation_message import SimulationMessage
+
+
+def object_time(sim_obj):
+    return sim_obj.time
+
+
+def build_lookahead_phold(args):
+    return build_phold(args, LookaheadPholdSimulationObject)
+
+
+class ShortDelayPhold(LookaheadPholdSimulationObject):
+    # sends events with delays shorter than its declared lookahead
+
+    def delay(self):
+        return self.lookahead / 2
+
+
+def build_short_delay_phold(args):
+    return build_phold(args, ShortDelayPhold)
+
+
+class ZeroLookaheadPhold(LookaheadPholdSimulationObject):
+    # a PHOLD process with its own random number generator, and no lookahead
+    lookahead = 0
+
+
+def build_zero_lookahead_phold(args):
+    return build_phold(args, ZeroLookaheadPhold)
+
+
+def build_seeded_phold(args):
+    # the global random number generator is reseeded in each worker process
+    random.seed(args.seed)
+    return build_phold(args)
+
+
+class CancellingPhold(ZeroLookaheadPhold):
+    # cancels an extra initial event
+
+    def send_initial_events(self):
+        super().send_initial_events()
+        self.send_event(self.delay(), self, MessageSentToSelf()).cancel()
+
+
+def build_cancelling_phold(args):
+    return build_phold(args, CancellingPhold)
+
+
+class ReschedulingPhold(ZeroLookaheadPhold):
+    # reschedules an extra initial event
+
+    def send_initial_events(self):
+        super().send_initial_events()
+        self.reschedule_event(self.send_event(self.delay(), self, MessageSentToSelf()), self.delay())
+
+
+def build_rescheduling_phold(args):
+    return build_phold(args, ReschedulingPhold)
+
+
+def object_time_and_num_events(sim_obj):
+    return (sim_obj.time, sim_obj.num_events)
+
+
+class TestParallelSimulationEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.args = Namespace(time_max=20, frac_self_events=0.3, num_phold_procs=12, seed=3)
+
+    def run_sequential(self, args, builder=build_lookahead_phold):
+        simulator = SimulationEngine()
+        simulator.add_objects(builder(args))
+        simulator.initialize()
+        num_events = simulator.simulate(args.time_max).num_events
+        times = {sim_obj.name: sim_obj.time for sim_obj in simulator.get_objects()}
+        return num_events, simulator.event_counts, times
+
+    def run_parallel(self, args, num_partitions, builder=build_lookahead_phold, collect=object_time, **kwargs):
+        partition = [obj_id % num_partitions for obj_id in range(args.num_phold_procs)]
+        simulator = ParallelSimulationEngine(builder, partition, builder_args=(args,), **kwargs)
+        return simulator, simulator.simulate(args.time_max, collect=collect)
+
+    def test_lookahead(self):
+        class Msg(SimulationMessage):
+            'Msg'
+            lookahead = 0.5
+
+        self.assertEqual(lookahead(LookaheadPholdSimulationObject, Msg), 0.5)
+        self.assertEqual(lookahead(PholdSimulationObject, Msg), 0.5)
+        Msg.lookahead = 0.01
+        self.assertEqual(lookahead(LookaheadPholdSimulationObject, Msg), LookaheadPholdSimulationObject.lookahead)
+
+    def test_parallel_simulation(self):
+        # the parallel engine's results are identical to the sequential engine's
+        num_events, event_counts, times = self.run_sequential(self.args)
+        for num_partitions in [1, 2, 3]:
+            simulator, results = self.run_parallel(self.args, num_partitions)
+            self.assertEqual(simulator.num_partitions, num_partitions)
+            self.assertEqual(results.num_events, num_events)
+            self.assertEqual(results.event_counts, event_counts)
+            self.assertEqual(results.results, times)
+            self.assertEqual(results.num_rolled_back, 0)
+
+        # a partition may be given as a map from object name to partition
+        partition = {obj_name(obj_id): obj_id // 6 for obj_id in range(self.args.num_phold_procs)}
+        simulator = ParallelSimulationEngine(build_lookahead_phold, partition, builder_args=(self.args,))
+        results = simulator.simulate(self.args.time_max)
+        self.assertEqual(results.num_events, num_events)
+        self.assertIsNone(results.results)
+
+    def test_partition_errors(self):
+        with self.assertRaisesRegex(SimulatorError, 'does not assign simulation objects'):
+            ParallelSimulationEngine(build_lookahead_phold, {obj_name(0): 0},
+                                     builder_args=(self.args,)).partition_of_objects()
+        with self.assertRaisesRegex(SimulatorError, 'assigns 2 simulation objects, but the model has 12'):
+            ParallelSimulationEngine(build_lookahead_phold, [0, 1], builder_args=(self.args,)).partition_of_objects()
+        with self.assertRaisesRegex(SimulatorError, 'partitions must be non-negative ints'):
+            ParallelSimulationEngine(build_lookahead_phold, [-1] * 12,
+                                     builder_args=(self.args,)).partition_of_objects()
+
+    def test_lookahead_errors(self):
+        # PholdSimulationObject declares no lookahead
+        with self.assertRaisesRegex(SimulatorError, r'(?s)partition \d failed:.*has no positive lookahead'):
+            self.run_parallel(self.args, 2, builder=build_phold)
+        with self.assertRaisesRegex(SimulatorError, r'(?s)partition \d failed:.*in another partition with delay'):
+            self.run_parallel(self.args, 2, builder=build_short_delay_phold)
+
+    def test_optimistic_simulation(self):
+        # optimistic simulation needs no lookahead, and its results are identical to the sequential engine's
+        simulator = SimulationEngine()
+        simulator.add_objects(build_zero_lookahead_phold(self.args))
+        simulator.initialize()
+        num_events = simulator.simulate(self.args.time_max).num_events
+        states = {sim_obj.name: (sim_obj.time, sim_obj.num_events) for sim_obj in simulator.get_objects()}
+        for num_partitions, gvt_interval in [(1, 1000), (2, 1000), (3, 5)]:
+            _, results = self.run_parallel(self.args, num_partitions, builder=build_zero_lookahead_phold,
+                                           collect=object_time_and_num_events, synchronization='optimistic',
+                                           gvt_interval=gvt_interval)
+            self.assertEqual(results.num_events, num_events)
+            self.assertEqual(sum(results.event_counts.values()), results.num_events)
+            self.assertEqual(results.event_counts, simulator.event_counts)
+            self.assertEqual(results.results, states)
+            if num_partitions == 1:
+                self.assertEqual(results.num_rolled_back, 0)
+
+        # the PHOLD example runs unchanged; its processes share the global random number generator, which
+        # rollbacks restore, so its results depend on the partition, but not on when rollbacks occur; because
+        # each partition's generator has the same seed, processes in different partitions send simultaneous events
+        phold_results = []
+        for gvt_interval in [1000, 5, 1]:
+            _, results = self.run_parallel(self.args, 3, builder=build_seeded_phold,
+                                           collect=object_time_and_num_events,
+                                           synchronization='optimistic', gvt_interval=gvt_interval)
+            self.assertLess(0, results.num_rolled_back)
+            phold_results.append((results.num_events, results.event_counts, results.results))
+        self.assertEqual(phold_results[1], phold_results[0])
+        self.assertEqual(phold_results[2], phold_results[0])
+
+        # cancellations and reschedulings aren't rolled back
+        with self.assertRaisesRegex(SimulatorError, r"(?s)partition \d failed:.*doesn't support cancelling events"):
+            self.run_parallel(self.args, 2, builder=build_cancelling_phold, synchronization='optimistic')
+        with self.assertRaisesRegex(SimulatorError,
+                                    r"(?s)partition \d failed:.*doesn't support rescheduling events"):
+            self.run_parallel(self.args, 2, builder=build_rescheduling_phold, synchronization='optimistic')
+
+        with self.assertRaisesRegex(SimulatorError, "synchronization must be 'conservative' or 'optimistic'"):
+            ParallelSimulationEngine(build_phold, [0], synchronization='pessimistic')
+
+    def test_phold_scaling_benchmark(self):
+        # run PHOLD on 1 to N cores
+        print()
+        print('Parallel PHOLD benchmark')
+        print('synchronization\t# partitions\t# events\trun time (s)\tspeedup\t# rolled back'.expandtabs(17))
+        args = Namespace(time_max=100, frac_self_events=0.5, num_phold_procs=64, seed=5)
+        start_time = time.perf_counter()
+        num_events, _, _ = self.run_sequential(args)
+        sequential_time = time.perf_counter() - start_time
+        print("{}\t{}\t{}\t{:8.3f}\t{:8.2f}".format('sequential', 1, num_events, sequential_time, 1).expandtabs(17))
+        for synchronization in [ParallelSimulationEngine.CONSERVATIVE, ParallelSimulationEngine.OPTIMISTIC]:
+            num_partitions = 1
+            while num_partitions <= multiprocessing.cpu_count():
+                start_time = time.perf_counter()
+                _, results = self.run_parallel(args, num_partitions, synchronization=synchronization)
+                run_time = time.perf_counter() - start_time
+                self.assertEqual(results.num_events, num_events)
+                print("{}\t{}\t{}\t{:8.3f}\t{:8.2f}\t{}".format(synchronization, num_partitions, results.num_events,
+                                                                run_time, sequential_time / run_time,
+                                                                results.num_rolled_back).expandtabs(17))
+                num_partitions *= 2
@@ -0,0 +1,141 @@
+""" Test parameter sweeps
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-17
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from de_sim.errors import SimulatorError
+from de_sim.examples.sirs import SIR
+from de_sim.parameter_sweep import ParameterSweep, _run_point, grid, latin_hypercube
+from de_sim.simulation_config import SimulationConfig
+
+
+def build_sir(parameters, seed, sir_args):
+    sir = SIR('sir', beta=parameters['beta'], gamma=parameters['gamma'], **sir_args)
+    sir.random_state.seed(seed)
+    return [sir]
+
+
+def build_failing_sir(parameters, seed, sir_args):
+    if parameters['gamma'] == 0.2:
+        raise ValueError('cannot build gamma 0.2')
+    return build_sir(parameters, seed, sir_args)
+
+
+def final_state(sim_obj):
+    return [sim_obj.s, sim_obj.i]
+
+
+class TestParameterSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.tmp_dir, 'sweep')
+        self.sir_args = dict(s=98, i=2, N=100, recording_period=10)
+        self.points = grid(dict(beta=[0.2, 0.3], gamma=[0.1, 0.15, 0.2]))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_sweep(self, model_builder=build_sir, points=None, **kwargs):
+        if points is None:
+            points = self.points
+        return ParameterSweep(model_builder, points, SimulationConfig(50, output_dir=self.output_dir),
+                              builder_args=(self.sir_args,), seed=7, max_workers=2, **kwargs)
+
+    def test_grid(self):
+        self.assertEqual(len(self.points), 6)
+        self.assertEqual(self.points[0], dict(beta=0.2, gamma=0.1))
+        self.assertEqual(self.points[1], dict(beta=0.2, gamma=0.15))
+        self.assertEqual(self.points[5], dict(beta=0.3, gamma=0.2))
+        self.assertEqual(grid({}), [{}])
+
+    def test_latin_hypercube(self):
+        num_points = 10
+        points = latin_hypercube(dict(beta=(0.1, 0.5), gamma=(1, 2)), num_points, seed=3)
+        self.assertEqual(len(points), num_points)
+        self.assertEqual(points, latin_hypercube(dict(beta=(0.1, 0.5), gamma=(1, 2)), num_points, seed=3))
+        # each stratum of each parameter is sampled once
+        for name, (low, high) in dict(beta=(0.1, 0.5), gamma=(1, 2)).items():
+            strata = sorted(int((point[name] - low) / (high - low) * num_points) for point in points)
+            self.assertEqual(strata, list(range(num_points)))
+        json.dumps(points)
+
+        with self.assertRaisesRegex(SimulatorError, "range of 'beta' .* is empty"):
+            latin_hypercube(dict(beta=(1, 0)), 3)
+
+    def test_sweep(self):
+        sweep = self.make_sweep()
+        records = list(sweep.run(collect=final_state))
+        self.assertEqual(sorted(record['point'] for record in records), list(range(6)))
+        self.assertEqual(sweep.remaining_points(), [])
+        results = sweep.results()
+        self.assertEqual(results, sorted(records, key=lambda record: record['point']))
+        for record in results:
+            self.assertEqual(record['parameters'], self.points[record['point']])
+            self.assertLess(0, record['num_events'])
+            self.assertLessEqual(sum(record['results']['sir']), 100)
+            # each point is identical to a sequential run with the same seed
+            self.assertEqual(record, _run_point(build_sir, (self.sir_args,), record['point'], record['parameters'],
+                                                record['seed'], SimulationConfig(50), final_state, None))
+        self.assertEqual(list(sweep.run()), [])
+
+        # sweeps are reproducible
+        expected = results
+        shutil.rmtree(self.output_dir)
+        list(self.make_sweep().run(collect=final_state))
+        self.assertEqual(self.make_sweep().results(), expected)
+
+    def test_resume(self):
+        sweep = self.make_sweep()
+        records = sweep.run(collect=final_state)
+        first = [next(records), next(records)]
+        records.close()
+        self.assertEqual(len(sweep.results()), 2)
+
+        # a crash while writing a record leaves an incomplete line
+        with open(sweep.results_file(), 'a') as results_file:
+            results_file.write('{"point": 5, "param')
+        sweep = self.make_sweep()
+        self.assertEqual(len(sweep.remaining_points()), 4)
+        records = list(sweep.run(collect=final_state))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(sorted(record['point'] for record in first + records), list(range(6)))
+        with open(sweep.results_file()) as results_file:
+            self.assertEqual(len(results_file.readlines()), 6)
+
+        # a failing point stops the sweep, and keeps the points that finished
+        shutil.rmtree(self.output_dir)
+        sweep = self.make_sweep(model_builder=build_failing_sir)
+        with self.assertRaisesRegex(ValueError, 'cannot build gamma 0.2'):
+            list(sweep.run())
+        self.assertNotIn(2, [record['point'] for record in sweep.results()])
+        self.assertIn(2, sweep.remaining_points())
+
+    def test_errors(self):
+        with self.assertRaisesRegex(SimulatorError, 'needs an output_dir'):
+            ParameterSweep(build_sir, self.points, SimulationConfig(10))
+        with open(os.path.join(self.tmp_dir, 'file'), 'w'):
+            pass
+        with self.assertRaisesRegex(SimulatorError, 'must be a directory'):
+            ParameterSweep(build_sir, self.points, SimulationConfig(10, output_dir=os.path.join(self.tmp_dir, 'file')))
+
+        # the results store belongs to another sweep
+        sweep = self.make_sweep()
+        list(sweep.run())
+        with self.assertRaisesRegex(SimulatorError, 'is not in this sweep'):
+            self.make_sweep(points=self.points[:2]).remaining_points()
+        with self.assertRaisesRegex(SimulatorError, 'is not in this sweep'):
+            list(self.make_sweep(points=list(reversed(self.points))).run())
+        with open(sweep.results_file(), 'a') as results_file:
+            results_file.write('not json\n')
+        with self.assertRaisesRegex(SimulatorError, 'cannot parse record'):
+            sweep.results()
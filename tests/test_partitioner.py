@@ -0,0 +1,131 @@
+""" Test the traffic-aware partitioner
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-19
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from argparse import Namespace
+import unittest
+
+from de_sim.errors import SimulatorError
+from de_sim.examples.phold import (LookaheadPholdSimulationObject, MessageSentToOtherObject, MESSAGE_TYPES,
+                                   build_phold, obj_name)
+from de_sim.parallel_simulation_engine import ParallelSimulationEngine
+from de_sim.partitioner import TrafficPartitioner, TrafficProfilingSimulationEngine
+from de_sim.simulation_engine import SimulationEngine
+from de_sim.visualize import EventCoordinates, EventMessage
+
+
+class ClusteredPhold(LookaheadPholdSimulationObject):
+    # sends most events to the processes in its cluster, whose indices are congruent modulo the number of clusters
+
+    def handle_simulation_event(self, event):
+        num_clusters = self.args.num_clusters
+        if self.random.random() < 0.95:
+            index = self.random.randrange(self.object_id % num_clusters, self.args.num_phold_procs, num_clusters)
+        else:
+            index = self.random.randrange(self.args.num_phold_procs)
+        self.send_event(self.delay(), index, MessageSentToOtherObject())
+
+    event_handlers = [(sim_msg_type, 'handle_simulation_event') for sim_msg_type in MESSAGE_TYPES]
+
+    messages_sent = MESSAGE_TYPES
+
+
+def build_clustered_phold(args):
+    return build_phold(args, ClusteredPhold)
+
+
+def clique(names, weight):
+    return {(sender, receiver): weight for sender in names for receiver in names}
+
+
+class TestTrafficPartitioner(unittest.TestCase):
+
+    def setUp(self):
+        self.args = Namespace(time_max=20, frac_self_events=0, num_phold_procs=16, num_clusters=4, seed=4)
+
+    def test_partition(self):
+        # two cliques joined by a light edge
+        traffic = {**clique('abcd', 10), **clique('efgh', 10), ('d', 'e'): 1}
+        partitioner = TrafficPartitioner(traffic, 2)
+        partition_of = partitioner.partition()
+        self.assertEqual(partitioner.cut(partition_of), 1)
+        self.assertEqual(len({partition_of[name] for name in 'abcd'}), 1)
+        self.assertEqual(sorted(partitioner.partition_loads(partition_of)), [164, 165])
+
+        # one partition
+        partitioner = TrafficPartitioner(traffic, 1)
+        self.assertEqual(set(partitioner.partition().values()), {0})
+
+        # objects without traffic are balanced by their loads
+        partitioner = TrafficPartitioner({}, 3, loads={name: 1 for name in 'abcdef'})
+        self.assertEqual(partitioner.partition_loads(partitioner.partition()), [2, 2, 2])
+
+        # overloaded partitions whose nodes fit nowhere else swap them for lighter nodes
+        partitioner = TrafficPartitioner({}, 2, loads=dict(a=3, b=3, c=2, d=2), imbalance=0)
+        partition_of = partitioner._refine(partitioner.graph, partitioner.loads, dict(a=0, b=0, c=1, d=1))
+        self.assertEqual(partitioner.partition_loads(partition_of), [5, 5])
+
+    def test_multilevel_partition(self):
+        # a ring of 8 cliques of 25 objects, with interleaved names
+        num_cliques = 8
+        cliques = [[obj_id * num_cliques + index for obj_id in range(25)] for index in range(num_cliques)]
+        traffic = {}
+        for index, names in enumerate(cliques):
+            traffic.update(clique(names, 5))
+            traffic[(names[0], cliques[(index + 1) % num_cliques][1])] = 1
+        partitioner = TrafficPartitioner(traffic, 4)
+        partition_of = partitioner.partition()
+        for names in cliques:
+            self.assertEqual(len({partition_of[name] for name in names}), 1)
+        self.assertTrue(all(load <= partitioner.capacity() for load in partitioner.partition_loads(partition_of)))
+        self.assertLessEqual(partitioner.cut(partition_of), num_cliques)
+
+    def test_from_trace(self):
+        trace = [EventMessage('Msg', EventCoordinates(sender, 0.), EventCoordinates(receiver, 1.))
+                 for sender, receiver in ['ab', 'ba', 'ab', 'cd', 'dc', 'bc', 'aa']]
+        partitioner = TrafficPartitioner.from_trace(trace, 2, imbalance=0.1)
+        self.assertEqual(partitioner.graph['a'], {'b': 3})
+        self.assertEqual(partitioner.loads, dict(a=3, b=3, c=3, d=2))
+        partition_of = partitioner.partition()
+        self.assertEqual(partitioner.cut(partition_of), 1)
+
+    def test_from_profile(self):
+        simulator = TrafficProfilingSimulationEngine()
+        simulator.add_objects(build_clustered_phold(self.args))
+        simulator.initialize()
+        num_events = simulator.simulate(self.args.time_max).num_events
+        # each event sent was executed, or remains in the event queue
+        self.assertEqual(sum(simulator.traffic.values()), num_events + len(simulator.event_queue.backend))
+
+        # the loads of few objects in a short run vary, so allow room for a partition of the clusters
+        partitioner = TrafficPartitioner.from_profile(build_clustered_phold, self.args.time_max, 4,
+                                                      builder_args=(self.args,), imbalance=0.2)
+        partition_of = partitioner.partition()
+        self.assertEqual(set(partition_of), {obj_name(obj_id) for obj_id in range(self.args.num_phold_procs)})
+        self.assertTrue(all(load <= partitioner.capacity() for load in partitioner.partition_loads(partition_of)))
+        # a partition of contiguous processes splits every cluster
+        contiguous = {obj_name(obj_id): obj_id // 4 for obj_id in range(self.args.num_phold_procs)}
+        self.assertLess(partitioner.cut(partition_of) * 4, partitioner.cut(contiguous))
+
+        # a parallel engine runs the partition
+        simulator = SimulationEngine()
+        simulator.add_objects(build_clustered_phold(self.args))
+        simulator.initialize()
+        num_events = simulator.simulate(self.args.time_max).num_events
+        results = ParallelSimulationEngine(build_clustered_phold, partition_of,
+                                           builder_args=(self.args,)).simulate(self.args.time_max)
+        self.assertEqual(results.num_events, num_events)
+
+    def test_errors(self):
+        with self.assertRaisesRegex(SimulatorError, 'num_partitions .* must be positive'):
+            TrafficPartitioner({}, 0)
+        with self.assertRaisesRegex(SimulatorError, 'imbalance .* must be non-negative'):
+            TrafficPartitioner({}, 2, imbalance=-1)
+        with self.assertRaisesRegex(SimulatorError, 'loads must be non-negative'):
+            TrafficPartitioner({}, 2, loads=dict(a=-1))
+        with self.assertRaisesRegex(SimulatorError, "involves an object without a load"):
+            TrafficPartitioner({('a', 'b'): 1}, 2, loads=dict(a=1))
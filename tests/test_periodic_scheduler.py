@@ -0,0 +1,150 @@
+""" Test the periodic scheduler
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-10
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+import gc
+import time
+import unittest
+
+from de_sim.errors import SimulatorError
+from de_sim.periodic_scheduler import NextPeriod, PeriodicScheduler
+from de_sim.simulation_engine import SimulationEngine
+from de_sim.simulation_object import ApplicationSimulationObject
+from de_sim.template_sim_objs import NextEvent, TemplatePeriodicSimulationObject
+
+
+class Recorder(TemplatePeriodicSimulationObject):
+    # records the times and order of its events in a shared log
+
+    def __init__(self, name, period, log, start_time=0.):
+        self.log = log
+        super().__init__(name, period, start_time=start_time)
+
+    def handle_event(self):
+        self.log.append((self.time, self.name))
+
+
+class SelfSender(ApplicationSimulationObject):
+    # records the times and order of the events it sends itself at times 1 and 2 in a shared log
+
+    def __init__(self, name, log):
+        self.log = log
+        super().__init__(name)
+
+    def send_initial_events(self):
+        for time_ in [1, 2]:
+            self.send_event(time_, self, NextEvent())
+
+    def handle_simulation_event(self, event):
+        self.log.append((self.time, self.name))
+
+    def get_state(self):
+        return ''    # pragma: no cover
+
+    event_handlers = [(NextEvent, 'handle_simulation_event')]
+
+    # register the message type sent
+    messages_sent = [NextEvent]
+
+
+class TestPeriodicScheduler(unittest.TestCase):
+
+    def make_simulation(self, coalesce, periods, start_times=None):
+        simulator = SimulationEngine()
+        simulator.coalesce_periodic_events = coalesce
+        log = []
+        if start_times is None:
+            start_times = [0] * len(periods)
+        recorders = [Recorder('recorder_{}'.format(index), period, log, start_time=start_time)
+                     for index, (period, start_time) in enumerate(zip(periods, start_times))]
+        simulator.add_objects(recorders)
+        simulator.initialize()
+        return simulator, recorders, log
+
+    def test_periodic_scheduler(self):
+        periods = [2, 1, 2, 1, 0.5]
+        start_times = [0, 0, 0, 0, 1]
+        simulator, recorders, log = self.make_simulation(True, periods, start_times)
+        scheduler = simulator.periodic_scheduler
+        self.assertIsInstance(scheduler, PeriodicScheduler)
+        self.assertIs(simulator.get_object(PeriodicScheduler.NAME), scheduler)
+        self.assertEqual(set(scheduler.groups), {(0, 2), (0, 1), (1, 0.5)})
+        # one event per group
+        self.assertEqual(simulator.event_queue.len(), 3)
+        num_events = simulator.simulate(4).num_events
+
+        # the events are the same as those of self-scheduling objects, and execute in the same order
+        self_scheduled_simulator, self_scheduled_recorders, self_scheduled_log = \
+            self.make_simulation(False, periods, start_times)
+        self.assertIsNone(self_scheduled_simulator.periodic_scheduler)
+        self.assertEqual(self_scheduled_simulator.event_queue.len(), 5)
+        self.assertEqual(self_scheduled_simulator.simulate(4).num_events, num_events)
+        self.assertEqual(log, self_scheduled_log)
+
+        # the members' events are counted as if they were self-scheduled
+        self.assertEqual(num_events, len(log))
+        for recorder, self_scheduled_recorder in zip(recorders, self_scheduled_recorders):
+            self.assertEqual(simulator.event_counts[(recorder.object_id, NextEvent)],
+                             self_scheduled_simulator.event_counts[(self_scheduled_recorder.object_id, NextEvent)])
+        self.assertEqual(simulator.event_counts[(scheduler.object_id, NextPeriod)], 5 + 3 + 7)
+
+    def test_order_with_other_objects(self):
+        def simulate(coalesce=None):
+            simulator = SimulationEngine()
+            if coalesce is not None:
+                simulator.coalesce_periodic_events = coalesce
+            log = []
+            simulator.add_objects([SelfSender('q', log), Recorder('z', 1, log)])
+            simulator.initialize()
+            simulator.simulate(2)
+            return simulator, log
+
+        # by default, periodic objects schedule their own events, which execute in their own order
+        simulator, log = simulate()
+        self.assertFalse(simulator.coalesce_periodic_events)
+        self.assertIsNone(simulator.periodic_scheduler)
+        self.assertEqual([sim_obj.name for sim_obj in simulator.get_objects()], ['q', 'z'])
+        self.assertEqual(log, [(0, 'z'), (1, 'q'), (1, 'z'), (2, 'q'), (2, 'z')])
+
+        # coalesced periodic objects execute in the scheduler's order
+        simulator, log = simulate(coalesce=True)
+        self.assertIn(PeriodicScheduler.NAME, [sim_obj.name for sim_obj in simulator.get_objects()])
+        self.assertEqual(log, [(0, 'z'), (1, 'z'), (1, 'q'), (2, 'z'), (2, 'q')])
+
+    def test_unregister(self):
+        simulator, recorders, log = self.make_simulation(True, [1, 1])
+        scheduler = simulator.periodic_scheduler
+        simulator.simulate(2)
+        simulator.delete_object(recorders[0])
+        self.assertIsNone(recorders[0].periodic_scheduler)
+        with self.assertRaisesRegex(SimulatorError, "'recorder_0' is not registered with the periodic scheduler"):
+            scheduler.unregister(recorders[0])
+
+        # unregistering a group's last member cancels the group's event
+        scheduler.unregister(recorders[1])
+        self.assertEqual(scheduler.groups, {})
+        self.assertTrue(simulator.event_queue.empty())
+
+        # reset deletes the scheduler
+        simulator.reset()
+        self.assertIsNone(simulator.periodic_scheduler)
+
+    def test_periodic_scheduler_benchmark(self):
+        # many periodic objects with a few distinct periods
+        print()
+        print('Periodic scheduler benchmark')
+        print('# objects\tcoalesce\t# events\trun time (s)\tus/event'.expandtabs(15))
+        for num_objects in [100, 500]:
+            for coalesce in [False, True]:
+                simulator, _, _ = self.make_simulation(coalesce, [1, 2, 5, 10] * (num_objects // 4))
+                gc.disable()
+                start_time = time.process_time()
+                num_events = simulator.simulate(20).num_events
+                run_time = time.process_time() - start_time
+                gc.enable()
+                print("{}\t{}\t{}\t{:8.3f}\t{:8.2f}".format(num_objects, coalesce, num_events, run_time,
+                                                           1e6 * run_time / num_events).expandtabs(15))
@@ -0,0 +1,114 @@
+""" Test running independent replications of a simulation
+
+:Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
+:Date: 2020-08-14
+:Copyright: 2020, Karr Lab
+:License: MIT
+"""
+
+from argparse import Namespace
+import multiprocessing
+import time
+import unittest
+
+from de_sim.errors import SimulatorError
+from de_sim.examples.phold import build_phold
+from de_sim.examples.sirs import SIR
+from de_sim.replications import Replications, _run_replication
+
+
+def build_seeded_phold(seed, args):
+    # PHOLD draws from the global random number generator, which is seeded by the replication
+    return build_phold(args)
+
+
+def build_sir(seed, sir_args):
+    sir = SIR('sir', **sir_args)
+    sir.random_state.seed(seed)
+    return [sir]
+
+
+def build_failing_model(seed):
+    raise ValueError('cannot build seed {}'.format(seed))
+
+
+def num_events(sim_obj):
+    return sim_obj.num_events
+
+
+def final_state(sim_obj):
+    return (sim_obj.s, sim_obj.i)
+
+
+class TestReplications(unittest.TestCase):
+
+    def setUp(self):
+        self.phold_args = Namespace(time_max=10, frac_self_events=0.5, num_phold_procs=10)
+        self.sir_args = dict(s=98, i=2, N=100, beta=0.3, gamma=0.15, recording_period=10)
+
+    def test_seeds(self):
+        seeds = Replications(build_sir, 5, seed=17).seeds()
+        self.assertEqual(len(seeds), 5)
+        self.assertEqual(len(set(seeds)), 5)
+        self.assertEqual(seeds, Replications(build_sir, 5, seed=17).seeds())
+        self.assertNotEqual(seeds, Replications(build_sir, 5, seed=18).seeds())
+        # a replication's seed doesn't depend on the number of replications
+        self.assertEqual(seeds[:3], Replications(build_sir, 3, seed=17).seeds())
+        self.assertEqual(len(set(Replications(build_sir, 3).seeds()) | set(Replications(build_sir, 3).seeds())), 6)
+
+        with self.assertRaisesRegex(SimulatorError, 'must be non-negative'):
+            Replications(build_sir, -1)
+
+    def test_replications(self):
+        replications = Replications(build_sir, 6, builder_args=(self.sir_args,), seed=3, max_workers=2)
+        results = list(replications.run(60, collect=final_state))
+        self.assertEqual(sorted(result.replication for result in results), list(range(6)))
+        seeds = replications.seeds()
+        for result in results:
+            self.assertEqual(result.seed, seeds[result.replication])
+            # each replication is identical to a sequential run with the same seed
+            self.assertEqual(result, _run_replication(build_sir, (self.sir_args,), result.replication, result.seed,
+                                                      60, final_state, None))
+        # replications are independent
+        self.assertLess(1, len(set(result.results['sir'] for result in results)))
+        # and reproducible
+        self.assertEqual(sorted(results), sorted(replications.run(60, collect=final_state)))
+
+        # the PHOLD example
+        results = list(Replications(build_seeded_phold, 3, builder_args=(self.phold_args,), seed=1).run(10))
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertLess(0, result.simulation_return_value.num_events)
+            self.assertIsNone(result.results)
+
+        self.assertEqual(list(Replications(build_sir, 0).run(10)), [])
+
+    def test_streaming(self):
+        # results can be consumed before all replications finish
+        results = Replications(build_seeded_phold, 20, builder_args=(self.phold_args,), seed=2, max_workers=1).run(
+            10, collect=num_events)
+        result = next(results)
+        self.assertEqual(sum(result.results.values()), result.simulation_return_value.num_events)
+        results.close()
+
+    def test_errors(self):
+        with self.assertRaisesRegex(ValueError, 'cannot build seed'):
+            list(Replications(build_failing_model, 2).run(10))
+
+    def test_replications_benchmark(self):
+        print()
+        print('Replications benchmark')
+        print('runner\t# replications\trun time (s)\tspeedup'.expandtabs(17))
+        args = Namespace(time_max=200, frac_self_events=0.5, num_phold_procs=20)
+        replications = Replications(build_seeded_phold, 2 * multiprocessing.cpu_count(), builder_args=(args,), seed=5)
+        start_time = time.perf_counter()
+        for replication, seed in enumerate(replications.seeds()):
+            _run_replication(build_seeded_phold, (args,), replication, seed, args.time_max, None, None)
+        sequential_time = time.perf_counter() - start_time
+        print("{}\t{}\t{:8.3f}\t{:8.2f}".format('sequential', replications.num_replications, sequential_time,
+                                                1).expandtabs(17))
+        start_time = time.perf_counter()
+        self.assertEqual(len(list(replications.run(args.time_max))), replications.num_replications)
+        run_time = time.perf_counter() - start_time
+        print("{}\t{}\t{:8.3f}\t{:8.2f}".format('process pool', replications.num_replications, run_time,
+                                                sequential_time / run_time).expandtabs(17))
@@ -107,6 +107,18 @@ class TestSimulationConfig(unittest.TestCase):
             cfg = SimulationConfig(self.time_max, object_memory_change_interval=-3)
             cfg.validate_individual_fields()
 
+        with self.assertRaisesRegex(SimulatorError, "validation .* must be one of"):
+            SimulationConfig(self.time_max, validation='some').validate_individual_fields()
+
+        with self.assertRaisesRegex(SimulatorError, "validation_sample_interval .* must be positive"):
+            SimulationConfig(self.time_max, validation_sample_interval=0).validate_individual_fields()
+
+    def test_send_check_interval(self):
+        self.assertEqual(SimulationConfig(self.time_max).send_check_interval(), 1)
+        self.assertEqual(SimulationConfig(self.time_max, validation='sampled',
+                                          validation_sample_interval=10).send_check_interval(), 10)
+        self.assertEqual(SimulationConfig(self.time_max, validation='off').send_check_interval(), float('inf'))
+
     def test_all_fields(self):
         profile = True
         kwargs = dict(time_max=self.time_max,
@@ -5,12 +5,15 @@
 :License: MIT
 """
 
+from argparse import Namespace
 from capturer import CaptureOutput
 from datetime import datetime
 from logging2 import LogRegister
 from logging2.levels import LogLevel
 import contextlib
 import cProfile
+import gc
+import numpy
 import os
 import pstats
 import random
@@ -22,12 +25,14 @@ import unittest
 import warnings
 
 from de_sim.config import core
+from de_sim.examples.phold import PholdSimulationObject, obj_name as phold_obj_name
+from de_sim.examples.sirs import SIR
 from de_sim.simulation_metadata import SimulationMetadata, AuthorMetadata
 from de_sim.errors import SimulatorError
 from de_sim.simulation_config import SimulationConfig
 from de_sim.simulation_engine import SimulationEngine
 from de_sim.simulation_message import SimulationMessage
-from de_sim.simulation_object import SimulationObject, ApplicationSimulationObject
+from de_sim.simulation_object import SimulationObject, ApplicationSimulationObject, EventQueue
 from de_sim.template_sim_objs import TemplatePeriodicSimulationObject
 from de_sim.testing.some_message_types import InitMsg, Eg1
 from de_sim.utilities import FastLogger
@@ -113,6 +118,112 @@ class CyclicalMessagesSimulationObject(ApplicationSimulationObject):
     messages_sent = ALL_MESSAGE_TYPES
 
 
+class RetainingSimulationObject(BasicExampleSimulationObject):
+
+    # this object's handler keeps the events it handles
+    RETAINS_EVENTS = True
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.events = []
+
+    def handle_event(self, event):
+        self.events.append(event)
+        self.send_event(1, self, Eg1())
+
+    event_handlers = [(sim_msg_type, 'handle_event') for sim_msg_type in ALL_MESSAGE_TYPES]
+
+    messages_sent = ALL_MESSAGE_TYPES
+
+
+class TracedMsg(SimulationMessage):
+    "A message whose conversions to strings are counted"
+
+
+def count_str_calls(message):
+    count_str_calls.num_calls += 1
+    return SimulationMessage.__str__(message)
+
+
+# SimulationMessage classes keep only their docstrings and attributes, so add the method afterward
+TracedMsg.__str__ = count_str_calls
+
+
+class TracedSimulationObject(BasicExampleSimulationObject):
+
+    def send_initial_events(self):
+        self.send_event(1, self, TracedMsg())
+
+    def handle_event(self, event):
+        self.send_event(1, self, TracedMsg())
+
+    event_handlers = [(TracedMsg, 'handle_event')]
+
+    messages_sent = [TracedMsg]
+
+
+class UncheckedSimulationObject(BasicExampleSimulationObject):
+
+    def handle_event(self, event):
+        self.send_event(1, self, InitMsg())
+        if self.time == 2:
+            # Eg1 messages are not registered to be sent
+            self.send_event(1, self, Eg1())
+
+    event_handlers = [(InitMsg, 'handle_event'), (Eg1, 'handle_event')]
+
+    messages_sent = [InitMsg]
+
+
+class Tick(SimulationMessage):
+    "A synchronous time step"
+
+
+class Cell(BasicExampleSimulationObject):
+    # a synchronous model, whose objects' state is in a shared array
+
+    def __init__(self, name, values, index):
+        super().__init__(name)
+        self.values = values
+        self.index = index
+
+    def send_initial_events(self):
+        self.send_event(1, self, Tick())
+
+    def handle_tick(self, event):
+        self.values[self.index] = 0.5 * self.values[self.index] + self.index
+        self.send_event(1, self, Tick())
+
+    event_handlers = [(Tick, 'handle_tick')]
+
+    messages_sent = [Tick]
+
+
+class VectorizedCell(Cell):
+    # handles the ticks of many cells in one vectorized update
+
+    class_event_handler = 'handle_ticks'
+
+    @classmethod
+    def handle_ticks(cls, objects, event_lists):
+        cls.num_calls += 1
+        indices = numpy.array([obj.index for obj in objects])
+        values = objects[0].values
+        values[indices] = 0.5 * values[indices] + indices
+        for obj in objects:
+            obj.send_event(1, obj, Tick())
+
+    num_calls = 0
+
+
+class EagerVectorizedCell(VectorizedCell):
+    # incorrectly schedules events for the current time
+
+    @classmethod
+    def handle_ticks(cls, objects, event_lists):
+        objects[-1].send_event(0, objects[0], Tick())
+
+
 class PeriodicSimulationObject(TemplatePeriodicSimulationObject):
     """ Self-clocking ApplicationSimulationObject
 
@@ -309,6 +420,266 @@ class TestSimulationEngine(unittest.TestCase):
         self.simulator.reset()
         self.assertEqual(len(self.simulator.simulation_objects), 0)
 
+    def test_provide_event_counts(self):
+        # by default, events are counted per simulation object; they can be counted per type instead
+        self.assertTrue(self.simulator.count_events_by_object)
+        self.simulator.count_events_by_object = False
+        objs = [ExampleSimulationObject(obj_name(i)) for i in range(3)] + [TracedSimulationObject('traced')]
+        self.simulator.add_objects(objs)
+        self.simulator.initialize()
+        self.assertEqual(self.simulator.simulate(5.0).num_events, 14)
+        self.assertEqual(self.simulator.event_counts, {(ExampleSimulationObject, InitMsg): 9,
+                                                       (TracedSimulationObject, TracedMsg): 5})
+        self.assertEqual(self.simulator.provide_event_counts().split('\n'),
+                         ['Count\tEvent type (Object type - event type)',
+                          '9\tExampleSimulationObject - InitMsg',
+                          '5\tTracedSimulationObject - TracedMsg'])
+
+        self.simulator.count_events_by_object = True
+        self.simulator.event_counts.clear()
+        self.simulator.simulate(10.0)
+        self.assertEqual(self.simulator.event_counts[(objs[3].object_id, TracedMsg)], 5)
+        self.simulator.delete_object(objs[3])
+        event_count_lines = self.simulator.provide_event_counts().split('\n')
+        self.assertEqual(event_count_lines[0], 'Count\tEvent type (Object type - object name - event type)')
+        self.assertIn('5\tdeleted object 3 - TracedMsg', event_count_lines)
+        for obj in objs[:3]:
+            self.assertIn('2\tExampleSimulationObject - {} - InitMsg'.format(obj.name), event_count_lines)
+
+        self.simulator.reset()
+        self.assertEqual(len(self.simulator.event_counts), 0)
+
+    def test_get_object_by_id(self):
+        objs = [BasicExampleSimulationObject(obj_name(i)) for i in range(3)]
+        self.assertTrue(all(obj.object_id is None for obj in objs))
+        self.simulator.add_objects(objs)
+        self.assertEqual([obj.object_id for obj in objs], [0, 1, 2])
+        for obj in objs:
+            self.assertEqual(self.simulator.get_object_by_id(obj.object_id), obj)
+
+        # deleting an object leaves the other objects' ids unchanged
+        self.simulator.delete_object(objs[1])
+        self.assertEqual(objs[1].object_id, None)
+        self.assertEqual(self.simulator.get_object_by_id(2), objs[2])
+        for object_id in [1, 3, -1, None, obj_name(0)]:
+            with self.assertRaisesRegex(SimulatorError, "cannot get simulation object with id"):
+                self.simulator.get_object_by_id(object_id)
+        obj = BasicExampleSimulationObject(obj_name(3))
+        self.simulator.add_object(obj)
+        self.assertEqual(obj.object_id, 3)
+
+        self.simulator.reset()
+        self.assertEqual(self.simulator.simulation_objects_by_id, [])
+        self.simulator.add_object(obj)
+        self.assertEqual(obj.object_id, 0)
+
+    def test_compile(self):
+        objs = [BasicExampleSimulationObject('basic'), TracedSimulationObject('traced'),
+                BasicExampleSimulationObject('basic_2')]
+        self.assertEqual(objs[0]._event_handlers, None)
+        self.simulator.add_objects(objs)
+        self.simulator.initialize()
+
+        def permitted(sender, receiver, message_type):
+            return self.simulator.send_permissions[sender._send_permissions_offset +
+                                                   receiver._receive_permissions_offset +
+                                                   message_type._message_type_id]
+
+        # BasicExampleSimulationObjects send InitMsg and Eg1 and handle InitMsg, while
+        # TracedSimulationObjects send and handle TracedMsg
+        self.assertTrue(permitted(objs[0], objs[2], InitMsg))
+        self.assertTrue(permitted(objs[1], objs[1], TracedMsg))
+        self.assertFalse(permitted(objs[0], objs[0], Eg1))
+        self.assertFalse(permitted(objs[0], objs[1], InitMsg))
+        self.assertFalse(permitted(objs[1], objs[0], TracedMsg))
+        self.assertEqual(sum(self.simulator.send_permissions), 2)
+        self.assertIs(objs[0]._event_handlers, objs[2]._event_handlers)
+        self.assertEqual([handler for handler in objs[1]._event_handlers if handler is not None],
+                         [TracedSimulationObject.handle_event])
+
+        # sends that are not permitted are reported by the registration checks
+        with self.assertRaisesRegex(SimulatorError, "not registered to send 'InitMsg' messages"):
+            objs[1].send_event(1, objs[0], InitMsg())
+        with self.assertRaisesRegex(SimulatorError, "not registered to receive 'Eg1' messages"):
+            objs[0].send_event(1, objs[2], Eg1())
+        with self.assertRaisesRegex(SimulatorError, "messages must be instances of type 'SimulationMessage'"):
+            objs[0].send_event(1, objs[2], InitMsg)
+
+        # message types defined after compilation are checked with the registrations
+        class LateMsg(SimulationMessage):
+            "A message type defined after compilation"
+
+        self.assertTrue(self.simulator.num_compiled_message_types <= LateMsg._message_type_id)
+        with self.assertRaisesRegex(SimulatorError, "not registered to send 'LateMsg' messages"):
+            objs[0].send_event(1, objs[0], LateMsg())
+
+        # so are receivers that have not been compiled by this simulator
+        with self.assertRaisesRegex(SimulatorError, "not registered to receive 'InitMsg' messages"):
+            objs[0].send_event(1, TracedSimulationObject('not added'), InitMsg())
+        self.simulator.delete_object(objs[2])
+        self.assertEqual(objs[2]._receive_permissions_offset, None)
+        with self.assertRaisesRegex(SimulatorError, "not registered to receive 'Eg1' messages"):
+            objs[0].send_event(1, objs[2], Eg1())
+
+        # compiled sends and dispatches behave like those checked with the registrations
+        self.assertEqual(self.simulator.simulate(3).num_events, 5)
+        self.assertEqual([obj.num_events for obj in objs], [1, 3, 1])
+
+    def test_add_object_after_compile(self):
+        basic = BasicExampleSimulationObject('basic')
+        self.simulator.add_object(basic)
+        self.simulator.initialize()
+        send_permissions = self.simulator.send_permissions
+
+        # an object of a compiled type reuses the tables
+        basic_2 = BasicExampleSimulationObject('basic_2')
+        self.simulator.add_object(basic_2)
+        self.assertIs(self.simulator.send_permissions, send_permissions)
+        self.assertEqual(basic_2._send_permissions_offset, basic._send_permissions_offset)
+        self.assertEqual(basic_2._receive_permissions_offset, basic._receive_permissions_offset)
+        self.assertIs(basic_2._event_handlers, basic._event_handlers)
+
+        # an object of a new type rebuilds them
+        traced = TracedSimulationObject('traced')
+        self.simulator.add_object(traced)
+        self.assertIsNot(self.simulator.send_permissions, send_permissions)
+        self.assertEqual(set(self.simulator.compiled_types),
+                         {BasicExampleSimulationObject, TracedSimulationObject})
+        basic_3 = BasicExampleSimulationObject('basic_3')
+        self.simulator.add_object(basic_3)
+        self.assertEqual(basic_3._send_permissions_offset, basic._send_permissions_offset)
+
+        # and the objects added after initialization exchange events
+        basic_3.send_event(1, basic_2, InitMsg())
+        traced.send_event(1, traced, TracedMsg())
+        self.simulator.simulate(3)
+        self.assertTrue(basic_2.num_events and traced.num_events)
+
+    def test_compile_benchmark(self):
+        # compare the costs of checked sends and of dispatches with and without the compiled tables
+        print()
+        print('Compiled tables benchmark')
+        print('tables	send (us)	dispatch (us)'.expandtabs(15))
+        num_events = 50000
+        for tables in ['registrations', 'compiled']:
+            simulator = SimulationEngine()
+            sender, receiver = BasicExampleSimulationObject('sender'), BasicExampleSimulationObject('receiver')
+            simulator.add_objects([sender, receiver])
+            simulator.initialize()
+            if tables == 'registrations':
+                simulator.num_compiled_message_types = 0
+                sender._event_handlers = None
+            message = InitMsg()
+            gc.disable()
+            start_time = time.process_time()
+            for _ in range(num_events):
+                sender.send_event(1, receiver, message)
+            send_time = time.process_time() - start_time
+            # dispatch one event at a time
+            event_list = simulator.event_queue.next_events()[:1]
+            start_time = time.process_time()
+            for _ in range(num_events):
+                sender._SimulationEngine__handle_event_list(event_list)
+            dispatch_time = time.process_time() - start_time
+            gc.enable()
+            print("{}\t{:8.3f}\t{:8.3f}".format(tables, 1e6 * send_time / num_events,
+                                                1e6 * dispatch_time / num_events).expandtabs(15))
+
+    def test_rank_objects(self):
+        objs = {name: BasicExampleSimulationObject(name) for name in ['c', 'a', 'b']}
+        self.simulator.add_objects(objs.values())
+        self.assertTrue(all(obj.event_rank is None for obj in objs.values()))
+        # an object that receives an event before the objects are ranked is ranked then
+        handle = objs['a'].send_event(2, objs['c'], InitMsg())
+        self.assertEqual(handle.entry[:2], [2, objs['c'].event_rank])
+        # and its events are rekeyed when the objects are ranked together
+        self.simulator.initialize()
+        spacing = EventQueue.RANK_SPACING
+        self.assertEqual([objs[name].event_rank for name in ['a', 'b', 'c']], [0, spacing, 2 * spacing])
+        self.assertEqual(handle.entry[:2], [2, 2 * spacing])
+        self.assertEqual(handle.entry[-1]._order_time, (2, 2 * spacing))
+        self.assertTrue(handle.pending)
+
+        # an object added after initialization is ranked between its neighbours, without changing other ranks
+        obj_ab = BasicExampleSimulationObject('ab')
+        self.simulator.add_object(obj_ab)
+        self.assertEqual([objs['a'].event_rank, obj_ab.event_rank, objs['b'].event_rank, objs['c'].event_rank],
+                         [0, spacing // 2, spacing, 2 * spacing])
+        self.assertEqual(handle.entry[:2], [2, 2 * spacing])
+
+        # when no rank remains between neighbours, all ranks are respaced and the events rekeyed
+        late_objs = [BasicExampleSimulationObject('a' * length) for length in range(2, 22)]
+        for obj in late_objs:
+            self.simulator.add_object(obj)
+        ranked = sorted(self.simulator.simulation_objects.values(), key=lambda obj: obj.name)
+        ranks = [obj.event_rank for obj in ranked]
+        self.assertEqual(ranks, sorted(set(ranks)))
+        self.assertEqual(handle.entry[:2], [2, objs['c'].event_rank])
+        receivers = []
+        while not self.simulator.event_queue.empty():
+            receivers.extend([event.receiving_object.name for event in self.simulator.event_queue.next_events()])
+        self.assertEqual(receivers, ['a', 'b', 'c', 'c'])
+
+        # objects with equal priorities and tiebreakers share a rank
+        self.simulator.reset()
+        self.assertTrue(all(obj.event_rank is None for obj in objs.values()))
+        objs = [BasicExampleSimulationObject(name) for name in ['x', 'y']]
+        objs[0].event_time_tiebreaker = 'y'
+        self.simulator.add_objects(objs)
+        self.simulator.initialize()
+        self.assertEqual([obj.event_rank for obj in objs], [0, 0])
+
+        # objects that are not part of the simulation are ranked when they receive events
+        unadded = BasicExampleSimulationObject('w')
+        objs[0].send_event(1, unadded, InitMsg())
+        self.assertEqual(unadded.event_rank, -spacing)
+        self.assertEqual([event.receiving_object for event in self.simulator.event_queue.next_events()],
+                         [unadded])
+
+    def test_event_recycling(self):
+        # SIR and PHOLD reuse almost all events
+        sir = SIR('sir', s=98, i=2, N=100, beta=0.3, gamma=0.15, recording_period=10)
+        sir.random_state.seed(17)
+        self.simulator.add_object(sir)
+        self.simulator.initialize()
+        self.simulator.simulate(100)
+        counts = self.simulator.event_queue.event_allocation_counts()
+        # at most 2 events are pending, and 1 is being handled
+        self.assertTrue(counts['allocated'] <= 3)
+        self.assertTrue(0.9 < counts['reuse_rate'])
+
+        simulator = SimulationEngine()
+        args = Namespace(time_max=20, frac_self_events=0.3, num_phold_procs=10)
+        for obj_id in range(args.num_phold_procs):
+            simulator.add_object(PholdSimulationObject(phold_obj_name(obj_id), args))
+        random.seed(17)
+        simulator.initialize()
+        num_events = simulator.simulate(args.time_max).num_events
+        counts = simulator.event_queue.event_allocation_counts()
+        self.assertTrue(counts['allocated'] <= 3 * args.num_phold_procs)
+        self.assertEqual(counts['allocated'] + counts['reused'], num_events + simulator.event_queue.len())
+        self.assertTrue(0.9 < counts['reuse_rate'])
+
+        # events handled by an object that retains them are not recycled
+        self.simulator.reset()
+        obj = RetainingSimulationObject('retains')
+        self.simulator.add_object(obj)
+        self.simulator.initialize()
+        self.simulator.simulate(5)
+        self.assertEqual([event.event_time for event in obj.events], [1, 2, 3, 4, 5])
+        self.assertEqual(len(set(map(id, obj.events))), 5)
+        self.assertEqual(len(self.simulator.event_queue.free_events), 0)
+
+        # the free list is bounded
+        event_queue = self.simulator.event_queue
+        event_queue.max_free_events = 3
+        event_queue.recycle_events(obj.events)
+        self.assertEqual(event_queue.free_events, obj.events[:3])
+        self.assertEqual(event_queue.num_events_recycled, 3)
+        self.assertTrue(all(event.message is None for event in event_queue.free_events))
+        event_queue.recycle_events(obj.events)
+        self.assertEqual(event_queue.num_events_recycled, 3)
+
     def test_multi_interacting_object_simulation(self):
         sim_objects = [InteractingSimulationObject(obj_name(i)) for i in range(1, 3)]
         self.simulator.add_objects(sim_objects)
@@ -463,6 +834,157 @@ class TestSimulationEngine(unittest.TestCase):
             fast_logger = FastLogger(debug_logs.get_log(log_name), 'debug')
             self.assertEqual(fast_logger.get_level(), level_by_logger[log_name])
 
+    def test_validation(self):
+        # the sends during the simulation are InitMsg at time 1, InitMsg and the invalid Eg1 at time 2
+        for validation, validation_sample_interval, valid in [('full', 100, False),
+                                                              ('sampled', 2, False),
+                                                              ('sampled', 3, True),
+                                                              ('off', 100, True)]:
+            simulator = SimulationEngine()
+            simulator.add_object(UncheckedSimulationObject('unchecked'))
+            simulator.initialize()
+            sim_config = SimulationConfig(4, validation=validation,
+                                          validation_sample_interval=validation_sample_interval)
+            if valid:
+                self.assertEqual(simulator.simulate(sim_config=sim_config).num_events, 4)
+            else:
+                with self.assertRaisesRegex(SimulatorError, "not registered to send 'Eg1' messages"):
+                    simulator.simulate(sim_config=sim_config)
+            # events sent outside a simulation are checked
+            self.assertEqual((simulator.send_check_interval, simulator.sends_until_check), (1, 0))
+
+    def test_validation_benchmark(self):
+        # measure the cost of checking events sent by PHOLD at each validation level
+        print()
+        print('Validation benchmark')
+        print('validation	# events	run time (s)	us/event'.expandtabs(15))
+        args = Namespace(time_max=200, frac_self_events=0.3, num_phold_procs=100)
+        for validation in SimulationConfig.VALIDATION_LEVELS:
+            simulator = SimulationEngine()
+            for obj_id in range(args.num_phold_procs):
+                simulator.add_object(PholdSimulationObject(phold_obj_name(obj_id), args))
+            random.seed(17)
+            simulator.initialize()
+            sim_config = SimulationConfig(args.time_max, validation=validation, validation_sample_interval=100)
+            start_time = time.process_time()
+            num_events = simulator.simulate(sim_config=sim_config).num_events
+            run_time = time.process_time() - start_time
+            print("{}\t{}\t{:8.3f}\t{:8.2f}".format(validation, num_events, run_time,
+                                                     1e6 * run_time / num_events).expandtabs(15))
+
+    def make_cell_simulation(self, cell_types, num_cells):
+        # cells whose types cycle through `cell_types`, so that objects of one type may be interleaved
+        # with objects of other types
+        values = numpy.ones(num_cells)
+        simulator = SimulationEngine()
+        simulator.add_objects([cell_types[index % len(cell_types)](obj_name(index), values, index)
+                               for index in range(num_cells)])
+        simulator.initialize()
+        return simulator, values
+
+    def test_class_event_handler(self):
+        self.assertEqual(Cell.metadata.class_event_handler, None)
+        self.assertEqual(VectorizedCell.metadata.class_event_handler, VectorizedCell.handle_ticks)
+        num_cells = 20
+        simulator, values = self.make_cell_simulation([Cell], num_cells)
+        expected_results = simulator.simulate(10)
+        expected_event_counts = simulator.event_counts.copy()
+        for cell_types in [[VectorizedCell], [VectorizedCell, VectorizedCell, Cell]]:
+            VectorizedCell.num_calls = 0
+            simulator, vectorized_values = self.make_cell_simulation(cell_types, num_cells)
+            results = simulator.simulate(10)
+            self.assertEqual(results.num_events, expected_results.num_events)
+            self.assertEqual(simulator.event_counts, expected_event_counts)
+            self.assertTrue(numpy.array_equal(vectorized_values, values))
+            # the cells of each type are handled together while they are consecutive
+            num_runs = 1 if len(cell_types) == 1 else num_cells // 3 + 1
+            self.assertEqual(VectorizedCell.num_calls, 10 * num_runs)
+
+        # class event handlers are not used when a stop condition is evaluated between objects
+        VectorizedCell.num_calls = 0
+        simulator, vectorized_values = self.make_cell_simulation([VectorizedCell], num_cells)
+        simulator.simulate(sim_config=SimulationConfig(10, stop_condition=lambda time: False))
+        self.assertTrue(numpy.array_equal(vectorized_values, values))
+        self.assertEqual(VectorizedCell.num_calls, 0)
+
+        simulator, _ = self.make_cell_simulation([EagerVectorizedCell], 3)
+        with self.assertRaisesRegex(SimulatorError,
+                                    "class event handler of 'EagerVectorizedCell' scheduled an event at the "
+                                    "current time"):
+            simulator.simulate(10)
+
+        with self.assertRaisesRegex(SimulatorError, "must define a class method 'no_such_method'"):
+            class BadVectorizedCell(Cell):
+                class_event_handler = 'no_such_method'
+
+    def test_class_event_handler_benchmark(self):
+        print()
+        print('Class event handler benchmark')
+        print('cell type	# cells	# events	us/event'.expandtabs(15))
+        for num_cells in [100, 500]:
+            for cell_type in [Cell, VectorizedCell]:
+                simulator, _ = self.make_cell_simulation([cell_type], num_cells)
+                # exclude cyclic garbage collections, which are triggered by the events that a class
+                # event handler holds until all of its objects have been handled
+                gc.collect()
+                gc.disable()
+                start_time = time.process_time()
+                num_events = simulator.simulate(10).num_events
+                run_time = time.process_time() - start_time
+                gc.enable()
+                print("{}\t{}\t{}\t{:8.2f}".format(cell_type.__name__, num_cells, num_events,
+                                                   1e6 * run_time / num_events).expandtabs(15))
+
+    def enable_tracing(self, simulator, messages):
+        # make the debug loggers of the simulator, its event queue and objects active, writing to `messages`
+        def log_to_messages(msg, **kwargs):
+            messages.append(msg)
+
+        objects = list(simulator.get_objects())
+        for owner in [simulator, simulator.event_queue] + objects:
+            owner.fast_debug_file_logger.active = True
+            owner.fast_debug_file_logger.method = log_to_messages
+
+    def test_tracing(self):
+        # when the debug log is inactive, no log messages are formatted and no messages are converted to strings
+        obj = TracedSimulationObject('traced')
+        self.simulator.add_object(obj)
+        self.simulator.initialize()
+        self.assertFalse(self.simulator.fast_debug_file_logger.active)
+        count_str_calls.num_calls = 0
+        self.assertEqual(self.simulator.simulate(5).num_events, 5)
+        self.assertEqual(count_str_calls.num_calls, 0)
+
+        messages = []
+        self.enable_tracing(self.simulator, messages)
+        self.simulator.simulate(10)
+        self.assertEqual(count_str_calls.num_calls, 5)
+        self.assertIn(" Running 'traced' at 6", messages)
+        self.assertIn("Send: (traced,   6.00) -> (traced,   7.00): TracedMsg", messages)
+        self.assertIn('Execute: 6 TracedSimulationObject:traced TracedMsg (SimulationMessage: TracedMsg({}))',
+                      messages)
+
+    def test_tracing_benchmark(self):
+        # compare PHOLD with tracing disabled, as by default, and with tracing enabled but discarded, which
+        # measures the cost of the log messages that are not built when tracing is disabled
+        print()
+        print('Tracing benchmark')
+        print('tracing	# events	run time (s)	events/s'.expandtabs(15))
+        args = Namespace(time_max=100, frac_self_events=0.3, num_phold_procs=100)
+        for tracing in ['disabled', 'enabled']:
+            simulator = SimulationEngine()
+            for obj_id in range(args.num_phold_procs):
+                simulator.add_object(PholdSimulationObject(phold_obj_name(obj_id), args))
+            if tracing == 'enabled':
+                self.enable_tracing(simulator, [])
+            random.seed(17)
+            simulator.initialize()
+            start_time = time.process_time()
+            num_events = simulator.simulate(args.time_max).num_events
+            run_time = time.process_time() - start_time
+            print("{}\t{}\t{:8.3f}\t{:8.0f}".format(tracing, num_events, run_time,
+                                                     num_events / run_time).expandtabs(15))
+
     # @unittest.skip("takes 3 to 5 min.")
     def test_performance(self):
         existing_levels = self.suspend_logging(self.log_names)
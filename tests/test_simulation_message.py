@@ -5,6 +5,7 @@
 :License: MIT
 """
 
+import pickle
 import unittest
 import warnings
 
@@ -28,6 +29,12 @@ class ExampleSimulationMessage3(SimulationMessage):
     pass
 
 
+class ExampleSimulationMessage4(SimulationMessage):
+    " docstring "
+    attributes = ['attr1']
+    lookahead = 2
+
+
 class TestSimulationMessageInterface(unittest.TestCase):
 
     def test_utils(self):
@@ -116,3 +123,12 @@ class TestSimulationMessageMeta(unittest.TestCase):
         with self.assertRaisesRegex(SimulatorError, 'contains duplicates'):
             class BadSimulationMessage3(SimulationMessage):
                 attributes = ['x', 'y', 'x']
+
+    def test_class_namespace(self):
+        # class attributes, and the module and qualified name that pickling uses, are kept
+        self.assertEqual(ExampleSimulationMessage4.lookahead, 2)
+        self.assertEqual(ExampleSimulationMessage4.__module__, __name__)
+        self.assertEqual(ExampleSimulationMessage4.__qualname__, 'ExampleSimulationMessage4')
+        message = pickle.loads(pickle.dumps(ExampleSimulationMessage4('val')))
+        self.assertIsInstance(message, ExampleSimulationMessage4)
+        self.assertEqual(message.attr1, 'val')
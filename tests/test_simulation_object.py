@@ -5,16 +5,19 @@
 :License: MIT
 """
 
+import gc
 import random
 import re
+from time import process_time
 import unittest
 import warnings
 
 from de_sim.errors import SimulatorError
+from de_sim.event_queue_backends import EVENT_QUEUE_BACKENDS
 from de_sim.simulation_engine import SimulationEngine
 from de_sim.simulation_object import (EventQueue, ApplicationSimulationObject,
                                       ApplicationSimulationObjMeta, ApplicationSimulationObjectMetadata,
-                                      SimObjClassPriority)
+                                      SimObjClassPriority, batch_event_handler)
 from de_sim.testing.example_simulation_objects import (ALL_MESSAGE_TYPES, TEST_SIM_OBJ_STATE,
                                                        ExampleSimulationObject,
                                                        ImproperlyRegisteredSimulationObject)
@@ -27,6 +30,49 @@ MESSAGES_SENT = ApplicationSimulationObjMeta.MESSAGES_SENT
 CLASS_PRIORITY = ApplicationSimulationObjMeta.CLASS_PRIORITY
 
 
+class ReceiverOfMsgWithAttrs(ExampleSimulationObject):
+    def handler(self, event):
+        pass  # pragma: no cover
+    event_handlers = [(InitMsg, 'handler'), (MsgWithAttrs, 'handler')]
+
+
+class BatchReceiver(ExampleSimulationObject):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.calls = []
+
+    def handle_eg1(self, event):
+        self.calls.append((Eg1, event.message))
+
+    @batch_event_handler
+    def handle_init_msgs(self, events):
+        self.calls.append((InitMsg, [event.message for event in events]))
+
+    event_handlers = [(Eg1, 'handle_eg1'), (InitMsg, 'handle_init_msgs')]
+
+
+class PerEventCounter(ExampleSimulationObject):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.count = 0
+
+    def handle_eg1(self, event):
+        self.count += 1
+
+    event_handlers = [(Eg1, 'handle_eg1')]
+
+
+class BatchCounter(PerEventCounter):
+
+    @batch_event_handler
+    def handle_eg1s(self, events):
+        self.count += len(events)
+
+    event_handlers = [(Eg1, 'handle_eg1s')]
+
+
 class TestEventQueue(unittest.TestCase):
 
     def setUp(self):
@@ -101,6 +147,152 @@ class TestEventQueue(unittest.TestCase):
         for event in next_events:
             self.assertEqual(event.receiving_object, self.receiver2)
 
+    def test_cancel(self):
+        event_queue = EventQueue()
+        event_queue.compaction_fraction = 1.
+        handles = [event_queue.schedule_event(0, i, self.sender, self.receiver, InitMsg()) for i in range(6)]
+        self.assertTrue(all(handle.pending for handle in handles))
+        self.assertEqual(handles[3].event.event_time, 3)
+
+        # cancel the earliest event and a later one
+        self.assertTrue(handles[0].cancel())
+        self.assertFalse(handles[0].pending)
+        self.assertFalse(handles[0].cancel())
+        self.assertTrue(handles[2].cancel())
+        self.assertEqual(event_queue.len(), 4)
+        self.assertEqual(event_queue.num_cancelled, 2)
+        self.assertEqual(len(event_queue.render(as_list=True)), 4 + 1)
+
+        # tombstones are skipped and discarded
+        self.assertEqual(event_queue.next_event_time(), 1)
+        self.assertEqual(event_queue.num_cancelled, 1)
+        self.assertEqual(event_queue.next_events()[0].event_time, 1)
+        self.assertEqual(event_queue.next_events()[0].event_time, 3)
+        self.assertEqual(event_queue.num_cancelled, 0)
+
+        # an executed event cannot be cancelled
+        self.assertFalse(handles[1].pending)
+        self.assertFalse(handles[1].cancel())
+        self.assertEqual(event_queue.len(), 2)
+
+        # cancelling all remaining events empties the queue
+        handles[4].cancel()
+        handles[5].cancel()
+        self.assertTrue(event_queue.empty())
+        self.assertEqual(event_queue.next_events(), [])
+        self.assertEqual(event_queue.next_event_obj(), None)
+
+        # reset makes handles inactive
+        handle = event_queue.schedule_event(0, 1, self.sender, self.receiver, InitMsg())
+        event_queue.reset()
+        self.assertFalse(handle.cancel())
+        self.assertEqual(event_queue.num_cancelled, 0)
+
+    def test_compaction(self):
+        for backend in EVENT_QUEUE_BACKENDS:
+            event_queue = EventQueue(backend=backend)
+            event_queue.compaction_fraction = 0.25
+            handles = [event_queue.schedule_event(0, i, self.sender, self.receiver, InitMsg()) for i in range(100)]
+            for handle in handles[10:35]:
+                handle.cancel()
+            self.assertEqual(event_queue.num_cancelled, 25)
+            self.assertEqual(len(event_queue.backend), 100)
+            # exceed the compaction fraction
+            handles[35].cancel()
+            self.assertEqual(event_queue.num_cancelled, 0)
+            self.assertEqual(len(event_queue.backend), 74)
+            event_times = []
+            while not event_queue.empty():
+                event_times.extend([event.event_time for event in event_queue.next_events()])
+            self.assertEqual(event_times, list(range(10)) + list(range(36, 100)))
+
+    def test_reschedule(self):
+        for backend in EVENT_QUEUE_BACKENDS:
+            event_queue = EventQueue(backend=backend)
+            handles = [event_queue.schedule_event(0, i, self.sender, self.receiver, InitMsg()) for i in range(5)]
+            event = handles[3].event
+            event_queue.reschedule(handles[3], 0.5)
+            event_queue.reschedule(handles[1], 7)
+            self.assertEqual(event_queue.len(), 5)
+            self.assertIs(handles[3].event, event)
+            self.assertEqual(event.event_time, 0.5)
+            self.assertEqual(event._order_time[0], 0.5)
+
+            # a rescheduled event follows simultaneous events that were scheduled earlier
+            event_queue.reschedule(handles[2], 4)
+            event_times = []
+            events = []
+            while not event_queue.empty():
+                next_events = event_queue.next_events()
+                event_times.extend([event.event_time for event in next_events])
+                events.extend(next_events)
+            self.assertEqual(event_times, [0, 0.5, 4, 4, 7])
+            self.assertEqual(events[2:4], [handles[4].event, handles[2].event])
+
+            with self.assertRaisesRegex(SimulatorError, 'cannot reschedule an event that has been executed'):
+                event_queue.reschedule(handles[0], 3)
+            handle = event_queue.schedule_event(2, 3, self.sender, self.receiver, InitMsg())
+            with self.assertRaisesRegex(SimulatorError, re.escape('new_time < send_time in reschedule(): 1 < 2')):
+                event_queue.reschedule(handle, 1)
+            with self.assertRaisesRegex(SimulatorError, 'new_time is NaN'):
+                event_queue.reschedule(handle, float('NaN'))
+            handle.cancel()
+            with self.assertRaisesRegex(SimulatorError, 'cannot reschedule an event that has been executed'):
+                event_queue.reschedule(handle, 3)
+
+    def test_schedule_events(self):
+        for backend in EVENT_QUEUE_BACKENDS:
+            event_queue = EventQueue(backend=backend)
+            event_queue.schedule_event(0, 2.5, self.sender, self.receiver, InitMsg())
+            handles = event_queue.schedule_events([(0, i, self.sender, self.receiver, InitMsg())
+                                                   for i in range(5, 0, -1)])
+            self.assertEqual([handle.event.event_time for handle in handles], [5, 4, 3, 2, 1])
+            self.assertEqual(event_queue.len(), 6)
+            handles[0].cancel()
+            event_times = []
+            while not event_queue.empty():
+                event_times.extend([event.event_time for event in event_queue.next_events()])
+            self.assertEqual(event_times, [1, 2, 2.5, 3, 4])
+
+            # if any event is invalid no events are scheduled
+            with self.assertRaisesRegex(SimulatorError, 'receive_time < send_time in schedule_event'):
+                event_queue.schedule_events([(0, 1, self.sender, self.receiver, InitMsg()),
+                                             (2, 1, self.sender, self.receiver, InitMsg())])
+            self.assertTrue(event_queue.empty())
+
+    def test_break_ties_by_send_order(self):
+        receiver = ReceiverOfMsgWithAttrs('receiver')
+        messages = [MsgWithAttrs(3, 0), InitMsg(), MsgWithAttrs(1, 0), MsgWithAttrs(2, 0), InitMsg()]
+        for break_ties_by_send_order, expected_order in [(False, [1, 4, 2, 3, 0]),
+                                                         (True, [1, 4, 0, 2, 3])]:
+            for backend in EVENT_QUEUE_BACKENDS:
+                event_queue = EventQueue(backend=backend)
+                event_queue.break_ties_by_send_order = break_ties_by_send_order
+                for message in messages:
+                    event_queue.schedule_event(0, 1, self.sender, receiver, message)
+                events = event_queue.next_events()
+                self.assertEqual([event.message for event in events], [messages[i] for i in expected_order])
+
+    def test_break_ties_benchmark(self):
+        # order many simultaneous messages received by one object
+        print()
+        print('Simultaneous message ordering benchmark')
+        print('# messages\tties broken by\trun time (s)\tmessages/s'.expandtabs(15))
+        receiver = ReceiverOfMsgWithAttrs('receiver')
+        num_messages = 20000
+        random.seed(11)
+        messages = [MsgWithAttrs(random.random(), random.random()) for _ in range(num_messages)]
+        for break_ties_by_send_order, ties_broken_by in [(False, 'content'), (True, 'send order')]:
+            event_queue = EventQueue()
+            event_queue.break_ties_by_send_order = break_ties_by_send_order
+            for message in messages:
+                event_queue.schedule_event(0, 1, self.sender, receiver, message)
+            start_time = process_time()
+            self.assertEqual(len(event_queue.next_events()), num_messages)
+            run_time = process_time() - start_time
+            print("{}\t{}\t{:8.3f}\t{:8.0f}".format(num_messages, ties_broken_by, run_time,
+                                                     num_messages / run_time).expandtabs(15))
+
     def test_exceptions(self):
         eq = EventQueue()
 
@@ -461,7 +653,7 @@ class TestSimulationObject(unittest.TestCase):
         # use event_time_tiebreaker to order simultaneous events earlier at o3
         def tiebreaker_first_event(simulator):
             event_list = simulator.event_queue.next_events()
-            return event_list[0]._get_order_time()[-1]
+            return event_list[0].receiving_object.event_time_tiebreaker
 
         o3_event_time_tiebreaker = 'a'
         options = dict(event_time_tiebreaker=o3_event_time_tiebreaker)
@@ -471,6 +663,150 @@ class TestSimulationObject(unittest.TestCase):
         self.assertEqual(tiebreaker_first_event(self.simulator), o3_event_time_tiebreaker)
         self.assertEqual(tiebreaker_first_event(self.simulator), self.o2.name)
 
+    def test_cancel_event(self):
+        handles = [self.o1.send_event(1, self.o2, Eg1()),
+                   self.o1.send_event_absolute(2, self.o2, Eg1()),
+                   self.o1.send_event(3, self.o2, InitMsg())]
+        self.assertTrue(handles[1].cancel())
+        self.assertEqual(self.simulator.simulate(10).num_events, 2)
+        self.assertFalse(any(handle.pending for handle in handles))
+
+    def test_reschedule_event(self):
+        handles = [self.o1.send_event(i, self.o2, Eg1()) for i in range(1, 4)]
+        self.o1.reschedule_event(handles[0], 5)
+        self.o1.reschedule_event_absolute(handles[2], 4)
+        self.assertEqual(self.simulator.event_queue.next_event_time(), 2)
+        self.assertEqual([handle.event.event_time for handle in handles], [5, 2, 4])
+
+        with self.assertRaisesRegex(SimulatorError, "'o2' cannot reschedule an event sent by 'o1'"):
+            self.o2.reschedule_event(handles[0], 1)
+        with self.assertRaisesRegex(SimulatorError, re.escape("delay < 0 in reschedule_event(): -1")):
+            self.o1.reschedule_event(handles[0], -1)
+        with self.assertRaisesRegex(SimulatorError, "delay is 'NaN'"):
+            self.o1.reschedule_event(handles[0], float('nan'))
+        with self.assertRaisesRegex(SimulatorError, "event_time is 'NaN'"):
+            self.o1.reschedule_event_absolute(handles[0], float('nan'))
+        self.o1.time = 3
+        with self.assertRaisesRegex(SimulatorError,
+                                    r'event_time \(2.*\) < current time \(3.*\) in reschedule_event_absolute\(\)'):
+            self.o1.reschedule_event_absolute(handles[0], 2)
+        self.o1.time = 0
+        self.assertEqual(self.simulator.simulate(10).num_events, 3)
+
+        # executed events, whose events may have been recycled, and cancelled events cannot be rescheduled
+        self.o2.send_event(1, self.o1, Eg1())
+        handle = self.o1.send_event(1, self.o2, Eg1())
+        handle.cancel()
+        for executed_or_cancelled in [handles[0], handle]:
+            with self.assertRaisesRegex(SimulatorError, "cannot reschedule an event that has been executed"):
+                self.o1.reschedule_event_absolute(executed_or_cancelled, 20)
+
+    def test_send_events_in_bulk(self):
+        messages = [Eg1(), InitMsg(), Eg1()]
+        handles = self.o1.send_events([(3, self.o2, messages[0]), (1, self.o1, messages[1]),
+                                       (2, self.o2, messages[2])])
+        self.assertEqual([handle.event.event_time for handle in handles], [3, 1, 2])
+        self.assertEqual([handle.event.message for handle in handles], messages)
+        self.assertEqual(self.o1.send_events([]), [])
+        handles = self.o1.send_events([(4, self.o2, messages[0])], copy=True)
+        self.assertIsNot(handles[0].event.message, messages[0])
+        self.assertEqual(self.simulator.simulate(10).num_events, 4)
+
+        # if any event is invalid no events are sent
+        with self.assertRaisesRegex(SimulatorError, re.escape("delay < 0 in send_events(): -1")):
+            self.o1.send_events([(1, self.o2, Eg1()), (-1, self.o2, Eg1())])
+        with self.assertRaisesRegex(SimulatorError, "delay is 'NaN'"):
+            self.o1.send_events([(float('nan'), self.o2, Eg1())])
+        expected = "'{}' simulation objects not registered to send '{}' messages".format(
+            most_qual_cls_name(self.o1), UnregisteredMsg.__name__)
+        for _ in range(2):
+            with self.assertRaisesRegex(SimulatorError, expected):
+                self.o1.send_events([(1, self.o2, Eg1()), (1, self.o2, UnregisteredMsg())])
+        irso = ImproperlyRegisteredSimulationObject('irso')
+        with self.assertRaisesRegex(SimulatorError, "not registered to receive 'InitMsg' messages"):
+            self.o1.send_events([(1, irso, InitMsg())])
+        with self.assertRaisesRegex(SimulatorError, "simulation messages must be instances"):
+            self.o1.send_events([(1, self.o2, Eg1)])
+        self.assertTrue(self.simulator.event_queue.empty())
+
+    def test_send_event_by_id(self):
+        self.assertEqual([self.o1.object_id, self.o2.object_id], [0, 1])
+        handles = [self.o1.send_event(1, self.o2.object_id, Eg1()),
+                   self.o1.send_event_absolute(2, self.o1.object_id, Eg1())]
+        handles.extend(self.o1.send_events([(3, self.o2.object_id, Eg1()), (4, self.o2, Eg1())]))
+        self.assertEqual([handle.event.receiving_object for handle in handles],
+                         [self.o2, self.o1, self.o2, self.o2])
+        for object_id in [2, -1, 'o1']:
+            with self.assertRaisesRegex(SimulatorError, "cannot get simulation object with id"):
+                self.o1.send_event(1, object_id, Eg1())
+        with self.assertRaisesRegex(SimulatorError, "cannot get simulation object with id '2'"):
+            self.o1.send_events([(1, 2, Eg1())])
+        self.assertEqual(self.simulator.simulate(10).num_events, 4)
+
+    def test_send_events_benchmark(self):
+        # compare sending events one at a time with sending them in bulk, as initialization does
+        print()
+        print('Bulk scheduling benchmark')
+        print('# events\tmethod\trun time (s)\tevents/s'.expandtabs(15))
+        for num_events in [1000, 100000]:
+            for method in ['send_event', 'send_events']:
+                random.seed(3)
+                delays = [random.random() for _ in range(num_events)]
+                self.simulator.event_queue.reset()
+                # exclude cyclic garbage collections, which are triggered by allocations and
+                # dominate the run time of large batches
+                gc.collect()
+                gc.disable()
+                start_time = process_time()
+                if method == 'send_event':
+                    for delay in delays:
+                        self.o1.send_event(delay, self.o2, Eg1())
+                else:
+                    self.o1.send_events([(delay, self.o2, Eg1()) for delay in delays])
+                run_time = process_time() - start_time
+                gc.enable()
+                self.assertEqual(self.simulator.event_queue.len(), num_events)
+                print("{}\t{}\t{:8.3f}\t{:8.0f}".format(num_events, method, run_time,
+                                                         num_events / run_time).expandtabs(15))
+
+    def test_batch_event_handler(self):
+        self.assertEqual(BatchReceiver.metadata.batch_message_types, {InitMsg})
+        self.assertEqual(ExampleSimulationObject.metadata.batch_message_types, set())
+        self.simulator.reset()
+        receiver = BatchReceiver('receiver')
+        self.simulator.add_object(receiver)
+        self.simulator.initialize()
+        messages = [InitMsg(), Eg1(), InitMsg(), Eg1(), InitMsg()]
+        receiver.send_events([(1, receiver, message) for message in messages] + [(2, receiver, InitMsg())])
+        self.assertEqual(self.simulator.simulate(5).num_events, 2)
+        # all simultaneous InitMsg events are handled in one call, after the Eg1 events, which have
+        # a higher priority
+        self.assertEqual([message_type for message_type, _ in receiver.calls], [Eg1, Eg1, InitMsg, InitMsg])
+        self.assertEqual(receiver.calls[2][1], [messages[0], messages[2], messages[4]])
+        self.assertEqual(len(receiver.calls[3][1]), 1)
+
+    def test_batch_event_handler_benchmark(self):
+        print()
+        print('Batch event handler benchmark')
+        print('# simultaneous	handler	us/event'.expandtabs(15))
+        num_events = 10000
+        for num_simultaneous in [1, 10, 100]:
+            for handler, receiver_type in [('per event', PerEventCounter), ('batch', BatchCounter)]:
+                self.simulator.reset()
+                receiver = receiver_type('receiver')
+                self.simulator.add_object(receiver)
+                self.simulator.initialize()
+                receiver.send_events([(0, receiver, Eg1()) for _ in range(num_simultaneous)])
+                event_list = self.simulator.event_queue.next_events()
+                num_calls = num_events // num_simultaneous
+                start_time = process_time()
+                for _ in range(num_calls):
+                    receiver._SimulationEngine__handle_event_list(event_list)
+                run_time = process_time() - start_time
+                self.assertEqual(receiver.count, num_calls * num_simultaneous)
+                print("{}\t{}\t{:8.3f}".format(num_simultaneous, handler,
+                                               1e6 * run_time / (num_calls * num_simultaneous)).expandtabs(15))
+
     def test_render_event_queue(self):
         rv = self.o1.render_event_queue()
 
@@ -484,6 +820,11 @@ class TestSimulationObject(unittest.TestCase):
         for time in times:
             self.assertIn(str(time), rv)
 
+        # an object's rendered event queue contains only the events it will receive
+        self.o1.send_event(4, self.o2, Eg1())
+        self.assertEqual(len(self.o1.render_event_queue().split('\n')), len(times) + 1)
+        self.assertEqual(len(self.o2.render_event_queue().split('\n')), 1 + 1)
+
     def test_event_exceptions(self):
         delay = -1.0
         with self.assertRaisesRegex(SimulatorError,
@@ -502,5 +843,34 @@ class TestSimulationObject(unittest.TestCase):
         with self.assertRaisesRegex(SimulatorError, "delay is 'NaN'"):
             self.o1.send_event(float('nan'), self.o2, Eg1())
 
+    def test_save_state(self):
+        receiver = BatchReceiver('receiver')
+        receiver.calls.append('call')
+        state = receiver.save_state()
+        self.assertNotIn('name', state)
+        self.assertNotIn('fast_debug_file_logger', state)
+        receiver.calls.append('another call')
+        receiver.time = 3
+        receiver.restore_state(state)
+        self.assertEqual(receiver.calls, ['call'])
+        # the time is managed by the simulation engine
+        self.assertEqual(receiver.time, 3)
+
+        # references to simulation objects and event handles are shared, not copied
+        simulator = SimulationEngine()
+        receiver, peer = BatchReceiver('receiver'), BatchReceiver('peer')
+        simulator.add_objects([receiver, peer])
+        simulator.initialize()
+        receiver.peer = peer
+        receiver.handle = receiver.send_event(1, peer, Eg1())
+        state = receiver.save_state()
+        self.assertIs(state['peer'], peer)
+        self.assertIs(state['handle'], receiver.handle)
+        receiver.peer = receiver.handle = None
+        receiver.restore_state(state)
+        self.assertIs(receiver.peer, peer)
+        self.assertTrue(receiver.handle.pending)
+        self.assertIs(simulator.event_queue.next_events()[0], receiver.handle.event)
+
     def test_misc(self):
         self.assertEqual(self.o1.get_state(), TEST_SIM_OBJ_STATE)
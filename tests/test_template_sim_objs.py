@@ -12,7 +12,10 @@ import numpy as np
 from de_sim.errors import SimulatorError
 from de_sim.simulation_config import SimulationConfig
 from de_sim.simulation_engine import SimulationEngine
-from de_sim.template_sim_objs import TemplatePeriodicSimulationObject
+from de_sim.simulation_object import ApplicationSimulationObject
+from de_sim.simulation_message import SimulationMessage
+from de_sim.template_sim_objs import (TemplatePeriodicSimulationObject, PopulationSimulationObject, AgentEvent,
+                                     NextReactionSimulationObject, TauLeapingSimulationObject)
 
 
 class SpecialPeriodicSimulationObject(TemplatePeriodicSimulationObject):
@@ -25,6 +28,85 @@ class SpecialPeriodicSimulationObject(TemplatePeriodicSimulationObject):
         self.times.append(self.time)
 
 
+class Population(PopulationSimulationObject):
+    # agents that record the times of their events, and whose events recur after `delays`
+
+    def __init__(self, name, num_agents, delays):
+        super().__init__(name, num_agents, [('num_events', int), ('delay', float)])
+        self.agents['delay'] = delays
+        self.handled = []
+        self.messages = []
+
+    def send_initial_events(self):
+        self.schedule_agents(np.arange(self.num_agents), self.agents['delay'])
+        super().send_initial_events()
+
+    def handle_agent_events(self, agents):
+        self.handled.append((self.time, agents.tolist()))
+        self.agents['num_events'][agents] += 1
+        recurring = agents[0 < self.agents['delay'][agents]]
+        self.schedule_agents(recurring, self.time + self.agents['delay'][recurring])
+
+    def handle_agent_messages(self, agents, messages):
+        self.messages.append((self.time, agents.tolist()))
+        # an agent that receives a message acts now, and then stops
+        for agent in agents.tolist():
+            self.schedule_agent(agent, self.time)
+        self.agents['delay'][agents] = 0
+
+
+class AgentMessenger(ApplicationSimulationObject):
+
+    def __init__(self, name, population, agents):
+        super().__init__(name)
+        self.population = population
+        self.agents = agents
+
+    def send_initial_events(self):
+        for agent in self.agents:
+            self.send_event(2.5, self.population, AgentEvent(agent))
+
+    def get_state(self):
+        return ''    # pragma: no cover
+
+    messages_sent = [AgentEvent]
+
+
+class Arrival(SimulationMessage):
+    "Molecules arrive"
+    attributes = ['count']
+
+
+class Decay(TauLeapingSimulationObject):
+    # A decays, and arrivals sent by other objects add A
+    def __init__(self, name, count, rate, **kwargs):
+        super().__init__(name, dict(A=count, B=0), [dict(A=-1, B=1)], [lambda state: rate * state['A']], **kwargs)
+
+    def handle_arrival(self, event):
+        self.update_state(dict(A=event.message.count))
+
+    event_handlers = [*TauLeapingSimulationObject.metadata.event_handlers_dict.items(),
+                      (Arrival, 'handle_arrival')]
+
+
+class Source(ApplicationSimulationObject):
+
+    def __init__(self, name, decay, times, count):
+        super().__init__(name)
+        self.decay = decay
+        self.times = times
+        self.count = count
+
+    def send_initial_events(self):
+        for time in self.times:
+            self.send_event(time, self.decay, Arrival(self.count))
+
+    def get_state(self):
+        return ''    # pragma: no cover
+
+    messages_sent = [Arrival]
+
+
 class TestTemplatePeriodicSimulationObject(unittest.TestCase):
 
     def test_TemplatePeriodicSimulationObject(self):
@@ -68,3 +150,157 @@ class TestTemplatePeriodicSimulationObject(unittest.TestCase):
             simulation_config = SimulationConfig(time_max, time_init)
             simulator.simulate(sim_config=simulation_config)
             self.assertEqual(expected_times, pso.times)
+
+
+class TestPopulationSimulationObject(unittest.TestCase):
+
+    def test_population(self):
+        simulator = SimulationEngine()
+        population = Population('population', 4, [1, 2, 0, 1])
+        simulator.add_object(population)
+        simulator.initialize()
+        # agent 2 has a delay of 0, so it acts once, at time 0
+        simulator.simulate(4)
+        self.assertEqual(population.handled, [(0, [2]), (1, [0, 3]), (2, [0, 1, 3]), (3, [0, 3]), (4, [0, 1, 3])])
+        self.assertEqual(population.agents['num_events'].tolist(), [4, 2, 1, 4])
+        self.assertEqual(population.agent_event_times.priorities, [5, 6, math.inf, 5])
+        self.assertEqual(population.next_event_handle.event.event_time, 5)
+
+        # events addressed to agents by other objects
+        simulator = SimulationEngine()
+        population = Population('population', 3, [1, 1, 1])
+        simulator.add_objects([population, AgentMessenger('messenger', population, [2, 0])])
+        simulator.initialize()
+        simulator.simulate(10)
+        # simultaneous messages are ordered by their content
+        self.assertEqual(population.messages, [(2.5, [0, 2])])
+        self.assertEqual(population.handled, [(1, [0, 1, 2]), (2, [0, 1, 2]), (2.5, [0, 2])] +
+                         [(time, [1]) for time in range(3, 11)])
+        self.assertEqual(population.agent_event_times.priorities, [math.inf, 11, math.inf])
+
+        # the population's event is cancelled when no agent has an event
+        population.schedule_agents([1], [math.inf])
+        self.assertFalse(population.next_event_handle)
+        self.assertTrue(simulator.event_queue.empty())
+
+    def test_exceptions(self):
+        population = Population('population', 2, [1, 1])
+        population.time = 3
+        for event_time in [2, math.nan]:
+            with self.assertRaisesRegex(SimulatorError, 'must not be NaN or earlier than the current time'):
+                population.schedule_agent(0, event_time)
+            with self.assertRaisesRegex(SimulatorError, 'must not be NaN or earlier than the current time'):
+                population.schedule_agents([0, 1], [4, event_time])
+
+
+class TestNextReactionSimulationObject(unittest.TestCase):
+
+    def make_isomerization(self, dependencies=None):
+        # A <-> B, and A -> C, which stops when A is exhausted
+        reactions = [dict(A=-1, B=1), dict(A=1, B=-1), dict(A=-1, C=1)]
+        propensities = [lambda state: 2 * state['A'], lambda state: state['B'], lambda state: 0.5 * state['A']]
+        return NextReactionSimulationObject('isomerization', dict(A=20, B=0, C=0), reactions, propensities,
+                                            dependencies=dependencies)
+
+    def test_dependency_graph(self):
+        reactions = [dict(A=-1, B=1), dict(A=1, B=-1), dict(A=-1, C=1), dict(D=0)]
+        propensity_species = [['A'], ['B'], ['A'], []]
+        self.assertEqual(NextReactionSimulationObject.dependency_graph(reactions, propensity_species),
+                         [[0, 1, 2], [0, 1, 2], [0, 2], [3]])
+
+    def test_next_reaction(self):
+        dependencies = NextReactionSimulationObject.dependency_graph(
+            [dict(A=-1, B=1), dict(A=1, B=-1), dict(A=-1, C=1)], [['A'], ['B'], ['A']])
+        for deps in [None, dependencies]:
+            simulator = SimulationEngine()
+            network = self.make_isomerization(dependencies=deps)
+            network.random_state.seed(7)
+            simulator.add_object(network)
+            simulator.initialize()
+            num_events = simulator.simulate(1000).num_events
+            # all A and B are eventually converted to C, after which no reaction can occur
+            self.assertEqual(network.state, dict(A=0, B=0, C=20))
+            self.assertEqual(network.num_reactions, num_events)
+            self.assertEqual(network.propensity_values, [0, 0, 0])
+            self.assertEqual(network.putative_times.priorities, [math.inf] * 3)
+            self.assertTrue(simulator.event_queue.empty())
+
+        # a network in which no reaction can occur schedules no events
+        simulator = SimulationEngine()
+        network = NextReactionSimulationObject('network', dict(A=0), [dict(A=-1)], [lambda state: state['A']])
+        simulator.add_object(network)
+        simulator.initialize()
+        self.assertTrue(simulator.event_queue.empty())
+
+    def test_exceptions(self):
+        with self.assertRaisesRegex(SimulatorError, '2 reactions, but 1 propensities'):
+            NextReactionSimulationObject('network', dict(A=1), [dict(A=-1), dict(A=1)], [lambda state: 1])
+        with self.assertRaisesRegex(SimulatorError, '1 reactions, but 2 dependencies'):
+            NextReactionSimulationObject('network', dict(A=1), [dict(A=-1)], [lambda state: 1],
+                                         dependencies=[[0], [0]])
+
+
+class TestTauLeapingSimulationObject(unittest.TestCase):
+
+    def simulate_decay(self, count, end_time, arrival_times=(), seed=11, **kwargs):
+        simulator = SimulationEngine()
+        decay = Decay('decay', count, 1., **kwargs)
+        decay.random_state.seed(seed)
+        simulator.add_objects([decay, Source('source', decay, arrival_times, count)])
+        simulator.initialize()
+        simulator.simulate(end_time)
+        return decay
+
+    def test_tau_leaping(self):
+        decay = self.simulate_decay(100000, 1, epsilon=0.03)
+        self.assertEqual(sum(decay.state.values()), 100000)
+        self.assertEqual(decay.num_reactions, decay.state['B'])
+        # leaps are much fewer than reactions; the mean number of A remaining is 100000 / e
+        self.assertLess(decay.num_leaps, decay.num_reactions / 100)
+        self.assertLess(abs(decay.state['A'] - 100000 / math.e), 1000)
+
+        # a smaller epsilon takes more leaps
+        self.assertLess(decay.num_leaps, self.simulate_decay(100000, 1, epsilon=0.01).num_leaps)
+
+        # leaps are bounded by max_step
+        self.assertGreaterEqual(self.simulate_decay(100000, 1, max_step=0.001).num_leaps, 1000)
+
+        # small counts are simulated with exact steps, until no reaction can occur
+        decay = self.simulate_decay(5, 1000)
+        self.assertEqual(decay.state, dict(A=0, B=5))
+        self.assertEqual((decay.num_leaps, decay.num_exact_steps, decay.num_reactions), (5, 5, 5))
+        self.assertIsNone(decay.leap_handle)
+
+    def test_update_state(self):
+        # arrivals from another object interrupt leaps, and restart a network in which no reaction can occur
+        decay = self.simulate_decay(10000, 100, arrival_times=[0.5, 1.5, 50])
+        self.assertEqual(decay.state, dict(A=0, B=40000))
+        self.assertEqual(decay.num_reactions, 40000)
+
+        decay = Decay('decay', 0, 1.)
+        with self.assertRaisesRegex(SimulatorError, "changing the count of 'A' by -1 would make it negative"):
+            decay.update_state(dict(A=-1))
+
+        # a rejected change leaves the state and the current leap unchanged
+        decay = self.simulate_decay(10000, 0.5)
+        state = dict(decay.state)
+        with self.assertRaisesRegex(SimulatorError, "changing the count of 'A' by -10000 would make it negative"):
+            decay.update_state(dict(B=1, A=-10000))
+        self.assertEqual(decay.state, state)
+        self.assertTrue(decay.leap_handle.pending)
+
+        # infeasible draws are capped, executing reactions in order
+        chain = TauLeapingSimulationObject('chain', dict(A=0, B=1, C=0), [dict(A=-1, B=1), dict(B=-1, C=1)],
+                                           [lambda state: state['A'], lambda state: state['B']])
+        self.assertEqual(chain._capped([0, 5]), [0, 1])
+        chain.state.update(A=2, B=0)
+        self.assertEqual(chain._capped([1, 3]), [1, 1])
+
+    def test_exceptions(self):
+        with self.assertRaisesRegex(SimulatorError, '2 reactions, but 1 propensities'):
+            TauLeapingSimulationObject('network', dict(A=1), [dict(A=-1), dict(A=1)], [lambda state: 1])
+        with self.assertRaisesRegex(SimulatorError, 'reaction 0 changes no species'):
+            TauLeapingSimulationObject('network', dict(A=5), [dict(A=0)], [lambda state: 1.])
+        for kwargs in [dict(epsilon=0), dict(max_step=-1)]:
+            with self.assertRaisesRegex(SimulatorError, 'must be positive'):
+                Decay('decay', 1, 1., **kwargs)
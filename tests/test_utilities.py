@@ -9,10 +9,13 @@
 from abc import ABCMeta, abstractmethod
 from capturer import CaptureOutput
 from logging2 import Logger, LogLevel, StdOutHandler
+import math
+import numpy
+import random
 import sys
 import unittest
 
-from de_sim.utilities import ConcreteABCMeta, SimulationProgressBar, FastLogger
+from de_sim.utilities import ConcreteABCMeta, SimulationProgressBar, FastLogger, IndexedPriorityQueue
 from de_sim.config import core
 from wc_utils.debug_logs.core import DebugLogsManager
 
@@ -118,6 +121,17 @@ class TestFastLogger(unittest.TestCase):
             fast_logger.fast_log(message)
             self.assertTrue(capturer.get_text().endswith(message))
 
+        # arguments are formatted into the message only if the logger is active
+        class Unformattable(object):
+            def __format__(self, format_spec):
+                raise AssertionError('formatted')
+
+        FastLogger(self.fixture_logger, 'info').fast_log('{}', Unformattable())
+        with CaptureOutput(relay=False) as capturer:
+            fast_logger = FastLogger(self.fixture_logger, self.fixture_level.name)
+            fast_logger.fast_log('{} {:4.1f}', 'hi', 2)
+            self.assertTrue(capturer.get_text().endswith('hi  2.0'))
+
     def test_config(self):
         debug_config = core.get_debug_logs_config(cfg_path=('tests', 'fixtures/config/debug.default.cfg'))
         debug_log_manager = DebugLogsManager().setup_logs(debug_config)
@@ -136,3 +150,48 @@ class TestFastLogger(unittest.TestCase):
 
         file_logger = debug_log_manager.logs['de_sim.debug.file']
         self.assertFalse(FastLogger(file_logger, 'debug').active)
+
+
+class TestIndexedPriorityQueue(unittest.TestCase):
+
+    def check_queue(self, queue):
+        # the heap is ordered, and positions index it
+        heap = queue.heap
+        for position, key in enumerate(heap):
+            self.assertEqual(queue.positions[key], position)
+            if position:
+                parent = heap[(position - 1) >> 1]
+                self.assertLessEqual((queue.priorities[parent], parent), (queue.priorities[key], key))
+        expected = min((priority, key) for key, priority in enumerate(queue.priorities))
+        self.assertEqual(queue.peek(), expected)
+
+    def test(self):
+        random.seed(11)
+        queue = IndexedPriorityQueue([3, 1, 2, math.inf, 1])
+        self.assertEqual(len(queue), 5)
+        # equal priorities are ordered by key
+        self.assertEqual(queue.peek(), (1, 1))
+        queue.update(1, 4)
+        self.assertEqual(queue.peek(), (1, 4))
+        queue.update(3, 0)
+        self.assertEqual(queue.peek(), (0, 3))
+        queue.update(3, 0)
+        self.check_queue(queue)
+
+        queue = IndexedPriorityQueue(random.random() for _ in range(100))
+        for _ in range(1000):
+            queue.update(random.randrange(100), random.choice([math.inf, random.random(), 0.5]))
+            self.check_queue(queue)
+
+        # update many keys, individually and by rebuilding the heap
+        for num_keys in [3, 50]:
+            keys = numpy.array(random.sample(range(100), num_keys))
+            priorities = numpy.random.random(num_keys)
+            queue.update_many(keys, priorities)
+            self.check_queue(queue)
+            self.assertEqual([queue.priorities[key] for key in keys], priorities.tolist())
+        queue.update_many([1, 2], [0, 0])
+        self.assertEqual(queue.peek(), (0, 1))
+
+        with self.assertRaises(IndexError):
+            IndexedPriorityQueue([]).peek()